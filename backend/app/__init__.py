@@ -4,10 +4,11 @@ from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
 from app.config import Config
 from app.models import db
+import os
 
-def create_app():
+def create_app(config_class=Config):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_class)
     
     # CRITICAL: Configure JWT to accept tokens from Authorization header
     app.config['JWT_TOKEN_LOCATION'] = ['headers']
@@ -29,8 +30,8 @@ def create_app():
             "http://172.190.189.124"
         ],
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"],
-            "expose_headers": ["Content-Type", "Authorization"],
+            "allow_headers": ["Content-Type", "Authorization", "Content-Range", "X-Chunk-SHA256", "Range", "If-Range"],
+            "expose_headers": ["Content-Type", "Authorization", "Content-Range", "Accept-Ranges", "Content-Disposition", "ETag"],
             "supports_credentials": False
         }
     })
@@ -38,18 +39,62 @@ def create_app():
     JWTManager(app)
     Migrate(app, db)
     
+    from app.services.passwords import password_hasher
+    from app.services.autocomplete import autocomplete
+    from app.services.pubsub import pubsub, install_session_hooks
+    from app.services.ingestion import health_data_jobs
+    from app.services.uploads import resumable_uploads
+    from app.services.storage import content_store
+    autocomplete.refresh_seconds = app.config['AUTOCOMPLETE_REFRESH_SECONDS']
+    password_hasher.configure(
+        app.config['PASSWORD_HASH_METHOD'],
+        app.config['PASSWORD_HASH_WORKERS'],
+        app.config['PASSWORD_HASH_QUEUE_TIMEOUT'],
+        app.config['PASSWORD_HASH_POOL']
+    )
+    pubsub.configure(app.config['PUBSUB_URL'])
+    health_data_jobs.configure(
+        app.config['HEALTH_DATA_WORKERS'],
+        app.config['HEALTH_DATA_PROCESSES'],
+        app.config['HEALTH_DATA_STALE_MINUTES']
+    )
+    resumable_uploads.configure(
+        os.path.join(app.config['UPLOAD_FOLDER'], 'partial'),
+        app.config['UPLOAD_CHUNK_SIZE'],
+        app.config['UPLOAD_MAX_SIZE'],
+        app.config['UPLOAD_SESSION_TTL_HOURS']
+    )
+    content_store.configure(os.path.join(app.config['UPLOAD_FOLDER'], 'objects'))
+    install_session_hooks(db.session)
+    
+    # Pick up imports a previous worker left behind; on the first request so
+    # CLI commands such as `flask db upgrade` don't start importing
+    app.before_request(health_data_jobs.recover_once)
+    
     # Register blueprints
     from app.routes.auth import auth_bp
     from app.routes.patient import patient_bp
     from app.routes.doctor import doctor_bp
     from app.routes.appointment import appointment_bp
     from app.routes.chat import chat_bp
+    from app.routes.calendar import calendar_bp
+    from app.routes.notifications import notifications_bp
+    from app.routes.events import events_bp
+    from app.routes.uploads import uploads_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(patient_bp, url_prefix='/api/patient')
     app.register_blueprint(doctor_bp, url_prefix='/api/doctor')
     app.register_blueprint(appointment_bp, url_prefix='/api')
     app.register_blueprint(chat_bp, url_prefix='/api')
+    app.register_blueprint(calendar_bp, url_prefix='/api/calendar')
+    app.register_blueprint(notifications_bp, url_prefix='/api/notifications')
+    app.register_blueprint(events_bp, url_prefix='/api/events')
+    app.register_blueprint(uploads_bp, url_prefix='/api/uploads')
+    
+    from app.cli import ingest_command, storage_gc_command
+    app.cli.add_command(ingest_command)
+    app.cli.add_command(storage_gc_command)
     
     # Health check endpoint
     @app.route('/api/health')
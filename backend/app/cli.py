@@ -0,0 +1,74 @@
+import time
+from datetime import timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from app.models import db, Patient
+from app.services.ingestion import health_data_file_type
+from app.services.ingestion.parallel import ingest_files
+from app.services.ingestion.pipeline import ARCHIVE_TYPES, PARSERS
+from app.services.storage import content_store
+
+
+@click.command('ingest')
+@click.argument('patient_id', type=int)
+@click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option('--processes', type=int, default=None, help='Parser processes (default: HEALTH_DATA_PROCESSES, 0 = one per CPU)')
+@click.option('--chunk-size', type=int, default=None, help='Metrics per bulk INSERT (default: HEALTH_DATA_CHUNK_SIZE)')
+@with_appcontext
+def ingest_command(patient_id, paths, processes, chunk_size):
+    """Import health data files for PATIENT_ID, parsing them in parallel.
+
+    Files are read in place (CSV, JSON, NDJSON, TXT, Apple Health XML,
+    optionally .gz, or a ZIP export) and are not
+    recorded as uploads. Readings already stored are skipped, so the
+    command can be re-run safely.
+    """
+    paths = list(dict.fromkeys(paths))
+    if not db.session.get(Patient, patient_id):
+        raise click.BadParameter(f'No patient with id {patient_id}', param_hint='PATIENT_ID')
+    unsupported = [
+        p for p in paths
+        if health_data_file_type(p).removesuffix('.gz') not in PARSERS and health_data_file_type(p) not in ARCHIVE_TYPES
+    ]
+    if unsupported:
+        raise click.BadParameter(', '.join(unsupported), param_hint='unsupported file type')
+    
+    if processes is None:
+        processes = current_app.config['HEALTH_DATA_PROCESSES']
+    chunk_size = chunk_size or current_app.config['HEALTH_DATA_CHUNK_SIZE']
+    
+    start = time.perf_counter()
+    results = ingest_files(
+        [(path, path, None, patient_id, None) for path in paths],
+        chunk_size=chunk_size,
+        processes=processes
+    )
+    elapsed = time.perf_counter() - start
+    
+    total = 0
+    for path in paths:
+        records_added, error, report = results[path]
+        total += records_added
+        rejected = f', {report["rejected"]} rejected {report["reasons"]}' if report and report['rejected'] else ''
+        if error:
+            click.echo(f'❌ {path}: {error} ({records_added} metrics added before the error{rejected})')
+        else:
+            click.echo(f'✅ {path}: {records_added} metrics added{rejected}')
+    click.echo(f'{total} metrics from {len(paths)} file(s) in {elapsed:.1f}s')
+    
+    if any(error for _, error, _ in results.values()):
+        raise SystemExit(1)
+
+
+@click.command('storage-gc')
+@click.option('--grace-minutes', type=int, default=60, help='Only delete files unreferenced for at least this long')
+@with_appcontext
+def storage_gc_command(grace_minutes):
+    """Delete stored upload files that no record references any more.
+
+    Deleting a medical record or health data file only drops its reference;
+    run this periodically (e.g. from cron) to reclaim the space.
+    """
+    freed = content_store.collect(timedelta(minutes=grace_minutes))
+    click.echo(f'{freed / 2 ** 20:.1f} MB freed')
@@ -16,13 +16,60 @@ class Config:
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your-secret-key-change-in-production')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
     
+    # Password hashing (any Werkzeug method string; existing hashes are
+    # upgraded on the next successful login when this changes)
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 4))
+    PASSWORD_HASH_POOL = os.getenv('PASSWORD_HASH_POOL', 'thread')  # 'thread' or 'process'
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv('PASSWORD_HASH_QUEUE_TIMEOUT', 5))
+    
+    # Autocomplete indexes are fully rebuilt this often to pick up other workers' changes
+    AUTOCOMPLETE_REFRESH_SECONDS = int(os.getenv('AUTOCOMPLETE_REFRESH_SECONDS', 300))
+    
+    # Live events (SSE). Leave PUBSUB_URL empty for in-process delivery (one
+    # worker); set it to a redis:// URL to fan out across workers.
+    PUBSUB_URL = os.getenv('PUBSUB_URL', '')
+    SSE_MAX_CONNECTIONS = int(os.getenv('SSE_MAX_CONNECTIONS', 200))  # per worker
+    SSE_HEARTBEAT_SECONDS = int(os.getenv('SSE_HEARTBEAT_SECONDS', 15))
+    SSE_MAX_STREAM_SECONDS = int(os.getenv('SSE_MAX_STREAM_SECONDS', 300))
+    
+    # Accounts allowed to read operational endpoints such as /api/events/stats
+    # (comma-separated emails; empty means nobody)
+    OPS_EMAILS = [email.strip().lower() for email in os.getenv('OPS_EMAILS', '').split(',') if email.strip()]
+    
     # OpenAI
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
     
     # File Upload
     UPLOAD_FOLDER = 'uploads'
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))  # 16MB max file size
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'pdf', 'dcm'}
     
+    # Resumable uploads (/api/uploads) for files past MAX_CONTENT_LENGTH: sent in
+    # chunks of up to UPLOAD_CHUNK_SIZE bytes (keep it below MAX_CONTENT_LENGTH),
+    # up to UPLOAD_MAX_SIZE per file; unfinished uploads expire after
+    # UPLOAD_SESSION_TTL_HOURS.
+    UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024))
+    UPLOAD_MAX_SIZE = int(os.getenv('UPLOAD_MAX_SIZE', 2 * 1024 ** 3))
+    UPLOAD_SESSION_TTL_HOURS = int(os.getenv('UPLOAD_SESSION_TTL_HOURS', 24))
+    
+    # How file downloads are sent once authorized: 'direct' (by the worker, with
+    # Range support), 'x-accel' (nginx serves FILE_ACCEL_PREFIX + path under
+    # UPLOAD_FOLDER from an internal location) or 'x-sendfile' (Apache/lighttpd).
+    # nginx:  location /protected-files/ { internal; alias /path/to/backend/uploads/; }
+    FILE_SERVE_MODE = os.getenv('FILE_SERVE_MODE', 'direct')
+    FILE_ACCEL_PREFIX = os.getenv('FILE_ACCEL_PREFIX', '/protected-files/')
+    
+    # Health data ingestion: uploads are imported by a background pool of
+    # HEALTH_DATA_WORKERS threads per process, HEALTH_DATA_CHUNK_SIZE metrics
+    # per bulk INSERT. Multi-file uploads and `flask ingest` parse in up to
+    # HEALTH_DATA_PROCESSES processes (0 = one per CPU). Imports still
+    # 'processing' HEALTH_DATA_STALE_MINUTES after they started are taken to
+    # have lost their worker and can be retried or deleted.
+    HEALTH_DATA_WORKERS = int(os.getenv('HEALTH_DATA_WORKERS', 2))
+    HEALTH_DATA_PROCESSES = int(os.getenv('HEALTH_DATA_PROCESSES', 0))
+    HEALTH_DATA_CHUNK_SIZE = int(os.getenv('HEALTH_DATA_CHUNK_SIZE', 5000))
+    HEALTH_DATA_STALE_MINUTES = int(os.getenv('HEALTH_DATA_STALE_MINUTES', 60))
+    
     # CORS
     CORS_HEADERS = 'Content-Type'
\ No newline at end of file
@@ -1,27 +1,38 @@
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+import os
+from datetime import datetime, timedelta
 
 db = SQLAlchemy()
 
 class User(db.Model):
     __tablename__ = 'users'
+    __table_args__ = (
+        db.Index('uq_users_calendar_token', 'calendar_token', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
     role = db.Column(db.String(20), nullable=False)  # 'doctor' or 'patient'
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    calendar_token = db.Column(db.String(64))  # secret for the .ics feed URL
     
     # Relationships
     doctor_profile = db.relationship('Doctor', backref='user', uselist=False, cascade='all, delete-orphan')
     patient_profile = db.relationship('Patient', backref='user', uselist=False, cascade='all, delete-orphan')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        from app.services.passwords import password_hasher
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        from app.services.passwords import password_hasher
+        return password_hasher.verify(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """True if the hash predates the configured hashing parameters"""
+        from app.services.passwords import password_hasher
+        return password_hasher.needs_rehash(self.password_hash)
     
     def to_dict(self):
         return {
@@ -49,15 +60,19 @@ class Doctor(db.Model):
     bio = db.Column(db.Text)  # About the doctor
     availability = db.Column(db.String(255))  # Working hours/schedule
     rating = db.Column(db.Float, default=5.0)  # Average rating
+    # Bumped whenever the doctor's assignments change (see PatientAccessCache)
+    access_version = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     
     # Relationships
     patients = db.relationship('PatientDoctorAssignment', back_populates='doctor')
     appointments = db.relationship('Appointment', back_populates='doctor')
     
-    def to_dict(self):
-        # Calculate patient and appointment counts
-        patient_count = len([a for a in self.patients if a.is_active])
-        appointment_count = len(self.appointments)
+    def to_dict(self, patient_count=None, appointment_count=None):
+        # Calculate patient and appointment counts unless the caller batched them
+        if patient_count is None:
+            patient_count = len([a for a in self.patients if a.is_active])
+        if appointment_count is None:
+            appointment_count = len(self.appointments)
         
         return {
             'id': self.id,
@@ -166,6 +181,11 @@ class PatientDoctorRequest(db.Model):
 
 class HealthMetric(db.Model):
     __tablename__ = 'health_metrics'
+    __table_args__ = (
+        # Latest-reading and per-type history lookups; unique so re-imported
+        # readings are skipped instead of duplicated
+        db.Index('uq_health_metrics_patient_type_recorded', 'patient_id', 'metric_type', 'recorded_at', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     patient_id = db.Column(db.Integer, db.ForeignKey('patients.id'), nullable=False)
@@ -198,13 +218,20 @@ class MedicalRecord(db.Model):
     record_type = db.Column(db.String(50), nullable=False)  # xray, lab_test, report, etc.
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
+    filename = db.Column(db.String(255))  # name of the uploaded file
     file_path = db.Column(db.String(500))
+    content_hash = db.Column(db.String(64))  # sha256 of the file, its name in the content store
     uploaded_by = db.Column(db.Integer, db.ForeignKey('users.id'))
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
     patient = db.relationship('Patient', back_populates='medical_records')
     
+    @property
+    def download_name(self):
+        # Content store paths carry no name; records from before it use the stored file's
+        return self.filename or os.path.basename(self.file_path or '')
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -212,6 +239,7 @@ class MedicalRecord(db.Model):
             'record_type': self.record_type,
             'title': self.title,
             'description': self.description,
+            'filename': self.filename,
             'file_path': self.file_path,
             'uploaded_by': self.uploaded_by,
             'uploaded_at': self.uploaded_at.isoformat()
@@ -220,44 +248,124 @@ class MedicalRecord(db.Model):
 
 class Appointment(db.Model):
     __tablename__ = 'appointments'
+    __table_args__ = (
+        # Overlap checks and free-slot lookups scan one doctor's time range
+        db.Index('ix_appointments_doctor_date', 'doctor_id', 'appointment_date'),
+        # Upcoming/pending lists scan one participant's appointments in a status
+        db.Index('ix_appointments_doctor_status_date', 'doctor_id', 'status', 'appointment_date'),
+        db.Index('ix_appointments_patient_status_date', 'patient_id', 'status', 'appointment_date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     patient_id = db.Column(db.Integer, db.ForeignKey('patients.id'), nullable=False)
     doctor_id = db.Column(db.Integer, db.ForeignKey('doctors.id'), nullable=False)
     appointment_date = db.Column(db.DateTime, nullable=False)
+    duration_minutes = db.Column(db.Integer, nullable=False, default=30, server_default='30')
     status = db.Column(db.String(20), default='pending')  # pending, approved, rejected, completed
     reason = db.Column(db.Text)
     notes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     patient = db.relationship('Patient', back_populates='appointments')
     doctor = db.relationship('Doctor', back_populates='appointments')
     
+    @property
+    def end_date(self):
+        return self.appointment_date + timedelta(minutes=self.duration_minutes or 30)
+    
     def to_dict(self):
         return {
             'id': self.id,
             'patient_id': self.patient_id,
             'doctor_id': self.doctor_id,
             'appointment_date': self.appointment_date.isoformat(),
+            'duration_minutes': self.duration_minutes,
+            'end_date': self.end_date.isoformat(),
             'status': self.status,
             'reason': self.reason,
             'notes': self.notes,
-            'created_at': self.created_at.isoformat()
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+class DoctorAvailability(db.Model):
+    """Recurring weekly working hours; times use the same clock as appointment_date"""
+    __tablename__ = 'doctor_availability'
+    __table_args__ = (
+        db.Index('ix_doctor_availability_doctor_weekday', 'doctor_id', 'weekday'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    doctor_id = db.Column(db.Integer, db.ForeignKey('doctors.id'), nullable=False)
+    weekday = db.Column(db.Integer, nullable=False)  # 0 = Monday ... 6 = Sunday
+    start_time = db.Column(db.Time, nullable=False)
+    end_time = db.Column(db.Time, nullable=False)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'weekday': self.weekday,
+            'start': self.start_time.strftime('%H:%M'),
+            'end': self.end_time.strftime('%H:%M')
+        }
+
+
+class DoctorAvailabilityException(db.Model):
+    """One-off change to the weekly schedule on a given date.
+
+    ``is_available=False`` blocks time off (the whole day when no times are
+    given); ``is_available=True`` adds extra hours.
+    """
+    __tablename__ = 'doctor_availability_exceptions'
+    __table_args__ = (
+        db.Index('ix_doctor_availability_exceptions_doctor_date', 'doctor_id', 'date'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    doctor_id = db.Column(db.Integer, db.ForeignKey('doctors.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    start_time = db.Column(db.Time)
+    end_time = db.Column(db.Time)
+    is_available = db.Column(db.Boolean, default=False, nullable=False)
+    reason = db.Column(db.String(255))
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'date': self.date.isoformat(),
+            'start': self.start_time.strftime('%H:%M') if self.start_time else None,
+            'end': self.end_time.strftime('%H:%M') if self.end_time else None,
+            'is_available': self.is_available,
+            'reason': self.reason
         }
 
 
 class HealthDataFile(db.Model):
     __tablename__ = 'health_data_files'
+    __table_args__ = (
+        db.Index('ix_health_data_files_patient_hash', 'patient_id', 'content_hash'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     patient_id = db.Column(db.Integer, db.ForeignKey('patients.id'), nullable=False)
     filename = db.Column(db.String(255), nullable=False)
     file_path = db.Column(db.String(500), nullable=False)
     file_type = db.Column(db.String(50))  # csv, json, xml
+    content_hash = db.Column(db.String(64))  # sha256 of the uploaded bytes
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
     processed = db.Column(db.Boolean, default=False)
     total_records = db.Column(db.Integer, default=0)
+    # Background import job: queued -> processing -> completed | failed
+    status = db.Column(db.String(20), default='queued', server_default='completed', nullable=False)
+    error = db.Column(db.Text)
+    # Rows left out by validation: count plus a summary ({rejected, reasons, examples})
+    rejected_records = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    error_report = db.Column(db.JSON)
+    started_at = db.Column(db.DateTime)
+    completed_at = db.Column(db.DateTime)
     
     def to_dict(self):
         return {
@@ -267,7 +375,39 @@ class HealthDataFile(db.Model):
             'file_type': self.file_type,
             'uploaded_at': self.uploaded_at.isoformat() if self.uploaded_at else None,
             'processed': self.processed,
-            'total_records': self.total_records
+            'total_records': self.total_records,
+            'rejected_records': self.rejected_records,
+            'status': self.status,
+            'error': self.error,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
+
+
+class Notification(db.Model):
+    __tablename__ = 'notifications'
+    __table_args__ = (
+        # "What's new since id X" and unread counts are range reads per user
+        db.Index('ix_notifications_user_id_id', 'user_id', 'id'),
+        db.Index('ix_notifications_user_unread', 'user_id', 'is_read'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    type = db.Column(db.String(50), nullable=False)  # request_accepted, appointment_approved, metric_alert, etc.
+    message = db.Column(db.Text, nullable=False)
+    data = db.Column(db.JSON)
+    is_read = db.Column(db.Boolean, default=False, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'type': self.type,
+            'message': self.message,
+            'data': self.data or {},
+            'is_read': self.is_read,
+            'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
 
@@ -289,4 +429,43 @@ class ChatMessage(db.Model):
             'content': self.content,
             'context': self.context,
             'created_at': self.created_at.isoformat()
-        }
\ No newline at end of file
+        }
+
+class StoredFile(db.Model):
+    """One file in the content store, shared by every MedicalRecord/HealthDataFile with the same bytes"""
+    __tablename__ = 'stored_files'
+    
+    digest = db.Column(db.String(64), primary_key=True)  # sha256
+    size = db.Column(db.BigInteger, nullable=False)
+    ref_count = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow)  # last reference added or dropped
+
+
+class UploadSession(db.Model):
+    """A resumable upload in progress; its bytes so far are in a temp file named after ``id``"""
+    __tablename__ = 'upload_sessions'
+    
+    id = db.Column(db.String(32), primary_key=True)  # random token
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    patient_id = db.Column(db.Integer, db.ForeignKey('patients.id'), nullable=False)
+    purpose = db.Column(db.String(20), nullable=False)  # health_data, medical_record
+    filename = db.Column(db.String(255), nullable=False)
+    size = db.Column(db.BigInteger, nullable=False)
+    received = db.Column(db.BigInteger, default=0, nullable=False)
+    sha256 = db.Column(db.String(64))  # expected digest of the whole file, if the client sent one
+    fields = db.Column(db.JSON)  # form fields for the final record (title, record_type, ...)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    
+    def to_dict(self):
+        return {
+            'upload_id': self.id,
+            'purpose': self.purpose,
+            'patient_id': self.patient_id,
+            'filename': self.filename,
+            'size': self.size,
+            'offset': self.received,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None
+        }
@@ -9,11 +9,17 @@ from .patient import patient_bp
 from .doctor import doctor_bp
 from .appointment import appointment_bp
 from .chat import chat_bp
+from .calendar import calendar_bp
+from .notifications import notifications_bp
+from .events import events_bp
 
 __all__ = [
     'auth_bp',
     'patient_bp',
     'doctor_bp',
     'appointment_bp',
-    'chat_bp'
+    'chat_bp',
+    'calendar_bp',
+    'notifications_bp',
+    'events_bp'
 ]
\ No newline at end of file
@@ -1,6 +1,13 @@
 from flask import Blueprint, request, jsonify
-from app.models import db, Appointment, Patient, Doctor, PatientDoctorAssignment
+from app.models import db, Appointment, Patient, Doctor
 from app.utils.auth import token_required, get_current_user, role_required
+from app.services.access import patient_access
+from app.services.scheduling import (
+    BLOCKING_STATUSES, find_conflict, conflict_response, parse_duration, to_naive_utc
+)
+from app.services.appointment_lists import list_appointments, parse_limit, serialize_appointments
+from app.services.notifications import notify_appointment
+from app.services.live_events import publish_appointment
 from datetime import datetime
 
 appointment_bp = Blueprint('appointment', __name__)
@@ -35,13 +42,7 @@ def create_appointment():
                 return jsonify({'error': 'doctor_id is required'}), 400
             
             # Verify patient-doctor assignment
-            assignment = PatientDoctorAssignment.query.filter_by(
-                patient_id=patient.id,
-                doctor_id=doctor_id,
-                is_active=True
-            ).first()
-            
-            if not assignment:
+            if not patient_access.has_access(doctor_id, patient.id):
                 return jsonify({'error': 'Can only book with assigned doctors'}), 403
             
             patient_id = patient.id
@@ -57,13 +58,7 @@ def create_appointment():
                 return jsonify({'error': 'patient_id is required'}), 400
             
             # Verify doctor-patient assignment
-            assignment = PatientDoctorAssignment.query.filter_by(
-                doctor_id=doctor.id,
-                patient_id=patient_id,
-                is_active=True
-            ).first()
-            
-            if not assignment:
+            if not patient_access.has_access(doctor.id, patient_id):
                 return jsonify({'error': 'Can only schedule with assigned patients'}), 403
             
             doctor_id = doctor.id
@@ -76,6 +71,18 @@ def create_appointment():
                 appointment_date = datetime.strptime(datetime_str, '%Y-%m-%d %H:%M:%S')
             except ValueError:
                 return jsonify({'error': 'Invalid date format'}), 400
+        appointment_date = to_naive_utc(appointment_date)
+        
+        try:
+            duration_minutes = parse_duration(data.get('duration_minutes'))
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Reject overlaps with the doctor's other pending/approved appointments
+        conflict = find_conflict(doctor_id, appointment_date, duration_minutes)
+        if conflict:
+            db.session.rollback()
+            return jsonify(conflict_response(conflict)), 409
         
         # ✅ Patient creates = 'pending', Doctor creates = 'approved'
         status = 'pending' if user.role == 'patient' else 'approved'
@@ -84,11 +91,13 @@ def create_appointment():
             patient_id=patient_id,
             doctor_id=doctor_id,
             appointment_date=appointment_date,
+            duration_minutes=duration_minutes,
             reason=data.get('reason'),
             status=status
         )
         
         db.session.add(appointment)
+        publish_appointment(appointment, 'created')
         db.session.commit()
         
         # Get related data for response
@@ -137,6 +146,8 @@ def approve_appointment(appointment_id):
         
         # ✅ Change status from 'pending' to 'approved'
         appointment.status = 'approved'
+        notify_appointment(appointment, 'approved', 'patient')
+        publish_appointment(appointment, 'approved')
         db.session.commit()
         
         # Return with patient details
@@ -185,6 +196,8 @@ def reject_appointment(appointment_id):
         if 'notes' in data:
             appointment.notes = data['notes']
         
+        notify_appointment(appointment, 'rejected', 'patient')
+        publish_appointment(appointment, 'rejected')
         db.session.commit()
         
         # Return with patient details
@@ -214,6 +227,7 @@ def update_appointment(appointment_id):
         appointment = Appointment.query.get(appointment_id)
         if not appointment:
             return jsonify({'error': 'Appointment not found'}), 404
+        previous_status = appointment.status
         
         # Check authorization
         if user.role == 'patient':
@@ -242,12 +256,37 @@ def update_appointment(appointment_id):
             
             if 'appointment_date' in data:
                 try:
-                    appointment.appointment_date = datetime.fromisoformat(
+                    appointment.appointment_date = to_naive_utc(datetime.fromisoformat(
                         data['appointment_date'].replace('Z', '+00:00')
-                    )
+                    ))
                 except ValueError:
                     return jsonify({'error': 'Invalid date format'}), 400
-        
+            
+            if 'duration_minutes' in data:
+                try:
+                    appointment.duration_minutes = parse_duration(data['duration_minutes'])
+                except (TypeError, ValueError) as e:
+                    return jsonify({'error': str(e)}), 400
+            
+            # Moving, lengthening or reactivating an appointment must not overlap another one
+            if appointment.status in BLOCKING_STATUSES and (
+                'appointment_date' in data or 'duration_minutes' in data or 'status' in data
+            ):
+                conflict = find_conflict(
+                    appointment.doctor_id,
+                    appointment.appointment_date,
+                    appointment.duration_minutes,
+                    exclude_id=appointment.id
+                )
+                if conflict:
+                    db.session.rollback()
+                    return jsonify(conflict_response(conflict)), 409
+        
+        # Let the other participant know about a cancellation
+        if appointment.status == 'cancelled' and previous_status != 'cancelled':
+            notify_appointment(appointment, 'cancelled', 'doctor' if user.role == 'patient' else 'patient')
+        
+        publish_appointment(appointment, 'updated')
         db.session.commit()
         
         # Return with related data
@@ -292,6 +331,11 @@ def delete_appointment(appointment_id):
             if not doctor or appointment.doctor_id != doctor.id:
                 return jsonify({'error': 'Access denied'}), 403
         
+        # Deleting an active appointment cancels it for the other participant
+        if appointment.status in BLOCKING_STATUSES:
+            notify_appointment(appointment, 'cancelled', 'doctor' if user.role == 'patient' else 'patient')
+        
+        publish_appointment(appointment, 'deleted')
         db.session.delete(appointment)
         db.session.commit()
         
@@ -305,49 +349,48 @@ def delete_appointment(appointment_id):
 @appointment_bp.route('/appointments/upcoming', methods=['GET'])
 @token_required
 def get_upcoming_appointments():
-    """Get upcoming appointments for current user"""
+    """
+    Get upcoming appointments for current user
+    Optional: limit (default 200), cursor (next_cursor from the previous page)
+    """
     try:
         user = get_current_user()
         now = datetime.utcnow()
         
-        if user.role == 'patient':
-            patient = Patient.query.filter_by(user_id=user.id).first()
-            if not patient:
-                return jsonify({'error': 'Patient profile not found'}), 404
-            
-            appointments = Appointment.query.filter(
-                Appointment.patient_id == patient.id,
-                Appointment.appointment_date >= now,
-                Appointment.status.in_(['pending', 'approved', 'scheduled'])
-            ).order_by(Appointment.appointment_date).all()
-            
-        else:  # doctor
-            doctor = Doctor.query.filter_by(user_id=user.id).first()
-            if not doctor:
-                return jsonify({'error': 'Doctor profile not found'}), 404
-            
-            appointments = Appointment.query.filter(
-                Appointment.doctor_id == doctor.id,
-                Appointment.appointment_date >= now,
-                Appointment.status.in_(['pending', 'approved', 'scheduled'])
-            ).order_by(Appointment.appointment_date).all()
-        
-        # Format appointments
-        formatted_appointments = []
-        for apt in appointments:
-            apt_dict = apt.to_dict()
-            apt_dict['appointment_datetime'] = apt.appointment_date.isoformat()
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            cursor = request.args.get('cursor')
             
             if user.role == 'patient':
-                doctor = Doctor.query.get(apt.doctor_id)
-                apt_dict['doctor'] = doctor.to_dict() if doctor else None
-            else:
-                patient = Patient.query.get(apt.patient_id)
-                apt_dict['patient'] = patient.to_dict() if patient else None
-            
-            formatted_appointments.append(apt_dict)
+                patient = Patient.query.filter_by(user_id=user.id).first()
+                if not patient:
+                    return jsonify({'error': 'Patient profile not found'}), 404
+                
+                appointments, next_cursor = list_appointments(
+                    Appointment.patient_id, patient.id, BLOCKING_STATUSES,
+                    since=now, cursor=cursor, limit=limit
+                )
+                
+            else:  # doctor
+                doctor = Doctor.query.filter_by(user_id=user.id).first()
+                if not doctor:
+                    return jsonify({'error': 'Doctor profile not found'}), 404
+                
+                appointments, next_cursor = list_appointments(
+                    Appointment.doctor_id, doctor.id, BLOCKING_STATUSES,
+                    since=now, cursor=cursor, limit=limit
+                )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Participants are fetched in one query rather than per appointment
+        participant = 'doctor' if user.role == 'patient' else 'patient'
+        formatted_appointments = serialize_appointments(appointments, participant)
         
-        return jsonify({'appointments': formatted_appointments}), 200
+        return jsonify({
+            'appointments': formatted_appointments,
+            'next_cursor': next_cursor
+        }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -359,6 +402,7 @@ def get_pending_appointments():
     """
     Get all pending appointment requests for doctor
     These are patient-requested appointments waiting for doctor approval
+    Optional: limit (default 200), cursor (next_cursor from the previous page)
     """
     try:
         user = get_current_user()
@@ -368,23 +412,22 @@ def get_pending_appointments():
             return jsonify({'error': 'Doctor profile not found'}), 404
         
         # ✅ Get only appointments with 'pending' status
-        pending_appointments = Appointment.query.filter(
-            Appointment.doctor_id == doctor.id,
-            Appointment.status == 'pending'
-        ).order_by(Appointment.appointment_date).all()
+        try:
+            pending_appointments, next_cursor = list_appointments(
+                Appointment.doctor_id, doctor.id, ['pending'],
+                cursor=request.args.get('cursor'),
+                limit=parse_limit(request.args.get('limit'))
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Format with patient details
-        formatted_appointments = []
-        for apt in pending_appointments:
-            apt_dict = apt.to_dict()
-            apt_dict['appointment_datetime'] = apt.appointment_date.isoformat()
-            
-            patient = Patient.query.get(apt.patient_id)
-            apt_dict['patient'] = patient.to_dict() if patient else None
-            
-            formatted_appointments.append(apt_dict)
+        formatted_appointments = serialize_appointments(pending_appointments, 'patient')
         
-        return jsonify({'appointments': formatted_appointments}), 200
+        return jsonify({
+            'appointments': formatted_appointments,
+            'next_cursor': next_cursor
+        }), 200
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
@@ -1,8 +1,11 @@
 from flask import Blueprint, request, jsonify
+from sqlalchemy import select
 from app.models import db, User, Patient, Doctor
 from app.utils.auth import token_required, get_current_user
+from app.services.access import patient_access
+from app.services.passwords import PasswordHasherBusy
+from app.services.autocomplete import autocomplete
 from flask_jwt_extended import create_access_token
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 
 auth_bp = Blueprint('auth', __name__)
@@ -63,6 +66,11 @@ def signup():
         
         db.session.commit()
         
+        if data['role'] == 'doctor':
+            autocomplete.update_doctor(doctor)
+        else:
+            autocomplete.update_patient(patient, user.created_at)
+        
         # CRITICAL FIX: Convert user.id to string
         access_token = create_access_token(identity=str(user.id))
         
@@ -72,6 +80,11 @@ def signup():
             'user': user.to_dict()
         }), 201
         
+    except PasswordHasherBusy as e:
+        db.session.rollback()
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = '1'
+        return response, 503
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -92,6 +105,11 @@ def login():
         if not user or not user.check_password(data['password']):
             return jsonify({'error': 'Invalid email or password'}), 401
         
+        # Upgrade hashes made with old parameters while we have the plaintext
+        if user.password_needs_rehash():
+            user.set_password(data['password'])
+            db.session.commit()
+        
         # CRITICAL FIX: Convert user.id to string
         access_token = create_access_token(identity=str(user.id))
         
@@ -109,7 +127,12 @@ def login():
             'profile': profile.to_dict() if profile else None
         }), 200
         
+    except PasswordHasherBusy as e:
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = '1'
+        return response, 503
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 
@@ -177,6 +200,11 @@ def update_profile():
         
         db.session.commit()
         
+        if profile and user.role == 'doctor':
+            autocomplete.update_doctor(profile)
+        elif profile:
+            autocomplete.update_patient(profile, user.created_at)
+        
         return jsonify({
             'message': 'Profile updated successfully',
             'profile': profile.to_dict()
@@ -193,7 +221,8 @@ def delete_account():
     try:
         from app.models import Patient, Doctor, HealthMetric, MedicalRecord, HealthDataFile
         from app.models import Appointment, PatientDoctorRequest, PatientDoctorAssignment, ChatMessage
-        import os
+        from app.models import DoctorAvailability, DoctorAvailabilityException, Notification
+        from app.services.storage import content_store
         
         user = get_current_user()
         
@@ -215,22 +244,20 @@ def delete_account():
                 # Delete medical records (and their files)
                 records = MedicalRecord.query.filter_by(patient_id=patient.id).all()
                 for record in records:
-                    if record.file_path and os.path.exists(record.file_path):
-                        try:
-                            os.remove(record.file_path)
-                        except Exception as e:
-                            print(f"  ⚠️ Could not delete file {record.file_path}: {e}")
+                    try:
+                        content_store.release(record.file_path)
+                    except Exception as e:
+                        print(f"  ⚠️ Could not delete file {record.file_path}: {e}")
                 MedicalRecord.query.filter_by(patient_id=patient.id).delete()
                 print("  ✓ Deleted medical records")
                 
                 # Delete health data files
                 health_files = HealthDataFile.query.filter_by(patient_id=patient.id).all()
                 for hf in health_files:
-                    if hf.file_path and os.path.exists(hf.file_path):
-                        try:
-                            os.remove(hf.file_path)
-                        except Exception as e:
-                            print(f"  ⚠️ Could not delete file {hf.file_path}: {e}")
+                    try:
+                        content_store.release(hf.file_path)
+                    except Exception as e:
+                        print(f"  ⚠️ Could not delete file {hf.file_path}: {e}")
                 HealthDataFile.query.filter_by(patient_id=patient.id).delete()
                 print("  ✓ Deleted health data files")
                 
@@ -242,7 +269,10 @@ def delete_account():
                 PatientDoctorRequest.query.filter_by(patient_id=patient.id).delete()
                 print("  ✓ Deleted doctor requests")
                 
-                # Delete doctor-patient assignments
+                # Delete doctor-patient assignments, revoking access in every worker
+                patient_access.changed(
+                    select(PatientDoctorAssignment.doctor_id).where(PatientDoctorAssignment.patient_id == patient.id)
+                )
                 PatientDoctorAssignment.query.filter_by(patient_id=patient.id).delete()
                 print("  ✓ Deleted doctor assignments")
                 
@@ -254,6 +284,7 @@ def delete_account():
                     print("  ⚠️ ChatMessage table not found, skipping")
                 
                 # Delete patient profile
+                autocomplete.remove_patient(patient.id)
                 db.session.delete(patient)
                 print("  ✓ Deleted patient profile")
         
@@ -274,14 +305,18 @@ def delete_account():
                 PatientDoctorAssignment.query.filter_by(doctor_id=doctor.id).delete()
                 print("  ✓ Deleted patient assignments")
                 
+                # Delete schedule
+                DoctorAvailability.query.filter_by(doctor_id=doctor.id).delete()
+                DoctorAvailabilityException.query.filter_by(doctor_id=doctor.id).delete()
+                print("  ✓ Deleted availability")
+                
                 # Delete medical records uploaded by this doctor
                 records = MedicalRecord.query.filter_by(uploaded_by=user.id).all()
                 for record in records:
-                    if record.file_path and os.path.exists(record.file_path):
-                        try:
-                            os.remove(record.file_path)
-                        except Exception as e:
-                            print(f"  ⚠️ Could not delete file {record.file_path}: {e}")
+                    try:
+                        content_store.release(record.file_path)
+                    except Exception as e:
+                        print(f"  ⚠️ Could not delete file {record.file_path}: {e}")
                 MedicalRecord.query.filter_by(uploaded_by=user.id).delete()
                 print("  ✓ Deleted medical records")
                 
@@ -293,12 +328,17 @@ def delete_account():
                     print("  ⚠️ ChatMessage table not found, skipping")
                 
                 # Delete doctor profile
+                autocomplete.remove_doctor(doctor.id)
                 db.session.delete(doctor)
                 print("  ✓ Deleted doctor profile")
         
+        # Delete inbox
+        Notification.query.filter_by(user_id=user.id).delete()
+        
         # Finally, delete the user account
         db.session.delete(user)
         db.session.commit()
+        patient_access.invalidate()
         
         print(f"✅ Account {user.email} successfully deleted")
         
@@ -0,0 +1,170 @@
+from flask import Blueprint, Response, jsonify, request, stream_with_context, url_for
+from sqlalchemy import func
+from app.models import db, User, Patient, Doctor, Appointment
+from app.utils.auth import token_required, get_current_user
+from app.utils.ical import calendar_header, calendar_footer, event
+from datetime import datetime, timedelta
+import hashlib
+import secrets
+
+calendar_bp = Blueprint('calendar', __name__)
+
+# Past appointments older than this drop out of the feed
+FEED_HISTORY_DAYS = 90
+FEED_STATUSES = ('pending', 'approved', 'scheduled', 'completed')
+FEED_BATCH_SIZE = 500
+
+
+def _feed_url(user):
+    return url_for('calendar.calendar_feed', token=user.calendar_token, _external=True)
+
+
+def _feed_query(user):
+    """Filter conditions and counterpart model for the user's feed, or None"""
+    since = (datetime.utcnow() - timedelta(days=FEED_HISTORY_DAYS)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    if user.role == 'doctor':
+        doctor = Doctor.query.filter_by(user_id=user.id).first()
+        if not doctor:
+            return None
+        owner, counterpart, join_column = Appointment.doctor_id == doctor.id, Patient, Appointment.patient_id
+    else:
+        patient = Patient.query.filter_by(user_id=user.id).first()
+        if not patient:
+            return None
+        owner, counterpart, join_column = Appointment.patient_id == patient.id, Doctor, Appointment.doctor_id
+    
+    conditions = (owner, Appointment.status.in_(FEED_STATUSES), Appointment.appointment_date >= since)
+    return since, conditions, counterpart, join_column
+
+
+def _feed_etag(user, since, conditions):
+    """Cheap aggregate that changes whenever a feed event is added, edited or removed"""
+    count, last_updated, last_id = db.session.query(
+        func.count(Appointment.id),
+        func.max(func.coalesce(Appointment.updated_at, Appointment.created_at)),
+        func.max(Appointment.id)
+    ).filter(*conditions).one()
+    fingerprint = f'{user.id}:{since.date()}:{count}:{last_updated}:{last_id}'
+    return hashlib.sha1(fingerprint.encode()).hexdigest()
+
+
+@calendar_bp.route('/feed', methods=['GET'])
+@token_required
+def get_calendar_feed():
+    """Get (creating on first use) the current user's private calendar feed URL"""
+    try:
+        user = get_current_user()
+        
+        if not user.calendar_token:
+            user.calendar_token = secrets.token_urlsafe(32)
+            db.session.commit()
+        
+        return jsonify({'url': _feed_url(user)}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@calendar_bp.route('/feed/rotate', methods=['POST'])
+@token_required
+def rotate_calendar_feed():
+    """Issue a new feed URL; the old one stops working immediately"""
+    try:
+        user = get_current_user()
+        user.calendar_token = secrets.token_urlsafe(32)
+        db.session.commit()
+        
+        return jsonify({'message': 'Calendar feed URL rotated', 'url': _feed_url(user)}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@calendar_bp.route('/feed', methods=['DELETE'])
+@token_required
+def revoke_calendar_feed():
+    """Disable the current user's calendar feed"""
+    try:
+        user = get_current_user()
+        user.calendar_token = None
+        db.session.commit()
+        
+        return jsonify({'message': 'Calendar feed disabled'}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@calendar_bp.route('/<token>.ics', methods=['GET'])
+def calendar_feed(token):
+    """
+    Public iCalendar feed, authenticated by the secret token in the URL.
+    Calendar clients poll this; unchanged feeds are answered with 304.
+    """
+    try:
+        user = User.query.filter_by(calendar_token=token).first()
+        if not user:
+            return jsonify({'error': 'Calendar feed not found'}), 404
+        
+        feed = _feed_query(user)
+        if not feed:
+            return jsonify({'error': 'Profile not found'}), 404
+        since, conditions, counterpart, join_column = feed
+        
+        etag = _feed_etag(user, since, conditions)
+        headers = {'Cache-Control': 'private, no-cache'}
+        if request.if_none_match.contains(etag):
+            response = Response(status=304, headers=headers)
+            response.set_etag(etag)
+            return response
+        
+        rows = db.session.query(
+            Appointment.id,
+            Appointment.appointment_date,
+            Appointment.duration_minutes,
+            Appointment.status,
+            Appointment.reason,
+            func.coalesce(Appointment.updated_at, Appointment.created_at).label('stamp'),
+            counterpart.full_name
+        ).join(
+            counterpart, counterpart.id == join_column
+        ).filter(*conditions).order_by(Appointment.appointment_date).yield_per(FEED_BATCH_SIZE)
+        
+        host = request.host.split(':')[0]
+        
+        def generate():
+            # Rows come off a server-side cursor; events are flushed in batches
+            yield calendar_header('Healthcare appointments')
+            batch = []
+            for row in rows:
+                batch.append(event(
+                    uid=f'appointment-{row.id}@{host}',
+                    start=row.appointment_date,
+                    end=row.appointment_date + timedelta(minutes=row.duration_minutes or 30),
+                    stamp=row.stamp or row.appointment_date,
+                    summary=f'Appointment with {row.full_name}',
+                    status=row.status,
+                    description=row.reason
+                ))
+                if len(batch) >= FEED_BATCH_SIZE:
+                    yield ''.join(batch)
+                    batch = []
+            batch.append(calendar_footer())
+            yield ''.join(batch)
+        
+        response = Response(
+            stream_with_context(generate()),
+            mimetype='text/calendar',
+            headers=headers
+        )
+        response.set_etag(etag)
+        response.headers['Content-Disposition'] = 'inline; filename="appointments.ics"'
+        return response
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
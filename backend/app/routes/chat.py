@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from app.models import db, ChatMessage, Patient, Doctor
 from app.utils.auth import token_required, get_current_user
 from app.utils.ai_helper import AIHealthAssistant
+from app.services.access import patient_access
 from datetime import datetime
 
 chat_bp = Blueprint('chat', __name__)
@@ -27,14 +28,7 @@ def chat_with_ai():
                 return jsonify({'error': 'Doctor profile not found'}), 404
             
             # Verify doctor has access to patient
-            from app.models import PatientDoctorAssignment
-            assignment = PatientDoctorAssignment.query.filter_by(
-                doctor_id=doctor.id,
-                patient_id=patient_id,
-                is_active=True
-            ).first()
-            
-            if not assignment:
+            if not patient_access.has_access(doctor.id, patient_id):
                 return jsonify({'error': 'Access denied to this patient'}), 403
         
         # For patients, use their own ID
@@ -135,14 +129,7 @@ def analyze_patient_health(patient_id):
             return jsonify({'error': 'Doctor profile not found'}), 404
         
         # Verify access to patient
-        from app.models import PatientDoctorAssignment
-        assignment = PatientDoctorAssignment.query.filter_by(
-            doctor_id=doctor.id,
-            patient_id=patient_id,
-            is_active=True
-        ).first()
-        
-        if not assignment:
+        if not patient_access.has_access(doctor.id, patient_id):
             return jsonify({'error': 'Access denied to this patient'}), 403
         
         print(f"🔍 Analyzing patient {patient_id} for doctor {doctor.id}")
@@ -1,14 +1,24 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify
 from app.models import db, Patient, HealthMetric, MedicalRecord, Doctor, PatientDoctorAssignment, HealthDataFile, PatientDoctorRequest, Appointment
+from app.models import DoctorAvailability, DoctorAvailabilityException
 from app.utils.auth import token_required, role_required, get_current_user
+from app.services.access import patient_access
+from app.services.doctor_search import search_doctors as search_doctors_index
+from app.services.autocomplete import autocomplete
+from app.services.patient_search import search_patients as search_patients_index, latest_vitals
+from app.services.scheduling import BLOCKING_STATUSES, find_conflict, conflict_response, parse_duration
+from app.services.availability import free_slots, parse_range, parse_time, MAX_DOCTORS
+from app.services.appointment_lists import list_appointments, parse_limit, serialize_appointments
+from app.services.notifications import doctor_notifications, notify, notify_appointment
+from app.services.live_events import publish_appointment
+from app.services.storage import content_store
+from app.services.downloads import send_stored_file
 from datetime import datetime, timedelta
 import os
-import mimetypes
 from werkzeug.utils import secure_filename
 
 doctor_bp = Blueprint('doctor', __name__)
 
-UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'pdf', 'dcm'}
 
 def allowed_file(filename):
@@ -63,13 +73,7 @@ def get_patient_details(patient_id):
             return jsonify({'error': 'Doctor profile not found'}), 404
         
         # Verify doctor has access to this patient
-        assignment = PatientDoctorAssignment.query.filter_by(
-            doctor_id=doctor.id,
-            patient_id=patient_id,
-            is_active=True
-        ).first()
-        
-        if not assignment:
+        if not patient_access.has_access(doctor.id, patient_id):
             return jsonify({'error': 'Access denied to this patient'}), 403
         
         patient = Patient.query.get(patient_id)
@@ -107,13 +111,7 @@ def upload_patient_record(patient_id):
             return jsonify({'error': 'Doctor profile not found'}), 404
         
         # Verify doctor has access to this patient
-        assignment = PatientDoctorAssignment.query.filter_by(
-            doctor_id=doctor.id,
-            patient_id=patient_id,
-            is_active=True
-        ).first()
-        
-        if not assignment:
+        if not patient_access.has_access(doctor.id, patient_id):
             return jsonify({'error': 'Access denied to this patient'}), 403
         
         # Check if file is in request
@@ -128,22 +126,18 @@ def upload_patient_record(patient_id):
         if not allowed_file(file.filename):
             return jsonify({'error': 'File type not allowed'}), 400
         
-        # Save file
-        filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        filename = f"{timestamp}_{filename}"
-        
-        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-        file_path = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(file_path)
+        # Save file (once per distinct content)
+        stored = content_store.save(file.stream)
         
         # Create record
         record = MedicalRecord(
             patient_id=patient_id,
             record_type=request.form.get('record_type', 'report'),
-            title=request.form.get('title', filename),
+            title=request.form.get('title', secure_filename(file.filename)),
             description=request.form.get('description'),
-            file_path=file_path,
+            filename=file.filename,
+            file_path=stored.path,
+            content_hash=stored.digest,
             uploaded_by=user.id
         )
         
@@ -160,6 +154,35 @@ def upload_patient_record(patient_id):
         return jsonify({'error': str(e)}), 500
 
 
+@doctor_bp.route('/patients/<int:patient_id>/records/<int:record_id>/download', methods=['GET'])
+@role_required('doctor')
+def download_patient_record(patient_id, record_id):
+    """Download a patient's medical record (inline=true to display it, e.g. an image)"""
+    try:
+        user = get_current_user()
+        doctor = Doctor.query.filter_by(user_id=user.id).first()
+        
+        if not doctor:
+            return jsonify({'error': 'Doctor profile not found'}), 404
+        
+        # Verify doctor has access to this patient
+        if not patient_access.has_access(doctor.id, patient_id):
+            return jsonify({'error': 'Access denied to this patient'}), 403
+        
+        record = MedicalRecord.query.filter_by(id=record_id, patient_id=patient_id).first()
+        if not record or not record.file_path:
+            return jsonify({'error': 'Record not found'}), 404
+        
+        if not os.path.exists(record.file_path):
+            return jsonify({'error': 'File not found on disk'}), 404
+        
+        inline = request.args.get('inline', '').lower() in ('1', 'true')
+        return send_stored_file(record.file_path, record.download_name, as_attachment=not inline)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @doctor_bp.route('/patients/<int:patient_id>/assign', methods=['POST'])
 @role_required('doctor')
 def assign_patient(patient_id):
@@ -191,6 +214,7 @@ def assign_patient(patient_id):
         )
         
         db.session.add(assignment)
+        patient_access.changed([doctor.id])
         db.session.commit()
         
         return jsonify({
@@ -271,6 +295,14 @@ def accept_patient_request(request_id):
             )
             db.session.add(assignment)
         
+        notify(
+            patient_request.patient.user_id,
+            'request_accepted',
+            f'Dr. {doctor.full_name} accepted your request',
+            doctor_id=doctor.id,
+            request_id=patient_request.id
+        )
+        patient_access.changed([doctor.id])
         db.session.commit()
         
         return jsonify({
@@ -376,20 +408,67 @@ def get_dashboard_summary():
 @doctor_bp.route('/search-patients', methods=['GET'])
 @role_required('doctor')
 def search_patients():
-    """Search for patients by name or email"""
+    """
+    Search for patients by name, email, phone or patient id
+    - scope=all (default): whole patient registry, e.g. to find someone to assign
+    - scope=assigned: only this doctor's active patients
+    Email and latest vitals are only included for the doctor's own patients
+    (null for everyone else).
+    """
     try:
         query = request.args.get('q', '')
+        scope = request.args.get('scope', 'all')
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 10, type=int)
         
         if not query:
-            return jsonify({'patients': []}), 200
+            return jsonify({'patients': [], 'page': page, 'has_more': False}), 200
         
-        # Search in patient names
-        patients = Patient.query.filter(
-            Patient.full_name.ilike(f'%{query}%')
-        ).limit(10).all()
+        if scope not in ('all', 'assigned'):
+            return jsonify({'error': 'scope must be "all" or "assigned"'}), 400
+        
+        user = get_current_user()
+        doctor = Doctor.query.filter_by(user_id=user.id).first()
+        if not doctor:
+            return jsonify({'error': 'Doctor profile not found'}), 404
+        
+        patients, has_more = search_patients_index(query, doctor.id if scope == 'assigned' else None, page, per_page)
+        assigned = patient_access.patient_ids(doctor.id)
+        vitals = latest_vitals([p.id for p in patients if p.id in assigned])
+        
+        results = []
+        for patient in patients:
+            patient_dict = patient.to_dict()
+            patient_dict['email'] = None
+            patient_dict['latest_vitals'] = None
+            if patient.id in assigned:
+                patient_dict['email'] = patient.user.email if patient.user else None
+                patient_dict['latest_vitals'] = {
+                    metric_type: metric.to_dict()
+                    for metric_type, metric in vitals.get(patient.id, {}).items()
+                }
+            results.append(patient_dict)
         
         return jsonify({
-            'patients': [p.to_dict() for p in patients]
+            'patients': results,
+            'page': page,
+            'has_more': has_more
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@doctor_bp.route('/autocomplete-patients', methods=['GET'])
+@role_required('doctor')
+def autocomplete_patients():
+    """Type-ahead patient suggestions by name prefix, most recent sign-ups first"""
+    try:
+        query = request.args.get('q', '')
+        limit = request.args.get('limit', 8, type=int)
+        
+        return jsonify({
+            'suggestions': autocomplete.suggest_patients(query, limit)
         }), 200
         
     except Exception as e:
@@ -403,23 +482,15 @@ def search_available_doctors():
     try:
         query = request.args.get('q', '')
         specialization = request.args.get('specialization', '')
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 20, type=int)
         
-        doctors_query = Doctor.query
-        
-        if query:
-            doctors_query = doctors_query.filter(
-                Doctor.full_name.ilike(f'%{query}%')
-            )
-        
-        if specialization:
-            doctors_query = doctors_query.filter(
-                Doctor.specialization.ilike(f'%{specialization}%')
-            )
-        
-        doctors = doctors_query.limit(20).all()
+        doctors, has_more = search_doctors_index(query, specialization, page, per_page)
         
         return jsonify({
-            'doctors': [d.to_dict() for d in doctors]
+            'doctors': [d.to_dict() for d in doctors],
+            'page': page,
+            'has_more': has_more
         }), 200
         
     except Exception as e:
@@ -447,6 +518,7 @@ def remove_patient_assignment(assignment_id):
             return jsonify({'error': 'Assignment not found'}), 404
         
         # Delete the assignment
+        patient_access.changed([doctor.id])
         db.session.delete(assignment)
         db.session.commit()
         
@@ -472,14 +544,8 @@ def get_doctor_appointments():
             doctor_id=doctor.id
         ).order_by(Appointment.appointment_date.desc()).all()
         
-        result = []
-        for apt in appointments:
-            apt_dict = apt.to_dict()
-            # Add patient details
-            patient = Patient.query.get(apt.patient_id)
-            apt_dict['patient'] = patient.to_dict() if patient else None
-            apt_dict['appointment_datetime'] = apt.appointment_date.isoformat()
-            result.append(apt_dict)
+        # Add patient details (one query for all patients)
+        result = serialize_appointments(appointments, 'patient')
         
         return jsonify({'appointments': result}), 200
         
@@ -499,13 +565,7 @@ def get_patient_auto_metrics(patient_id):
             return jsonify({'error': 'Doctor profile not found'}), 404
         
         # Verify doctor-patient assignment
-        assignment = PatientDoctorAssignment.query.filter_by(
-            doctor_id=doctor.id,
-            patient_id=patient_id,
-            is_active=True
-        ).first()
-        
-        if not assignment:
+        if not patient_access.has_access(doctor.id, patient_id):
             return jsonify({'error': 'Not authorized to view this patient'}), 403
         
         # Get time range
@@ -606,13 +666,7 @@ def get_patient_metrics(patient_id):
             return jsonify({'error': 'Doctor profile not found'}), 404
         
         # Verify doctor has access to this patient
-        assignment = PatientDoctorAssignment.query.filter_by(
-            doctor_id=doctor.id,
-            patient_id=patient_id,
-            is_active=True
-        ).first()
-        
-        if not assignment:
+        if not patient_access.has_access(doctor.id, patient_id):
             return jsonify({'error': 'Access denied to this patient'}), 403
         
         # Get query parameters
@@ -657,13 +711,7 @@ def book_doctor_appointment():
             return jsonify({'error': 'patient_id and appointment_datetime are required'}), 400
         
         # Verify doctor has access to this patient
-        assignment = PatientDoctorAssignment.query.filter_by(
-            doctor_id=doctor.id,
-            patient_id=patient_id,
-            is_active=True
-        ).first()
-        
-        if not assignment:
+        if not patient_access.has_access(doctor.id, patient_id):
             return jsonify({'error': 'Patient not assigned to you'}), 403
         
         # Parse datetime
@@ -672,15 +720,27 @@ def book_doctor_appointment():
         except:
             return jsonify({'error': 'Invalid datetime format. Use YYYY-MM-DD HH:MM'}), 400
         
+        try:
+            duration_minutes = parse_duration(data.get('duration_minutes'))
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+        
+        conflict = find_conflict(doctor.id, appt_date, duration_minutes)
+        if conflict:
+            db.session.rollback()
+            return jsonify(conflict_response(conflict)), 409
+        
         appointment = Appointment(
             patient_id=patient_id,
             doctor_id=doctor.id,
             appointment_date=appt_date,
+            duration_minutes=duration_minutes,
             status='scheduled',  # Doctor-created appointments are auto-approved
             reason=reason
         )
         
         db.session.add(appointment)
+        publish_appointment(appointment, 'created')
         db.session.commit()
         
         return jsonify({
@@ -705,20 +765,18 @@ def get_pending_appointments():
             return jsonify({'error': 'Doctor profile not found'}), 404
         
         # Get pending appointments
-        pending = Appointment.query.filter_by(
-            doctor_id=doctor.id,
-            status='pending'
-        ).order_by(Appointment.appointment_date.asc()).all()
+        try:
+            pending, next_cursor = list_appointments(
+                Appointment.doctor_id, doctor.id, ['pending'],
+                cursor=request.args.get('cursor'),
+                limit=parse_limit(request.args.get('limit'))
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        result = []
-        for apt in pending:
-            apt_dict = apt.to_dict()
-            patient = Patient.query.get(apt.patient_id)
-            apt_dict['patient'] = patient.to_dict() if patient else None
-            apt_dict['appointment_datetime'] = apt.appointment_date.isoformat()
-            result.append(apt_dict)
+        result = serialize_appointments(pending, 'patient')
         
-        return jsonify({'appointments': result}), 200
+        return jsonify({'appointments': result, 'next_cursor': next_cursor}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -747,6 +805,8 @@ def approve_appointment(appointment_id):
             return jsonify({'error': 'Appointment is not pending'}), 400
         
         appointment.status = 'approved'
+        notify_appointment(appointment, 'approved', 'patient')
+        publish_appointment(appointment, 'approved')
         db.session.commit()
         
         return jsonify({
@@ -786,6 +846,8 @@ def reject_appointment(appointment_id):
         
         appointment.status = 'rejected'
         appointment.notes = notes
+        notify_appointment(appointment, 'rejected', 'patient')
+        publish_appointment(appointment, 'rejected')
         db.session.commit()
         
         return jsonify({
@@ -824,10 +886,24 @@ def update_appointment_status(appointment_id):
         if not appointment:
             return jsonify({'error': 'Appointment not found'}), 404
         
+        # Reactivating a cancelled/rejected appointment must not double-book the slot
+        if new_status in BLOCKING_STATUSES and appointment.status not in BLOCKING_STATUSES:
+            conflict = find_conflict(
+                doctor.id, appointment.appointment_date, appointment.duration_minutes,
+                exclude_id=appointment.id
+            )
+            if conflict:
+                db.session.rollback()
+                return jsonify(conflict_response(conflict)), 409
+        
+        if new_status == 'cancelled' and appointment.status != 'cancelled':
+            notify_appointment(appointment, 'cancelled', 'patient')
+        
         appointment.status = new_status
         if notes:
             appointment.notes = notes
         
+        publish_appointment(appointment, 'updated')
         db.session.commit()
         
         return jsonify({
@@ -840,10 +916,25 @@ def update_appointment_status(appointment_id):
         return jsonify({'error': str(e)}), 500
 
 
-@doctor_bp.route('/notifications', methods=['GET'])
+def _availability_payload(doctor_id):
+    """Weekly schedule plus today's and future exceptions"""
+    weekly = DoctorAvailability.query.filter_by(doctor_id=doctor_id).order_by(
+        DoctorAvailability.weekday, DoctorAvailability.start_time
+    ).all()
+    exceptions = DoctorAvailabilityException.query.filter(
+        DoctorAvailabilityException.doctor_id == doctor_id,
+        DoctorAvailabilityException.date >= datetime.utcnow().date()
+    ).order_by(DoctorAvailabilityException.date).all()
+    return {
+        'weekly': [w.to_dict() for w in weekly],
+        'exceptions': [e.to_dict() for e in exceptions]
+    }
+
+
+@doctor_bp.route('/availability', methods=['GET'])
 @role_required('doctor')
-def get_doctor_notifications():
-    """Get doctor notifications"""
+def get_availability():
+    """Get the doctor's weekly schedule and upcoming exceptions"""
     try:
         user = get_current_user()
         doctor = Doctor.query.filter_by(user_id=user.id).first()
@@ -851,49 +942,158 @@ def get_doctor_notifications():
         if not doctor:
             return jsonify({'error': 'Doctor profile not found'}), 404
         
-        notifications = []
+        return jsonify(_availability_payload(doctor.id)), 200
         
-        # Check for pending patient requests
-        pending_requests = PatientDoctorRequest.query.filter_by(
-            doctor_id=doctor.id,
-            status='pending'
-        ).count()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@doctor_bp.route('/availability', methods=['PUT'])
+@role_required('doctor')
+def update_availability():
+    """
+    Replace the doctor's weekly schedule and/or upcoming exceptions.
+    weekly: [{weekday: 0-6 (Monday=0), start: 'HH:MM', end: 'HH:MM'}]
+    exceptions: [{date: 'YYYY-MM-DD', start?, end?, is_available?, reason?}]
+    """
+    try:
+        user = get_current_user()
+        doctor = Doctor.query.filter_by(user_id=user.id).first()
         
-        if pending_requests > 0:
-            notifications.append({
-                'type': 'pending_request',
-                'message': f'You have {pending_requests} pending patient request(s)',
-                'count': pending_requests
-            })
+        if not doctor:
+            return jsonify({'error': 'Doctor profile not found'}), 404
         
-        # Check for pending appointments
-        pending_appointments = Appointment.query.filter_by(
-            doctor_id=doctor.id,
-            status='pending'
-        ).count()
+        data = request.get_json() or {}
         
-        if pending_appointments > 0:
-            notifications.append({
-                'type': 'pending_appointment',
-                'message': f'You have {pending_appointments} appointment request(s) to review',
-                'count': pending_appointments
-            })
+        try:
+            weekly = []
+            for item in data.get('weekly') or []:
+                weekday = int(item['weekday'])
+                start, end = parse_time(item['start']), parse_time(item['end'])
+                if not 0 <= weekday <= 6 or start >= end:
+                    raise ValueError(f'Invalid weekly entry: {item}')
+                weekly.append(DoctorAvailability(
+                    doctor_id=doctor.id, weekday=weekday, start_time=start, end_time=end
+                ))
+            
+            exceptions = []
+            for item in data.get('exceptions') or []:
+                start = parse_time(item['start']) if item.get('start') else None
+                end = parse_time(item['end']) if item.get('end') else None
+                if (start is None) != (end is None) or (start and start >= end):
+                    raise ValueError(f'Invalid exception entry: {item}')
+                exceptions.append(DoctorAvailabilityException(
+                    doctor_id=doctor.id,
+                    date=datetime.strptime(item['date'], '%Y-%m-%d').date(),
+                    start_time=start,
+                    end_time=end,
+                    is_available=bool(item.get('is_available', False)),
+                    reason=item.get('reason')
+                ))
+        except (KeyError, TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid availability: {e}'}), 400
+        
+        if 'weekly' in data:
+            DoctorAvailability.query.filter_by(doctor_id=doctor.id).delete()
+            db.session.add_all(weekly)
+        
+        if 'exceptions' in data:
+            # Past exceptions are kept as history
+            DoctorAvailabilityException.query.filter(
+                DoctorAvailabilityException.doctor_id == doctor.id,
+                DoctorAvailabilityException.date >= datetime.utcnow().date()
+            ).delete(synchronize_session=False)
+            db.session.add_all(exceptions)
         
-        # Check for upcoming appointments (next 24 hours)
-        tomorrow = datetime.utcnow() + timedelta(days=1)
-        upcoming = Appointment.query.filter(
-            Appointment.doctor_id == doctor.id,
-            Appointment.status.in_(['scheduled', 'approved']),
-            Appointment.appointment_date <= tomorrow,
-            Appointment.appointment_date >= datetime.utcnow()
-        ).count()
+        db.session.commit()
         
-        if upcoming > 0:
-            notifications.append({
-                'type': 'upcoming_appointment',
-                'message': f'You have {upcoming} upcoming appointment(s) in the next 24 hours',
-                'count': upcoming
-            })
+        payload = _availability_payload(doctor.id)
+        payload['message'] = 'Availability updated successfully'
+        return jsonify(payload), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+def _slots_response(doctor_ids):
+    """Shared argument handling for the free-slot endpoints"""
+    try:
+        start, end = parse_range(request.args.get('from'), request.args.get('to'))
+        duration_minutes = parse_duration(request.args.get('duration'))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    slots = free_slots(doctor_ids, start, end, duration_minutes)
+    return {
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'duration_minutes': duration_minutes,
+        'slots': {
+            doctor_id: [{'start': s.isoformat(), 'end': e.isoformat()} for s, e in doctor_slots]
+            for doctor_id, doctor_slots in slots.items()
+        }
+    }
+
+
+@doctor_bp.route('/<int:doctor_id>/free-slots', methods=['GET'])
+@token_required
+def get_free_slots(doctor_id):
+    """Open appointment slots for one doctor between from and to"""
+    try:
+        if not db.session.get(Doctor, doctor_id):
+            return jsonify({'error': 'Doctor not found'}), 404
+        
+        result = _slots_response([doctor_id])
+        if isinstance(result, tuple):
+            return result
+        
+        result['doctor_id'] = doctor_id
+        result['slots'] = result['slots'][doctor_id]
+        return jsonify(result), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@doctor_bp.route('/free-slots', methods=['GET'])
+@token_required
+def get_free_slots_bulk():
+    """Open appointment slots for several doctors (doctor_ids=1,2,3)"""
+    try:
+        try:
+            doctor_ids = [int(i) for i in request.args.get('doctor_ids', '').split(',') if i.strip()]
+        except ValueError:
+            return jsonify({'error': 'doctor_ids must be a comma-separated list of ids'}), 400
+        
+        if not doctor_ids:
+            return jsonify({'error': 'doctor_ids is required'}), 400
+        if len(doctor_ids) > MAX_DOCTORS:
+            return jsonify({'error': f'At most {MAX_DOCTORS} doctors per request'}), 400
+        
+        result = _slots_response(doctor_ids)
+        if isinstance(result, tuple):
+            return result
+        
+        return jsonify(result), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@doctor_bp.route('/notifications', methods=['GET'])
+@role_required('doctor')
+def get_doctor_notifications():
+    """Get doctor notifications"""
+    try:
+        user = get_current_user()
+        doctor = Doctor.query.filter_by(user_id=user.id).first()
+        
+        if not doctor:
+            return jsonify({'error': 'Doctor profile not found'}), 404
+        
+        # All three counts come back from one aggregate query
+        notifications = doctor_notifications(doctor.id)
         
         return jsonify({
             'notifications': notifications,
@@ -927,20 +1127,12 @@ def get_patient_health_data_files(patient_id):
         print(f"✅ Patient found: {patient.full_name}")
         
         # Verify doctor has access to this patient
-        assignment = PatientDoctorAssignment.query.filter_by(
-            doctor_id=doctor.id,
-            patient_id=patient_id,
-            is_active=True
-        ).first()
-        
-        if not assignment:
+        if not patient_access.has_access(doctor.id, patient_id):
             print(f"❌ No active assignment found between doctor {doctor.id} and patient {patient_id}")
-            # List all assignments for this doctor
-            all_doc_assignments = PatientDoctorAssignment.query.filter_by(doctor_id=doctor.id).all()
-            print(f"   Doctor's assignments: {[f'Patient {a.patient_id} (Active: {a.is_active})' for a in all_doc_assignments]}")
+            print(f"   Doctor's active patients: {sorted(patient_access.patient_ids(doctor.id))}")
             return jsonify({'error': 'Access denied to this patient'}), 403
         
-        print(f"✅ Assignment verified: {assignment.id}")
+        print(f"✅ Assignment verified for doctor {doctor.id} and patient {patient_id}")
         
         # Get ALL health data files for this patient
         all_files = HealthDataFile.query.filter_by(patient_id=patient_id).all()
@@ -998,13 +1190,7 @@ def view_patient_health_file(patient_id, file_id):
             return jsonify({'error': 'Doctor profile not found'}), 404
         
         # Verify doctor has access to this patient
-        assignment = PatientDoctorAssignment.query.filter_by(
-            doctor_id=doctor.id,
-            patient_id=patient_id,
-            is_active=True
-        ).first()
-        
-        if not assignment:
+        if not patient_access.has_access(doctor.id, patient_id):
             return jsonify({'error': 'Access denied to this patient'}), 403
         
         # Get the file
@@ -1051,13 +1237,7 @@ def download_patient_health_file(patient_id, file_id):
             return jsonify({'error': 'Doctor profile not found'}), 404
         
         # Verify doctor has access to this patient
-        assignment = PatientDoctorAssignment.query.filter_by(
-            doctor_id=doctor.id,
-            patient_id=patient_id,
-            is_active=True
-        ).first()
-        
-        if not assignment:
+        if not patient_access.has_access(doctor.id, patient_id):
             return jsonify({'error': 'Access denied to this patient'}), 403
         
         # Get the file
@@ -1069,20 +1249,10 @@ def download_patient_health_file(patient_id, file_id):
         if not health_file:
             return jsonify({'error': 'File not found'}), 404
         
-        file_path = os.path.abspath(health_file.file_path)
-        
-        if not os.path.exists(file_path):
+        if not os.path.exists(health_file.file_path):
             return jsonify({'error': 'File not found on disk'}), 404
         
-        # Determine mimetype
-        mimetype = mimetypes.guess_type(health_file.filename)[0] or 'application/octet-stream'
-        
-        return send_file(
-            file_path,
-            mimetype=mimetype,
-            as_attachment=True,
-            download_name=health_file.filename
-        )
+        return send_stored_file(health_file.file_path, health_file.filename)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
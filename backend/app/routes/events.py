@@ -0,0 +1,127 @@
+from flask import Blueprint, Response, current_app, jsonify, request
+from flask_jwt_extended import decode_token, verify_jwt_in_request, get_jwt_identity
+from app.models import db, User, Patient, Doctor
+from app.utils.auth import ops_required
+from app.services.access import patient_access
+from app.services.live_events import user_channel, patient_channel
+from app.services.pubsub import pubsub
+import json
+import time
+
+events_bp = Blueprint('events', __name__)
+
+
+def _stream_user():
+    """Resolve the user from ?token= (EventSource cannot send headers) or the Authorization header"""
+    token = request.args.get('token')
+    if token:
+        claims = decode_token(token)
+        # decode_token accepts any of our JWTs; only access tokens open a stream
+        if claims.get('type') != 'access':
+            raise ValueError('Only access tokens are accepted')
+        user_id = claims['sub']
+    else:
+        verify_jwt_in_request()
+        user_id = get_jwt_identity()
+    return db.session.get(User, int(user_id))
+
+
+def _channels(user):
+    """Channels to subscribe to, and the doctor id whose access gates the patient channels"""
+    channels = [user_channel(user.id)]
+    if user.role == 'doctor':
+        doctor = Doctor.query.filter_by(user_id=user.id).first()
+        if doctor:
+            channels += [patient_channel(pid) for pid in patient_access.patient_ids(doctor.id)]
+            return channels, doctor.id
+    else:
+        patient = Patient.query.filter_by(user_id=user.id).first()
+        if patient:
+            channels.append(patient_channel(patient.id))
+    return channels, None
+
+
+def _still_allowed(app, doctor_id, channel):
+    """Re-check a doctor's access to a patient channel, which may have been revoked since connecting"""
+    if doctor_id is None or not channel.startswith('patient:'):
+        return True
+    with app.app_context():
+        try:
+            return patient_access.has_access(doctor_id, channel.split(':', 1)[1])
+        finally:
+            db.session.remove()
+
+
+def _sse(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+@events_bp.route('/stream', methods=['GET'])
+def event_stream():
+    """
+    Server-Sent Events stream of live changes for the current user:
+    - notification: new inbox entries
+    - appointment: appointments created/updated for either participant
+    - metric / health_data: new vitals for the patient (doctors get all their patients',
+      each checked against their current access)
+    - resync: events were dropped because the client fell behind; refetch over REST
+    The stream closes after SSE_MAX_STREAM_SECONDS and EventSource reconnects.
+    """
+    try:
+        user = _stream_user()
+    except Exception as e:
+        return jsonify({'error': f'Invalid or expired token: {str(e)}'}), 401
+    
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    if pubsub.stats()['connections'] >= current_app.config['SSE_MAX_CONNECTIONS']:
+        return jsonify({'error': 'Too many live connections, retry shortly'}), 503, {'Retry-After': '5'}
+    
+    channels, doctor_id = _channels(user)
+    app = current_app._get_current_object()
+    heartbeat = current_app.config['SSE_HEARTBEAT_SECONDS']
+    max_seconds = current_app.config['SSE_MAX_STREAM_SECONDS']
+    
+    def generate():
+        # The request's DB session is released when the view returns; the
+        # stream itself only waits on the subscription queue
+        with pubsub.subscribe(channels) as subscription:
+            yield 'retry: 5000\n\n' + _sse('ready', {'channels': len(channels)})
+            deadline = time.monotonic() + max_seconds
+            while time.monotonic() < deadline:
+                message = subscription.get(timeout=heartbeat)
+                if subscription.lagged:
+                    subscription.lagged = False
+                    yield _sse('resync', {})
+                if message is None:
+                    yield ': ping\n\n'
+                    continue
+                if not _still_allowed(app, doctor_id, message['channel']):
+                    continue
+                yield _sse(
+                    message['event'],
+                    {'channel': message['channel'], 'data': message['data']},
+                    event_id=message['id']
+                )
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # keep nginx from buffering the stream
+    })
+
+
+@events_bp.route('/stats', methods=['GET'])
+@ops_required
+def event_stats():
+    """Live connection count and fan-out latency for this worker (OPS_EMAILS accounts only)"""
+    try:
+        return jsonify(pubsub.stats()), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
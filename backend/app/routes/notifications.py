@@ -0,0 +1,108 @@
+from flask import Blueprint, request, jsonify
+from app.models import db, Notification
+from app.utils.auth import token_required, get_current_user
+
+notifications_bp = Blueprint('notifications', __name__)
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+def _unread_count(user_id):
+    return Notification.query.filter_by(user_id=user_id, is_read=False).count()
+
+
+@notifications_bp.route('', methods=['GET'])
+@token_required
+def get_notifications():
+    """
+    Inbox for the current user.
+    - since: return only notifications with id > since (oldest first); pass
+      the returned cursor back on the next poll
+    - without since: the most recent `limit` notifications
+    - unread=true: only unread ones
+    """
+    try:
+        user = get_current_user()
+        
+        try:
+            limit = min(max(int(request.args.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+            since = request.args.get('since', type=int)
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+        
+        query = Notification.query.filter(Notification.user_id == user.id)
+        if request.args.get('unread', '').lower() in ('1', 'true'):
+            query = query.filter(Notification.is_read == False)
+        
+        if since is not None:
+            notifications = query.filter(Notification.id > since).order_by(
+                Notification.id
+            ).limit(limit + 1).all()
+            has_more = len(notifications) > limit
+            notifications = notifications[:limit]
+        else:
+            notifications = query.order_by(Notification.id.desc()).limit(limit).all()
+            notifications.reverse()
+            has_more = False
+        
+        cursor = notifications[-1].id if notifications else since
+        
+        return jsonify({
+            'notifications': [n.to_dict() for n in notifications],
+            'cursor': cursor,
+            'has_more': has_more,
+            'unread_count': _unread_count(user.id)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@notifications_bp.route('/unread-count', methods=['GET'])
+@token_required
+def get_unread_count():
+    """Number of unread notifications, for badge polling"""
+    try:
+        user = get_current_user()
+        return jsonify({'unread_count': _unread_count(user.id)}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@notifications_bp.route('/read', methods=['POST'])
+@token_required
+def mark_notifications_read():
+    """
+    Mark notifications as read.
+    Body: {ids: [...]} for specific ones, {up_to: id} for everything up to
+    and including an id, or nothing to mark all as read.
+    """
+    try:
+        user = get_current_user()
+        data = request.get_json(silent=True) or {}
+        
+        query = Notification.query.filter(
+            Notification.user_id == user.id,
+            Notification.is_read == False
+        )
+        if data.get('ids'):
+            query = query.filter(Notification.id.in_([int(i) for i in data['ids']]))
+        elif data.get('up_to') is not None:
+            query = query.filter(Notification.id <= int(data['up_to']))
+        
+        updated = query.update({'is_read': True}, synchronize_session=False)
+        db.session.commit()
+        
+        return jsonify({
+            'message': f'{updated} notification(s) marked as read',
+            'unread_count': _unread_count(user.id)
+        }), 200
+        
+    except (TypeError, ValueError):
+        db.session.rollback()
+        return jsonify({'error': 'ids and up_to must be integers'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
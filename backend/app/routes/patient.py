@@ -1,27 +1,33 @@
 from flask import Blueprint, request, jsonify
 from app.models import db, Patient, HealthMetric, MedicalRecord, Doctor, PatientDoctorAssignment, HealthDataFile, PatientDoctorRequest, Appointment
 from app.utils.auth import token_required, role_required, get_current_user
+from app.services.access import patient_access
+from app.services.doctor_search import search_doctors as search_doctors_index
+from app.services.autocomplete import autocomplete
+from app.services.notifications import patient_notifications, notify_appointment, notify_metric_alert
+from app.services.live_events import publish_appointment, publish_metric
+from app.services.ingestion import health_data_jobs, health_data_file_type
+from app.services.storage import content_store
+from app.services.downloads import send_stored_file
 from datetime import datetime
 import os
-import csv
-import json
-from flask import send_file, send_from_directory
-import mimetypes
 from werkzeug.utils import secure_filename
 from datetime import datetime, timedelta
 
 patient_bp = Blueprint('patient', __name__)
 
-UPLOAD_FOLDER = 'uploads'
-HEALTH_DATA_FOLDER = 'uploads/health_data'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'pdf'}
-HEALTH_DATA_EXTENSIONS = {'csv', 'json', 'txt'}
+HEALTH_DATA_EXTENSIONS = {
+    'csv', 'json', 'ndjson', 'txt', 'xml', 'zip',
+    'csv.gz', 'json.gz', 'ndjson.gz', 'txt.gz', 'xml.gz'
+}
+HEALTH_DATA_TYPE_ERROR = 'Invalid file type. Only CSV, JSON, NDJSON, TXT, Apple Health XML (optionally gzipped) or ZIP exports allowed'
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 def allowed_health_data_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in HEALTH_DATA_EXTENSIONS
+    return '.' in filename and health_data_file_type(filename) in HEALTH_DATA_EXTENSIONS
 
 
 @patient_bp.route('/health-metrics', methods=['GET'])
@@ -78,6 +84,8 @@ def add_health_metric():
         )
         
         db.session.add(metric)
+        notify_metric_alert(patient, metric)
+        publish_metric(metric)
         db.session.commit()
         
         return jsonify({
@@ -112,40 +120,110 @@ def upload_health_data():
             return jsonify({'error': 'No file selected'}), 400
         
         if not allowed_health_data_file(file.filename):
-            return jsonify({'error': 'Invalid file type. Only CSV, JSON, TXT allowed'}), 400
+            return jsonify({'error': HEALTH_DATA_TYPE_ERROR}), 400
         
-        # Create upload directory if it doesn't exist
-        os.makedirs(HEALTH_DATA_FOLDER, exist_ok=True)
+        health_file, duplicate = save_health_data_upload(patient, file)
+        if duplicate:
+            return jsonify({
+                'message': 'This file has already been uploaded',
+                'duplicate': True,
+                'job_id': health_file.id,
+                'file': health_file.to_dict()
+            }), 200
         
-        # Save file
-        filename = secure_filename(f"{patient.id}_{datetime.utcnow().timestamp()}_{file.filename}")
-        filepath = os.path.join(HEALTH_DATA_FOLDER, filename)
-        file.save(filepath)
+        db.session.commit()
+        health_data_jobs.submit(health_file.id)
         
-        # Process file and extract health metrics
-        records_added = process_health_data_file(filepath, patient.id)
+        return jsonify({
+            'message': 'Health data upload accepted for processing',
+            'job_id': health_file.id,
+            'file': health_file.to_dict()
+        }), 202
         
-        # Save file record
-        health_file = HealthDataFile(
-            patient_id=patient.id,
-            filename=file.filename,
-            file_path=filepath,
-            file_type=file.filename.rsplit('.', 1)[1].lower(),
-            processed=True,
-            total_records=records_added
-        )
-        db.session.add(health_file)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@patient_bp.route('/upload-health-data/batch', methods=['POST'])
+@token_required
+def upload_health_data_batch():
+    """Upload several health data files (one per device) to be imported in parallel"""
+    try:
+        user = get_current_user()
+        if not user or user.role != 'patient':
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        patient = Patient.query.filter_by(user_id=user.id).first()
+        if not patient:
+            return jsonify({'error': 'Patient profile not found'}), 404
+        
+        files = [f for f in request.files.getlist('files') if f.filename]
+        if not files:
+            return jsonify({'error': 'No files provided'}), 400
+        
+        invalid = [f.filename for f in files if not allowed_health_data_file(f.filename)]
+        if invalid:
+            return jsonify({'error': HEALTH_DATA_TYPE_ERROR, 'files': invalid}), 400
+        
+        uploads = [save_health_data_upload(patient, f) for f in files]
         db.session.commit()
         
+        queued = [health_file.id for health_file, duplicate in uploads if not duplicate]
+        if queued:
+            health_data_jobs.submit_batch(queued)
+        
         return jsonify({
-            'message': 'Health data uploaded successfully',
-            'records_added': records_added,
-            'file': health_file.to_dict()
-        }), 200
+            'message': f'{len(queued)} health data file(s) accepted for processing',
+            'jobs': [
+                dict(health_file.to_dict(), job_id=health_file.id, duplicate=duplicate)
+                for health_file, duplicate in uploads
+            ]
+        }), 202
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
+
+
+def save_health_data_upload(patient, file):
+    """Store an uploaded health data file and add its queued HealthDataFile to the session.
+
+    Returns ``(health_file, duplicate)``; a file the patient has already
+    uploaded is not stored again and its existing record is returned.
+    """
+    stored = content_store.save(file.stream)
+    
+    # Skip files this patient has already uploaded
+    existing = find_health_data_duplicate(patient.id, stored.digest)
+    if existing:
+        content_store.release(stored.path)
+        return existing, True
+    
+    return add_health_data_file(patient, file.filename, stored), False
+
+
+def find_health_data_duplicate(patient_id, digest):
+    """The patient's earlier upload with the same content that hasn't failed, if any"""
+    return HealthDataFile.query.filter(
+        HealthDataFile.patient_id == patient_id,
+        HealthDataFile.content_hash == digest,
+        HealthDataFile.status != 'failed'
+    ).first()
+
+
+def add_health_data_file(patient, filename, stored):
+    """Add a queued HealthDataFile for a file in the content store; metrics are extracted by a background job"""
+    health_file = HealthDataFile(
+        patient_id=patient.id,
+        filename=filename,
+        file_path=stored.path,
+        file_type=health_data_file_type(filename),
+        content_hash=stored.digest,
+        status='queued'
+    )
+    db.session.add(health_file)
+    return health_file
     
 @patient_bp.route('/update-profile', methods=['PUT'])
 @token_required
@@ -189,6 +267,7 @@ def update_patient_profile():
             user.email = data['email']
         
         db.session.commit()
+        autocomplete.update_patient(patient, user.created_at)
         
         print(f"Profile updated successfully for patient {patient.id}")  # Debug log
         
@@ -203,132 +282,72 @@ def update_patient_profile():
         return jsonify({'error': str(e)}), 500
 
 
-def process_health_data_file(filepath, patient_id):
-    """Process health data file and create health metrics"""
-    records_added = 0
-    file_ext = filepath.rsplit('.', 1)[1].lower()
-    
+@patient_bp.route('/health-data-jobs/<int:file_id>', methods=['GET'])
+@token_required
+def get_health_data_job(file_id):
+    """Get the import status of an uploaded health data file"""
     try:
-        if file_ext == 'csv':
-            with open(filepath, 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # Expected CSV format: date, heart_rate, steps, sleep_hours, calories
-                    # Map CSV columns to metric types
-                    metrics_to_add = []
-                    
-                    if 'heart_rate' in row and row['heart_rate']:
-                        metrics_to_add.append({
-                            'type': 'heartbeat',
-                            'value': row['heart_rate'],
-                            'unit': 'bpm'
-                        })
-                    
-                    if 'steps' in row and row['steps']:
-                        metrics_to_add.append({
-                            'type': 'steps',
-                            'value': row['steps'],
-                            'unit': 'steps'
-                        })
-                    
-                    if 'sleep_hours' in row and row['sleep_hours']:
-                        metrics_to_add.append({
-                            'type': 'sleep_hours',
-                            'value': row['sleep_hours'],
-                            'unit': 'hours'
-                        })
-                    
-                    if 'calories' in row and row['calories']:
-                        metrics_to_add.append({
-                            'type': 'calories',
-                            'value': row['calories'],
-                            'unit': 'kcal'
-                        })
-                    
-                    if 'blood_oxygen' in row and row['blood_oxygen']:
-                        metrics_to_add.append({
-                            'type': 'blood_oxygen',
-                            'value': row['blood_oxygen'],
-                            'unit': '%'
-                        })
-                    
-                    # Parse date
-                    recorded_at = datetime.utcnow()
-                    if 'date' in row and row['date']:
-                        try:
-                            recorded_at = datetime.strptime(row['date'], '%Y-%m-%d %H:%M:%S')
-                        except:
-                            try:
-                                recorded_at = datetime.strptime(row['date'], '%Y-%m-%d')
-                            except:
-                                pass
-                    
-                    # Add all metrics
-                    for metric_data in metrics_to_add:
-                        metric = HealthMetric(
-                            patient_id=patient_id,
-                            metric_type=metric_data['type'],
-                            value=str(metric_data['value']),
-                            unit=metric_data['unit'],
-                            recorded_at=recorded_at,
-                            notes='Imported from health data file'
-                        )
-                        db.session.add(metric)
-                        records_added += 1
-        
-        elif file_ext == 'json':
-            with open(filepath, 'r') as f:
-                data = json.load(f)
-                
-                # Handle array of records
-                if isinstance(data, list):
-                    for record in data:
-                        process_json_record(record, patient_id)
-                        records_added += 1
-                # Handle single record
-                elif isinstance(data, dict):
-                    process_json_record(data, patient_id)
-                    records_added += 1
+        user = get_current_user()
+        if not user or user.role != 'patient':
+            return jsonify({'error': 'Unauthorized'}), 403
         
-        db.session.commit()
-        return records_added
+        patient = Patient.query.filter_by(user_id=user.id).first()
+        if not patient:
+            return jsonify({'error': 'Patient profile not found'}), 404
+        
+        health_file = HealthDataFile.query.filter_by(id=file_id, patient_id=patient.id).first()
+        if not health_file:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        # total_records is committed with every chunk, so it doubles as progress
+        job = dict(
+            health_file.to_dict(),
+            records_processed=health_file.total_records or 0,
+            error_report=health_file.error_report
+        )
+        
+        return jsonify({'job': job}), 200
         
     except Exception as e:
-        print(f"Error processing file: {str(e)}")
-        db.session.rollback()
-        raise
+        return jsonify({'error': str(e)}), 500
 
 
-def process_json_record(record, patient_id):
-    """Process a single JSON record"""
-    recorded_at = datetime.utcnow()
-    if 'timestamp' in record:
-        try:
-            recorded_at = datetime.fromisoformat(record['timestamp'])
-        except:
-            pass
-    
-    # Map JSON fields to metrics
-    metric_mapping = {
-        'heart_rate': ('heartbeat', 'bpm'),
-        'steps': ('steps', 'steps'),
-        'sleep': ('sleep_hours', 'hours'),
-        'calories': ('calories', 'kcal'),
-        'spo2': ('blood_oxygen', '%'),
-        'temperature': ('temperature', '°F')
-    }
-    
-    for field, (metric_type, unit) in metric_mapping.items():
-        if field in record and record[field]:
-            metric = HealthMetric(
-                patient_id=patient_id,
-                metric_type=metric_type,
-                value=str(record[field]),
-                unit=unit,
-                recorded_at=recorded_at,
-                notes='Imported from health data file'
-            )
-            db.session.add(metric)
+@patient_bp.route('/health-data-jobs/<int:file_id>/retry', methods=['POST'])
+@token_required
+def retry_health_data_job(file_id):
+    """Re-run a failed (or stalled) import; metrics already stored by the earlier run are skipped"""
+    try:
+        user = get_current_user()
+        if not user or user.role != 'patient':
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        patient = Patient.query.filter_by(user_id=user.id).first()
+        if not patient:
+            return jsonify({'error': 'Patient profile not found'}), 404
+        
+        health_file = HealthDataFile.query.filter_by(id=file_id, patient_id=patient.id).first()
+        if not health_file:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        if health_file.status != 'failed' and not health_data_jobs.is_stale(health_file):
+            return jsonify({'error': 'Only failed imports can be retried'}), 409
+        
+        if not os.path.exists(health_file.file_path):
+            return jsonify({'error': 'File not found on disk'}), 404
+        
+        health_file.status = 'queued'
+        db.session.commit()
+        health_data_jobs.submit(health_file.id)
+        
+        return jsonify({
+            'message': 'Health data import queued for retry',
+            'job_id': health_file.id,
+            'file': health_file.to_dict()
+        }), 202
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
 
 
 @patient_bp.route('/health-data-files', methods=['GET'])
@@ -363,23 +382,31 @@ def search_doctors():
     try:
         query = request.args.get('q', '')
         specialization = request.args.get('specialization', '')
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 20, type=int)
         
-        doctors_query = Doctor.query
+        doctors, has_more = search_doctors_index(query, specialization, page, per_page)
         
-        if query:
-            doctors_query = doctors_query.filter(
-                Doctor.full_name.ilike(f'%{query}%')
-            )
-        
-        if specialization:
-            doctors_query = doctors_query.filter(
-                Doctor.specialization.ilike(f'%{specialization}%')
-            )
+        return jsonify({
+            'doctors': [d.to_dict() for d in doctors],
+            'page': page,
+            'has_more': has_more
+        }), 200
         
-        doctors = doctors_query.limit(20).all()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@patient_bp.route('/autocomplete-doctors', methods=['GET'])
+@token_required
+def autocomplete_doctors():
+    """Type-ahead doctor suggestions by name or specialization prefix"""
+    try:
+        query = request.args.get('q', '')
+        limit = request.args.get('limit', 8, type=int)
         
         return jsonify({
-            'doctors': [d.to_dict() for d in doctors]
+            'suggestions': autocomplete.suggest_doctors(query, limit)
         }), 200
         
     except Exception as e:
@@ -515,22 +542,18 @@ def upload_medical_record():
         if not allowed_file(file.filename):
             return jsonify({'error': 'File type not allowed'}), 400
         
-        # Save file
-        filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        filename = f"{timestamp}_{filename}"
-        
-        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-        file_path = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(file_path)
+        # Save file (once per distinct content)
+        stored = content_store.save(file.stream)
         
         # Create record
         record = MedicalRecord(
             patient_id=patient.id,
             record_type=request.form.get('record_type', 'report'),
-            title=request.form.get('title', filename),
+            title=request.form.get('title', secure_filename(file.filename)),
             description=request.form.get('description'),
-            file_path=file_path,
+            filename=file.filename,
+            file_path=stored.path,
+            content_hash=stored.digest,
             uploaded_by=user.id
         )
         
@@ -547,6 +570,31 @@ def upload_medical_record():
         return jsonify({'error': str(e)}), 500
 
 
+@patient_bp.route('/medical-records/<int:record_id>/download', methods=['GET'])
+@token_required
+def download_medical_record(record_id):
+    """Download one of the patient's medical records (inline=true to display it, e.g. an image)"""
+    try:
+        user = get_current_user()
+        patient = Patient.query.filter_by(user_id=user.id).first()
+        
+        if not patient:
+            return jsonify({'error': 'Patient profile not found'}), 404
+        
+        record = MedicalRecord.query.filter_by(id=record_id, patient_id=patient.id).first()
+        if not record or not record.file_path:
+            return jsonify({'error': 'Record not found'}), 404
+        
+        if not os.path.exists(record.file_path):
+            return jsonify({'error': 'File not found on disk'}), 404
+        
+        inline = request.args.get('inline', '').lower() in ('1', 'true')
+        return send_stored_file(record.file_path, record.download_name, as_attachment=not inline)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @patient_bp.route('/doctors', methods=['GET'])
 @token_required
 def get_assigned_doctors():
@@ -652,6 +700,7 @@ def remove_doctor_assignment(assignment_id):
             return jsonify({'error': 'Assignment not found'}), 404
         
         # Delete the assignment
+        patient_access.changed([assignment.doctor_id])
         db.session.delete(assignment)
         db.session.commit()
         
@@ -716,6 +765,8 @@ def cancel_patient_appointment(appointment_id):
         
         # Update status
         appointment.status = 'cancelled'
+        notify_appointment(appointment, 'cancelled', 'doctor')
+        publish_appointment(appointment, 'cancelled')
         db.session.commit()
         
         return jsonify({
@@ -739,53 +790,8 @@ def get_patient_notifications():
         if not patient:
             return jsonify({'error': 'Patient profile not found'}), 404
         
-        notifications = []
-        
-        # Check for pending doctor responses
-        pending_requests = PatientDoctorRequest.query.filter_by(
-            patient_id=patient.id,
-            status='pending'
-        ).count()
-        
-        if pending_requests > 0:
-            notifications.append({
-                'type': 'pending_request',
-                'message': f'You have {pending_requests} pending doctor request(s)',
-                'count': pending_requests
-            })
-        
-        # Check for upcoming appointments (next 24 hours)
-        tomorrow = datetime.utcnow() + timedelta(days=1)
-        upcoming = Appointment.query.filter(
-            Appointment.patient_id == patient.id,
-            Appointment.status == 'scheduled',
-            Appointment.appointment_date <= tomorrow,
-            Appointment.appointment_date >= datetime.utcnow()
-        ).count()
-        
-        if upcoming > 0:
-            notifications.append({
-                'type': 'upcoming_appointment',
-                'message': f'You have {upcoming} upcoming appointment(s)',
-                'count': upcoming
-            })
-        
-        # Check for newly accepted requests
-        accepted_requests = PatientDoctorRequest.query.filter_by(
-            patient_id=patient.id,
-            status='accepted'
-        ).filter(
-            PatientDoctorRequest.updated_at >= datetime.utcnow() - timedelta(days=7)
-        ).all()
-        
-        if accepted_requests:
-            for req in accepted_requests:
-                notifications.append({
-                    'type': 'request_accepted',
-                    'message': f'Dr. {req.doctor.full_name} accepted your request',
-                    'doctor_name': req.doctor.full_name,
-                    'date': req.updated_at.isoformat()
-                })
+        # Counts and recently accepted requests come back from one query
+        notifications = patient_notifications(patient.id)
         
         return jsonify({
             'notifications': notifications,
@@ -960,29 +966,11 @@ def download_health_data_file(file_id):
         if not health_file:
             return jsonify({'error': 'File not found'}), 404
         
-        # Get absolute path
-        file_path = os.path.abspath(health_file.file_path)
-        
         # Check if file exists
-        if not os.path.exists(file_path):
-            return jsonify({'error': f'File not found on disk: {file_path}'}), 404
-        
-        # Get the directory and filename (using absolute path)
-        directory = os.path.dirname(file_path)
-        filename = os.path.basename(file_path)
-        
-        # Determine mimetype
-        mimetype = mimetypes.guess_type(health_file.filename)[0] or 'application/octet-stream'
-        
-        print(f"Attempting to send file from directory: {directory}, filename: {filename}")
+        if not os.path.exists(health_file.file_path):
+            return jsonify({'error': 'File not found on disk'}), 404
         
-        # Use send_file with the full path instead
-        return send_file(
-            file_path,
-            mimetype=mimetype,
-            as_attachment=True,
-            download_name=health_file.filename  # This is the name user sees when downloading
-        )
+        return send_stored_file(health_file.file_path, health_file.filename)
         
     except Exception as e:
         print(f"Download error: {str(e)}")  # Debug log
@@ -1014,7 +1002,7 @@ def view_health_data_file(file_id):
             return jsonify({'error': 'File not found on disk'}), 404
         
         # Only allow viewing text-based files
-        if health_file.file_type not in ['txt', 'csv', 'json']:
+        if health_file.file_type not in ['txt', 'csv', 'json', 'ndjson']:
             return jsonify({'error': 'File type not supported for viewing'}), 400
         
         # Read file content
@@ -1051,9 +1039,11 @@ def delete_health_data_file(file_id):
         if not health_file:
             return jsonify({'error': 'File not found'}), 404
         
-        # Delete physical file
-        if os.path.exists(health_file.file_path):
-            os.remove(health_file.file_path)
+        if health_file.status in ('queued', 'processing') and not health_data_jobs.is_stale(health_file):
+            return jsonify({'error': 'File is still being processed'}), 409
+        
+        # Drop the file's reference; it is deleted once nothing else uses it
+        content_store.release(health_file.file_path)
         
         # Delete database record
         db.session.delete(health_file)
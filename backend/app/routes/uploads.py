@@ -0,0 +1,246 @@
+from flask import Blueprint, request, jsonify
+from werkzeug.http import parse_content_range_header
+from werkzeug.utils import secure_filename
+from app.models import db, Patient, Doctor, MedicalRecord, UploadSession
+from app.utils.auth import token_required, get_current_user
+from app.services.access import patient_access
+from app.services.ingestion import health_data_jobs
+from app.services.uploads import resumable_uploads, UploadError
+from app.services.storage import content_store
+from app.routes.patient import (
+    HEALTH_DATA_TYPE_ERROR, allowed_file, allowed_health_data_file,
+    find_health_data_duplicate, add_health_data_file
+)
+from app.routes.doctor import allowed_file as doctor_allowed_file
+
+uploads_bp = Blueprint('uploads', __name__)
+
+PURPOSES = ('health_data', 'medical_record')
+RECORD_FIELDS = ('record_type', 'title', 'description')
+
+
+def _get_upload(upload_id, user):
+    upload = db.session.get(UploadSession, upload_id)
+    if not upload or upload.user_id != user.id:
+        return None
+    return upload
+
+
+def _upload_response(upload):
+    return dict(upload.to_dict(), chunk_size=resumable_uploads.chunk_size, complete=upload.received == upload.size)
+
+
+def _error_response(e):
+    body = {'error': str(e)}
+    if e.offset is not None:
+        body['offset'] = e.offset
+    return jsonify(body), e.status
+
+
+@uploads_bp.route('', methods=['POST'])
+@token_required
+def initiate_upload():
+    """
+    Start a resumable upload.
+    - purpose: health_data (patients) or medical_record
+    - filename, size (bytes), optional sha256 of the whole file
+    - patient_id: required when a doctor uploads a medical record
+    - record_type, title, description: used for the medical record
+    Then PUT the bytes in chunks and POST /<upload_id>/complete.
+    """
+    try:
+        user = get_current_user()
+        data = request.get_json() or {}
+        
+        purpose = data.get('purpose')
+        filename = data.get('filename') or ''
+        if purpose not in PURPOSES:
+            return jsonify({'error': f"purpose must be one of {', '.join(PURPOSES)}"}), 400
+        if not filename:
+            return jsonify({'error': 'No file selected'}), 400
+        try:
+            size = int(data.get('size'))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'size must be an integer'}), 400
+        
+        if user.role == 'patient':
+            patient = Patient.query.filter_by(user_id=user.id).first()
+            if not patient:
+                return jsonify({'error': 'Patient profile not found'}), 404
+            if purpose == 'health_data' and not allowed_health_data_file(filename):
+                return jsonify({'error': HEALTH_DATA_TYPE_ERROR}), 400
+            if purpose == 'medical_record' and not allowed_file(filename):
+                return jsonify({'error': 'File type not allowed'}), 400
+        elif user.role == 'doctor' and purpose == 'medical_record':
+            doctor = Doctor.query.filter_by(user_id=user.id).first()
+            if not doctor:
+                return jsonify({'error': 'Doctor profile not found'}), 404
+            patient = db.session.get(Patient, data.get('patient_id') or 0)
+            if not patient:
+                return jsonify({'error': 'Patient not found'}), 404
+            if not patient_access.has_access(doctor.id, patient.id):
+                return jsonify({'error': 'Access denied to this patient'}), 403
+            if not doctor_allowed_file(filename):
+                return jsonify({'error': 'File type not allowed'}), 400
+        else:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        upload = resumable_uploads.create(
+            user.id, patient.id, purpose, filename, size,
+            sha256=data.get('sha256'),
+            fields={key: data[key] for key in RECORD_FIELDS if data.get(key)}
+        )
+        db.session.commit()
+        
+        return jsonify(_upload_response(upload)), 201
+        
+    except UploadError as e:
+        db.session.rollback()
+        return _error_response(e)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@uploads_bp.route('/<upload_id>', methods=['GET'])
+@token_required
+def get_upload(upload_id):
+    """Offset to resume from after a dropped connection"""
+    try:
+        upload = _get_upload(upload_id, get_current_user())
+        if not upload:
+            return jsonify({'error': 'Upload not found'}), 404
+        
+        return jsonify(_upload_response(upload)), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@uploads_bp.route('/<upload_id>', methods=['PUT'])
+@token_required
+def upload_chunk(upload_id):
+    """
+    Append one chunk. The raw body is the chunk, with
+    Content-Range: bytes <start>-<end>/<size>, where start must equal the
+    upload's current offset (409 with the offset otherwise). An optional
+    X-Chunk-SHA256 header is checked against the chunk.
+    """
+    try:
+        upload = _get_upload(upload_id, get_current_user())
+        if not upload:
+            return jsonify({'error': 'Upload not found'}), 404
+        
+        content_range = parse_content_range_header(request.headers.get('Content-Range'))
+        if not content_range or content_range.units != 'bytes' or content_range.start is None:
+            return jsonify({'error': 'Content-Range: bytes <start>-<end>/<size> is required'}), 400
+        if content_range.length != upload.size:
+            return jsonify({'error': f'Content-Range size must be {upload.size}'}), 400
+        
+        resumable_uploads.append(
+            upload,
+            content_range.start,
+            request.stream,
+            length=content_range.stop - content_range.start,
+            chunk_sha256=request.headers.get('X-Chunk-SHA256')
+        )
+        
+        return jsonify(_upload_response(upload)), 200
+        
+    except UploadError as e:
+        db.session.rollback()
+        return _error_response(e)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@uploads_bp.route('/<upload_id>/complete', methods=['POST'])
+@token_required
+def complete_upload(upload_id):
+    """Verify the finished upload and hand it to the health data import or medical records"""
+    try:
+        user = get_current_user()
+        upload = _get_upload(upload_id, user)
+        if not upload:
+            return jsonify({'error': 'Upload not found'}), 404
+        
+        # Access may have been revoked since the upload started
+        if user.role == 'doctor':
+            doctor = Doctor.query.filter_by(user_id=user.id).first()
+            if not doctor or not patient_access.has_access(doctor.id, upload.patient_id):
+                return jsonify({'error': 'Access denied to this patient'}), 403
+        
+        temp_path, digest = resumable_uploads.finish(upload)
+        patient = db.session.get(Patient, upload.patient_id)
+        
+        if upload.purpose == 'health_data':
+            existing = find_health_data_duplicate(patient.id, digest)
+            if existing:
+                resumable_uploads.discard(upload)
+                db.session.commit()
+                return jsonify({
+                    'message': 'This file has already been uploaded',
+                    'duplicate': True,
+                    'job_id': existing.id,
+                    'file': existing.to_dict()
+                }), 200
+        
+            health_file = add_health_data_file(patient, upload.filename, content_store.save_file(temp_path, digest))
+            resumable_uploads.discard(upload)
+            db.session.commit()
+            health_data_jobs.submit(health_file.id)
+        
+            return jsonify({
+                'message': 'Health data upload accepted for processing',
+                'job_id': health_file.id,
+                'file': health_file.to_dict()
+            }), 202
+        
+        # Medical record, stored the way the regular upload endpoints do
+        stored = content_store.save_file(temp_path, digest)
+        fields = upload.fields or {}
+        record = MedicalRecord(
+            patient_id=patient.id,
+            record_type=fields.get('record_type', 'report'),
+            title=fields.get('title', secure_filename(upload.filename)),
+            description=fields.get('description'),
+            filename=upload.filename,
+            file_path=stored.path,
+            content_hash=stored.digest,
+            uploaded_by=user.id
+        )
+        db.session.add(record)
+        resumable_uploads.discard(upload)
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Medical record uploaded successfully',
+            'record': record.to_dict()
+        }), 201
+        
+    except UploadError as e:
+        db.session.rollback()
+        return _error_response(e)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@uploads_bp.route('/<upload_id>', methods=['DELETE'])
+@token_required
+def cancel_upload(upload_id):
+    """Abandon an upload and delete what has been received"""
+    try:
+        upload = _get_upload(upload_id, get_current_user())
+        if not upload:
+            return jsonify({'error': 'Upload not found'}), 404
+        
+        resumable_uploads.discard(upload)
+        db.session.commit()
+        
+        return jsonify({'message': 'Upload cancelled'}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
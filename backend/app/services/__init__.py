@@ -0,0 +1,34 @@
+"""
+Service modules for the Healthcare Management System.
+
+This package contains stateful helpers (caches, indexes, background workers)
+shared by the API route blueprints.
+"""
+
+from .access import patient_access
+from .passwords import password_hasher, PasswordHasherBusy
+from .doctor_search import search_doctors
+from .autocomplete import autocomplete
+from .patient_search import search_patients, latest_vitals
+from .scheduling import find_conflict
+from .availability import free_slots, free_windows
+from .notifications import notify
+from .pubsub import pubsub
+from .ingestion import process_health_data_file, health_data_jobs
+
+__all__ = [
+    'patient_access',
+    'password_hasher',
+    'PasswordHasherBusy',
+    'search_doctors',
+    'autocomplete',
+    'search_patients',
+    'latest_vitals',
+    'find_conflict',
+    'free_slots',
+    'free_windows',
+    'notify',
+    'pubsub',
+    'process_health_data_file',
+    'health_data_jobs'
+]
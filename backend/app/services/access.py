@@ -0,0 +1,77 @@
+import threading
+from sqlalchemy import select, update
+from app.models import db, Doctor, PatientDoctorAssignment
+
+
+class PatientAccessCache:
+    """Per-process cache of each doctor's active patient ids.
+
+    Every doctor-scoped handler has to check that the doctor is actively
+    assigned to the patient. Instead of querying ``patient_doctor_assignments``
+    on every request, the first check for a doctor loads all of their active
+    patient ids in one query and later checks are set lookups.
+
+    Each entry is tagged with the doctor's ``access_version``, which
+    ``changed`` bumps in the same transaction as any assignment change, and
+    is only used while that version is current. Checking it is a primary
+    key lookup, so a removed assignment stops granting access in every
+    gunicorn worker as soon as it is committed.
+    """
+
+    def __init__(self):
+        self._entries = {}  # doctor_id -> (access_version, frozenset of patient ids)
+        self._lock = threading.Lock()
+
+    def patient_ids(self, doctor_id):
+        """Return the frozenset of patient ids actively assigned to a doctor"""
+        version = db.session.execute(
+            select(Doctor.access_version).where(Doctor.id == doctor_id)
+        ).scalar()
+        if version is None:
+            return frozenset()
+        entry = self._entries.get(doctor_id)
+        if entry and entry[0] == version:
+            return entry[1]
+
+        # Read after the version, so the ids are at least as new as it
+        rows = PatientDoctorAssignment.query.with_entities(
+            PatientDoctorAssignment.patient_id
+        ).filter_by(
+            doctor_id=doctor_id,
+            is_active=True
+        ).all()
+        ids = frozenset(row.patient_id for row in rows)
+
+        with self._lock:
+            self._entries[doctor_id] = (version, ids)
+        return ids
+
+    def has_access(self, doctor_id, patient_id):
+        """Check whether the doctor is actively assigned to the patient"""
+        try:
+            doctor_id, patient_id = int(doctor_id), int(patient_id)
+        except (TypeError, ValueError):
+            return False
+        return patient_id in self.patient_ids(doctor_id)
+
+    def changed(self, doctor_ids):
+        """Mark doctors' assignments as changed, in the caller's transaction.
+
+        ``doctor_ids`` is a list of ids or a select of them; call before
+        the assignments are deleted when selecting them.
+        """
+        table = Doctor.__table__
+        db.session.execute(
+            update(table).where(table.c.id.in_(doctor_ids)).values(access_version=table.c.access_version + 1)
+        )
+
+    def invalidate(self, doctor_id=None):
+        """Forget one doctor's cached patients, or everything if no id is given"""
+        with self._lock:
+            if doctor_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(doctor_id, None)
+
+
+patient_access = PatientAccessCache()
@@ -0,0 +1,103 @@
+import base64
+from datetime import datetime
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import joinedload
+from app.models import db, Appointment, Doctor, Patient, PatientDoctorAssignment
+
+DEFAULT_LIMIT = 200
+MAX_LIMIT = 500
+
+
+def encode_cursor(appointment):
+    raw = f'{appointment.appointment_date.isoformat()}|{appointment.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(value):
+    """Inverse of encode_cursor, raising ValueError on garbage"""
+    try:
+        date_part, id_part = base64.urlsafe_b64decode(value.encode()).decode().split('|')
+        return datetime.fromisoformat(date_part), int(id_part)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def parse_limit(value):
+    if value is None:
+        return DEFAULT_LIMIT
+    return min(max(int(value), 1), MAX_LIMIT)
+
+
+def list_appointments(owner_column, owner_id, statuses, since=None, cursor=None, limit=DEFAULT_LIMIT):
+    """One page of a participant's appointments in date order.
+
+    Served by the (doctor_id|patient_id, status, appointment_date) indexes
+    and paged by keyset on (appointment_date, id). Returns
+    ``(appointments, next_cursor)``.
+    """
+    query = Appointment.query.filter(
+        owner_column == owner_id,
+        Appointment.status.in_(statuses)
+    )
+    if since is not None:
+        query = query.filter(Appointment.appointment_date >= since)
+    if cursor:
+        after_date, after_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Appointment.appointment_date > after_date,
+            and_(Appointment.appointment_date == after_date, Appointment.id > after_id)
+        ))
+
+    appointments = query.order_by(Appointment.appointment_date, Appointment.id).limit(limit + 1).all()
+    if len(appointments) > limit:
+        appointments = appointments[:limit]
+        return appointments, encode_cursor(appointments[-1])
+    return appointments, None
+
+
+def _doctor_dicts(doctor_ids):
+    """Doctor.to_dict() for many doctors using three queries in total"""
+    if not doctor_ids:
+        return {}
+    patient_counts = dict(db.session.query(
+        PatientDoctorAssignment.doctor_id, func.count(PatientDoctorAssignment.id)
+    ).filter(
+        PatientDoctorAssignment.doctor_id.in_(doctor_ids),
+        PatientDoctorAssignment.is_active == True
+    ).group_by(PatientDoctorAssignment.doctor_id).all())
+    appointment_counts = dict(db.session.query(
+        Appointment.doctor_id, func.count(Appointment.id)
+    ).filter(
+        Appointment.doctor_id.in_(doctor_ids)
+    ).group_by(Appointment.doctor_id).all())
+
+    doctors = Doctor.query.options(joinedload(Doctor.user)).filter(Doctor.id.in_(doctor_ids)).all()
+    return {
+        d.id: d.to_dict(
+            patient_count=patient_counts.get(d.id, 0),
+            appointment_count=appointment_counts.get(d.id, 0)
+        )
+        for d in doctors
+    }
+
+
+def _patient_dicts(patient_ids):
+    if not patient_ids:
+        return {}
+    return {p.id: p.to_dict() for p in Patient.query.filter(Patient.id.in_(patient_ids)).all()}
+
+
+def serialize_appointments(appointments, participant):
+    """Appointment dicts with the 'doctor' or 'patient' participant attached, loaded in bulk"""
+    if participant == 'doctor':
+        participants = _doctor_dicts({apt.doctor_id for apt in appointments})
+    else:
+        participants = _patient_dicts({apt.patient_id for apt in appointments})
+
+    result = []
+    for apt in appointments:
+        apt_dict = apt.to_dict()
+        apt_dict['appointment_datetime'] = apt.appointment_date.isoformat()
+        apt_dict[participant] = participants.get(getattr(apt, f'{participant}_id'))
+        result.append(apt_dict)
+    return result
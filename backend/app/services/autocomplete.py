@@ -0,0 +1,204 @@
+import bisect
+import heapq
+import re
+import threading
+import time
+from app.models import db, Doctor, Patient, User
+
+MAX_SUGGESTIONS = 20
+
+
+def _tokens(value):
+    return re.findall(r'\w+', (value or '').lower())
+
+
+class PrefixIndex:
+    """Sorted-array prefix index for type-ahead suggestions.
+
+    Distinct tokens are kept in one sorted list; each token maps to a postings
+    list of ``(-score, entity_id)`` kept in score order. A prefix lookup
+    bisects the token list and lazily merges the postings of the matching
+    tokens, so the best-scoring suggestions come out first and only
+    ``limit`` of them are ever materialised.
+    """
+
+    def __init__(self):
+        self._tokens = []
+        self._postings = {}  # token -> sorted [(-score, entity_id)]
+        self._entries = {}   # entity_id -> (tokens, score, payload, ' token token ...')
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def upsert(self, entity_id, text, score, payload):
+        with self._lock:
+            self._remove(entity_id)
+            tokens = frozenset(_tokens(text))
+            for token in tokens:
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = []
+                    bisect.insort(self._tokens, token)
+                bisect.insort(postings, (-score, entity_id))
+            self._entries[entity_id] = (tokens, score, payload, ' ' + ' '.join(tokens))
+
+    def remove(self, entity_id):
+        with self._lock:
+            self._remove(entity_id)
+
+    def _remove(self, entity_id):
+        entry = self._entries.pop(entity_id, None)
+        if not entry:
+            return
+        tokens, score = entry[0], entry[1]
+        for token in tokens:
+            postings = self._postings[token]
+            i = bisect.bisect_left(postings, (-score, entity_id))
+            if i < len(postings) and postings[i] == (-score, entity_id):
+                del postings[i]
+            if not postings:
+                del self._postings[token]
+                del self._tokens[bisect.bisect_left(self._tokens, token)]
+
+    def search(self, query, limit=8):
+        """Return payloads whose tokens start with every query token, best score first"""
+        terms = _tokens(query)
+        if not terms:
+            return []
+        # Drive the merge from the most selective (longest) term
+        driver = max(terms, key=len)
+        # A token starts with `t` exactly when ' ' + t occurs in the joined token string
+        others = [' ' + t for t in terms if t != driver]
+
+        with self._lock:
+            lo = bisect.bisect_left(self._tokens, driver)
+            hi = bisect.bisect_left(self._tokens, driver + '\uffff', lo)
+            merged = heapq.merge(*(self._postings[t] for t in self._tokens[lo:hi]))
+
+            results, seen = [], set()
+            for _, entity_id in merged:
+                if entity_id in seen:
+                    continue
+                seen.add(entity_id)
+                _, _, payload, joined = self._entries[entity_id]
+                if all(o in joined for o in others):
+                    results.append(payload)
+                    if len(results) >= limit:
+                        break
+            return results
+
+
+class AutocompleteService:
+    """Doctor and patient prefix indexes, built lazily and updated in place.
+
+    Routes call ``update_doctor``/``update_patient`` after signup and profile
+    changes so this worker sees them immediately. Other gunicorn workers
+    catch up on their next full rebuild, which runs in the background every
+    ``refresh_seconds``.
+    """
+
+    def __init__(self, refresh_seconds=300):
+        self.refresh_seconds = refresh_seconds
+        self.doctors = PrefixIndex()
+        self.patients = PrefixIndex()
+        self._built_at = None
+        self._rebuilding = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _doctor_payload(doctor):
+        return {
+            'id': doctor.id,
+            'full_name': doctor.full_name,
+            'specialization': doctor.specialization,
+            'rating': doctor.rating
+        }
+
+    @staticmethod
+    def _patient_payload(patient):
+        return {'id': patient.id, 'full_name': patient.full_name}
+
+    def _build(self):
+        doctors, patients = PrefixIndex(), PrefixIndex()
+        for doctor in Doctor.query.with_entities(
+            Doctor.id, Doctor.full_name, Doctor.specialization, Doctor.rating
+        ).yield_per(5000):
+            doctors.upsert(
+                doctor.id,
+                f'{doctor.full_name} {doctor.specialization or ""}',
+                doctor.rating or 0,
+                self._doctor_payload(doctor)
+            )
+        for patient in db.session.query(
+            Patient.id, Patient.full_name, User.created_at
+        ).join(User, User.id == Patient.user_id).yield_per(5000):
+            patients.upsert(
+                patient.id,
+                patient.full_name,
+                patient.created_at.timestamp() if patient.created_at else 0,
+                self._patient_payload(patient)
+            )
+        self.doctors, self.patients = doctors, patients
+        self._built_at = time.monotonic()
+
+    def _ensure_fresh(self):
+        if self._built_at is None:
+            with self._lock:
+                if self._built_at is None:
+                    self._build()
+            return
+        if time.monotonic() - self._built_at < self.refresh_seconds or self._rebuilding:
+            return
+
+        from flask import current_app
+        app = current_app._get_current_object()
+        self._rebuilding = True
+
+        def rebuild():
+            try:
+                with app.app_context():
+                    self._build()
+            finally:
+                self._rebuilding = False
+
+        threading.Thread(target=rebuild, daemon=True).start()
+
+    def suggest_doctors(self, query, limit=8):
+        self._ensure_fresh()
+        return self.doctors.search(query, min(limit, MAX_SUGGESTIONS))
+
+    def suggest_patients(self, query, limit=8):
+        self._ensure_fresh()
+        return self.patients.search(query, min(limit, MAX_SUGGESTIONS))
+
+    def update_doctor(self, doctor):
+        if self._built_at is None:
+            return
+        self.doctors.upsert(
+            doctor.id,
+            f'{doctor.full_name} {doctor.specialization or ""}',
+            doctor.rating or 0,
+            self._doctor_payload(doctor)
+        )
+
+    def update_patient(self, patient, created_at=None):
+        if self._built_at is None:
+            return
+        if created_at is None:
+            created_at = patient.user.created_at if patient.user else None
+        self.patients.upsert(
+            patient.id,
+            patient.full_name,
+            created_at.timestamp() if created_at else 0,
+            self._patient_payload(patient)
+        )
+
+    def remove_doctor(self, doctor_id):
+        self.doctors.remove(doctor_id)
+
+    def remove_patient(self, patient_id):
+        self.patients.remove(patient_id)
+
+
+autocomplete = AutocompleteService()
@@ -0,0 +1,169 @@
+from datetime import datetime, timedelta
+from app.models import db, DoctorAvailability, DoctorAvailabilityException
+from app.services.scheduling import booked_intervals, to_naive_utc, DEFAULT_DURATION_MINUTES
+
+MAX_RANGE_DAYS = 62
+MAX_DOCTORS = 500
+
+
+def _merge(intervals):
+    """Sort and coalesce overlapping (start, end) intervals"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _subtract(intervals, blocked):
+    """Remove ``blocked`` from ``intervals`` in a single sweep.
+
+    Both lists must be sorted by start and ``intervals`` must not overlap.
+    """
+    result = []
+    j = 0
+    for start, end in intervals:
+        # Blocks ending before this interval cannot touch any later one either
+        while j < len(blocked) and blocked[j][1] <= start:
+            j += 1
+        cursor = start
+        k = j
+        while k < len(blocked) and blocked[k][0] < end:
+            if blocked[k][0] > cursor:
+                result.append((cursor, blocked[k][0]))
+            cursor = max(cursor, blocked[k][1])
+            k += 1
+        if cursor < end:
+            result.append((cursor, end))
+    return result
+
+
+def _working_hours(rules, exceptions, first_day, last_day):
+    """Expand weekly rules and dated exceptions into concrete intervals.
+
+    A day's exceptions apply in a fixed order, whatever order they were
+    stored in: a day off drops the weekly hours, added hours come next and
+    blocked times are taken out last.
+    """
+    by_weekday = {}
+    for rule in rules:
+        by_weekday.setdefault(rule.weekday, []).append((rule.start_time, rule.end_time))
+    by_date = {}
+    for exc in exceptions:
+        by_date.setdefault(exc.date, []).append(exc)
+
+    hours = []
+    day = first_day
+    while day <= last_day:
+        day_off = False
+        added, blocked = [], []
+        for exc in by_date.get(day, ()):
+            if exc.start_time is None or exc.end_time is None:
+                day_off = day_off or not exc.is_available
+                continue
+            interval = (datetime.combine(day, exc.start_time), datetime.combine(day, exc.end_time))
+            (added if exc.is_available else blocked).append(interval)
+        intervals = [] if day_off else [
+            (datetime.combine(day, start), datetime.combine(day, end))
+            for start, end in by_weekday.get(day.weekday(), ())
+        ]
+        intervals += added
+        hours.extend(_subtract(_merge(intervals), _merge(blocked)))
+        day += timedelta(days=1)
+    return hours
+
+
+def free_windows(doctor_ids, start, end):
+    """Open time per doctor in [start, end) as ``{doctor_id: [(start, end), ...]}``.
+
+    Schedules, exceptions and bookings for all doctors are fetched with one
+    query each; each doctor's working hours are then swept once against
+    their sorted bookings.
+    """
+    doctor_ids = list(doctor_ids)
+    if not doctor_ids or start >= end:
+        return {}
+
+    first_day, last_day = start.date(), (end - timedelta(microseconds=1)).date()
+
+    rules, exceptions, booked = {}, {}, {}
+    for rule in db.session.query(
+        DoctorAvailability.doctor_id,
+        DoctorAvailability.weekday,
+        DoctorAvailability.start_time,
+        DoctorAvailability.end_time
+    ).filter(DoctorAvailability.doctor_id.in_(doctor_ids)):
+        rules.setdefault(rule.doctor_id, []).append(rule)
+    for exc in db.session.query(
+        DoctorAvailabilityException.doctor_id,
+        DoctorAvailabilityException.date,
+        DoctorAvailabilityException.start_time,
+        DoctorAvailabilityException.end_time,
+        DoctorAvailabilityException.is_available
+    ).filter(
+        DoctorAvailabilityException.doctor_id.in_(doctor_ids),
+        DoctorAvailabilityException.date >= first_day,
+        DoctorAvailabilityException.date <= last_day
+    ):
+        exceptions.setdefault(exc.doctor_id, []).append(exc)
+    for doctor_id, apt_start, apt_end, _ in booked_intervals(doctor_ids, start, end):
+        booked.setdefault(doctor_id, []).append((apt_start, apt_end))
+
+    windows = {}
+    for doctor_id in doctor_ids:
+        hours = _working_hours(rules.get(doctor_id, ()), exceptions.get(doctor_id, ()), first_day, last_day)
+        hours = _subtract(hours, [(datetime.min, start), (end, datetime.max)])
+        windows[doctor_id] = _subtract(hours, _merge(booked.get(doctor_id, ())))
+    return windows
+
+
+def split_slots(windows, duration_minutes=DEFAULT_DURATION_MINUTES, not_before=None):
+    """Cut free windows into back-to-back bookable slots"""
+    duration = timedelta(minutes=duration_minutes)
+    slots = []
+    for start, end in windows:
+        cursor = start
+        while cursor + duration <= end:
+            if not_before is None or cursor >= not_before:
+                slots.append((cursor, cursor + duration))
+            cursor += duration
+    return slots
+
+
+def free_slots(doctor_ids, start, end, duration_minutes=DEFAULT_DURATION_MINUTES):
+    """Bookable slots per doctor, skipping any that have already started"""
+    now = datetime.utcnow()
+    return {
+        doctor_id: split_slots(windows, duration_minutes, not_before=now)
+        for doctor_id, windows in free_windows(doctor_ids, start, end).items()
+    }
+
+
+def parse_time(value):
+    """Parse 'HH:MM' into a time, raising ValueError"""
+    return datetime.strptime(value, '%H:%M').time()
+
+
+def parse_range(from_value, to_value, default_days=7):
+    """Parse ``from``/``to`` query values into a [start, end) datetime range.
+
+    Accepts dates (``to`` is inclusive) or ISO datetimes; raises ValueError
+    for bad input or ranges longer than MAX_RANGE_DAYS.
+    """
+    def parse(value, inclusive_end=False):
+        if len(value) == 10:
+            day = datetime.strptime(value, '%Y-%m-%d')
+            return day + timedelta(days=1) if inclusive_end else day
+        return to_naive_utc(datetime.fromisoformat(value.replace('Z', '+00:00')))
+
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    start = parse(from_value) if from_value else today
+    end = parse(to_value, inclusive_end=True) if to_value else start + timedelta(days=default_days)
+    if end <= start:
+        raise ValueError('to must be after from')
+    if end - start > timedelta(days=MAX_RANGE_DAYS):
+        raise ValueError(f'Range cannot exceed {MAX_RANGE_DAYS} days')
+    return start, end
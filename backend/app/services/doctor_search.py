@@ -0,0 +1,195 @@
+import difflib
+import re
+from sqlalchemy import DDL, event, text
+from app.models import db, Doctor
+
+# Relative weight of each indexed column when ranking matches
+SEARCH_COLUMNS = ['full_name', 'specialization', 'location', 'qualifications', 'bio']
+SQLITE_WEIGHTS = '10.0, 6.0, 2.0, 1.0, 0.5'
+
+MAX_PER_PAGE = 50
+
+# ---------------------------------------------------------------------------
+# SQLite: FTS5 external-content table kept in sync with `doctors` by triggers
+# ---------------------------------------------------------------------------
+
+_columns = ', '.join(SEARCH_COLUMNS)
+_new_values = ', '.join(f'new.{c}' for c in SEARCH_COLUMNS)
+_old_values = ', '.join(f'old.{c}' for c in SEARCH_COLUMNS)
+
+SQLITE_INDEX_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS doctors_fts USING fts5(
+        {_columns},
+        content='doctors', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS doctors_fts_vocab USING fts5vocab(doctors_fts, 'row')",
+    f"""CREATE TRIGGER IF NOT EXISTS doctors_fts_ai AFTER INSERT ON doctors BEGIN
+        INSERT INTO doctors_fts(rowid, {_columns}) VALUES (new.id, {_new_values});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS doctors_fts_ad AFTER DELETE ON doctors BEGIN
+        INSERT INTO doctors_fts(doctors_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old_values});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS doctors_fts_au AFTER UPDATE ON doctors BEGIN
+        INSERT INTO doctors_fts(doctors_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old_values});
+        INSERT INTO doctors_fts(rowid, {_columns}) VALUES (new.id, {_new_values});
+    END""",
+]
+
+# ---------------------------------------------------------------------------
+# PostgreSQL: weighted tsvector expression index plus trigram indexes for
+# typo-tolerant name/specialization matching
+# ---------------------------------------------------------------------------
+
+POSTGRES_TSVECTOR = (
+    "setweight(to_tsvector('simple', coalesce(full_name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(specialization, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(location, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(qualifications, '')), 'C') || "
+    "setweight(to_tsvector('simple', coalesce(bio, '')), 'D')"
+)
+
+POSTGRES_INDEX_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS ix_doctors_search_tsv ON doctors USING gin (({POSTGRES_TSVECTOR}))",
+    "CREATE INDEX IF NOT EXISTS ix_doctors_full_name_trgm ON doctors USING gin (full_name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_doctors_specialization_trgm ON doctors USING gin (specialization gin_trgm_ops)",
+]
+
+for statement in SQLITE_INDEX_DDL:
+    event.listen(Doctor.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+for statement in POSTGRES_INDEX_DDL:
+    event.listen(Doctor.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+
+
+def _tokens(value):
+    return [t for t in re.findall(r'\w+', (value or '').lower()) if t]
+
+
+def _dialect():
+    return db.session.get_bind().dialect.name
+
+
+def search_doctors(query='', specialization='', page=1, per_page=20):
+    """Ranked, paginated doctor search.
+
+    Returns ``(doctors, has_more)``. Every query token is matched as a prefix
+    against name, specialization, location, qualifications and bio; when
+    nothing matches, misspelled tokens are retried against close terms from
+    the index.
+    """
+    page = max(page, 1)
+    per_page = min(max(per_page, 1), MAX_PER_PAGE)
+    offset = (page - 1) * per_page
+
+    terms = _tokens(query)
+    spec_terms = _tokens(specialization)
+
+    if not terms and not spec_terms:
+        doctors = Doctor.query.order_by(
+            Doctor.rating.desc(), Doctor.id
+        ).offset(offset).limit(per_page + 1).all()
+        return doctors[:per_page], len(doctors) > per_page
+
+    dialect = _dialect()
+    if dialect == 'sqlite':
+        ids = _search_sqlite(terms, spec_terms, offset, per_page + 1)
+    elif dialect == 'postgresql':
+        ids = _search_postgres(query, terms, specialization, spec_terms, offset, per_page + 1)
+    else:
+        ids = _search_like(query, specialization, offset, per_page + 1)
+
+    has_more = len(ids) > per_page
+    ids = ids[:per_page]
+    by_id = {d.id: d for d in Doctor.query.filter(Doctor.id.in_(ids)).all()} if ids else {}
+    return [by_id[i] for i in ids if i in by_id], has_more
+
+
+def _fts_term(term, alternatives=()):
+    options = [f'"{term}"*'] + [f'"{alt}"' for alt in alternatives]
+    return options[0] if len(options) == 1 else '(' + ' OR '.join(options) + ')'
+
+
+def _sqlite_match(terms, spec_terms, corrections=None):
+    corrections = corrections or {}
+    parts = [_fts_term(t, corrections.get(t, ())) for t in terms]
+    parts += [f'specialization : {_fts_term(t, corrections.get(t, ()))}' for t in spec_terms]
+    return ' AND '.join(parts)
+
+
+def _run_sqlite(match, offset, limit):
+    rows = db.session.execute(text(f"""
+        SELECT rowid FROM doctors_fts
+        WHERE doctors_fts MATCH :match
+        ORDER BY bm25(doctors_fts, {SQLITE_WEIGHTS})
+        LIMIT :limit OFFSET :offset
+    """), {'match': match, 'limit': limit, 'offset': offset})
+    return [row[0] for row in rows]
+
+
+def _search_sqlite(terms, spec_terms, offset, limit):
+    ids = _run_sqlite(_sqlite_match(terms, spec_terms), offset, limit)
+    if ids or offset:
+        return ids
+
+    # Nothing matched: widen each unknown token with close index terms
+    corrections = {}
+    for term in set(terms + spec_terms):
+        if len(term) < 3 or _sqlite_has_prefix(term):
+            continue
+        candidates = [row[0] for row in db.session.execute(text(
+            "SELECT term FROM doctors_fts_vocab WHERE term >= :lo AND term < :hi"
+        ), {'lo': term[0], 'hi': term[0] + '\uffff'})]
+        corrections[term] = difflib.get_close_matches(term, candidates, n=3, cutoff=0.75)
+
+    if not any(corrections.values()):
+        return ids
+    return _run_sqlite(_sqlite_match(terms, spec_terms, corrections), offset, limit)
+
+
+def _sqlite_has_prefix(term):
+    return db.session.execute(text(
+        "SELECT 1 FROM doctors_fts_vocab WHERE term >= :lo AND term < :hi LIMIT 1"
+    ), {'lo': term, 'hi': term + '\uffff'}).first() is not None
+
+
+def _search_postgres(query, terms, specialization, spec_terms, offset, limit):
+    conditions = []
+    params = {'limit': limit, 'offset': offset}
+
+    if terms:
+        params['tsquery'] = ' & '.join(f"{t}:*" for t in terms)
+        params['raw'] = query.strip()
+        conditions.append(
+            f"(({POSTGRES_TSVECTOR}) @@ to_tsquery('simple', :tsquery) "
+            "OR full_name % :raw OR specialization % :raw)"
+        )
+        rank = (
+            f"ts_rank({POSTGRES_TSVECTOR}, to_tsquery('simple', :tsquery)) "
+            "+ greatest(similarity(full_name, :raw), similarity(specialization, :raw))"
+        )
+    else:
+        rank = 'coalesce(rating, 0)'
+
+    if spec_terms:
+        params['spec'] = specialization.strip()
+        params['spec_like'] = f"%{specialization.strip()}%"
+        conditions.append("(specialization ILIKE :spec_like OR specialization % :spec)")
+
+    rows = db.session.execute(text(f"""
+        SELECT id FROM doctors
+        WHERE {' AND '.join(conditions)}
+        ORDER BY {rank} DESC, id
+        LIMIT :limit OFFSET :offset
+    """), params)
+    return [row[0] for row in rows]
+
+
+def _search_like(query, specialization, offset, limit):
+    doctors_query = Doctor.query.with_entities(Doctor.id)
+    if query:
+        doctors_query = doctors_query.filter(Doctor.full_name.ilike(f'%{query}%'))
+    if specialization:
+        doctors_query = doctors_query.filter(Doctor.specialization.ilike(f'%{specialization}%'))
+    rows = doctors_query.order_by(Doctor.rating.desc(), Doctor.id).offset(offset).limit(limit).all()
+    return [row.id for row in rows]
@@ -0,0 +1,80 @@
+import mimetypes
+import os
+from urllib.parse import quote
+from flask import current_app, request, send_file
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+from werkzeug.utils import send_file as werkzeug_send_file
+from app.services.storage import content_store
+
+
+def download_mimetype(filename):
+    """Content type for a download, from the name the user sees; gzipped uploads are sent as stored"""
+    mimetype, encoding = mimetypes.guess_type(filename)
+    if encoding == 'gzip':
+        return 'application/gzip'
+    return mimetype or 'application/octet-stream'
+
+
+def send_stored_file(path, download_name, as_attachment=True):
+    """Response sending an uploaded file, once the caller has authorized the request.
+
+    How the bytes go out depends on FILE_SERVE_MODE:
+
+    - ``direct``: streamed by this worker with ``send_file``, answering
+      Range requests with 206 (resumed downloads, seeking in large images)
+      and If-None-Match with 304.
+    - ``x-accel``: an empty response with ``X-Accel-Redirect`` pointing at
+      FILE_ACCEL_PREFIX + the path under UPLOAD_FOLDER, so nginx serves the
+      file (ranges included) from an ``internal`` location and the worker is
+      free immediately.
+    - ``x-sendfile``: the same through ``X-Sendfile`` with the absolute path
+      (Apache mod_xsendfile, lighttpd).
+
+    Files in the content store get their sha256 as ETag, which stays valid
+    across copies and servers.
+    """
+    digest = content_store.digest_of(path)
+    path = os.path.abspath(path)
+    mimetype = download_mimetype(download_name)
+    mode = current_app.config['FILE_SERVE_MODE']
+
+    if mode == 'x-accel':
+        root = os.path.abspath(current_app.config['UPLOAD_FOLDER'])
+        relative = os.path.relpath(path, root)
+        if not relative.startswith(os.pardir):
+            response = current_app.response_class(mimetype=mimetype)
+            response.headers['X-Accel-Redirect'] = (
+                current_app.config['FILE_ACCEL_PREFIX'].rstrip('/') + '/' + quote(relative.replace(os.sep, '/'))
+            )
+            response.headers.set(
+                'Content-Disposition', 'attachment' if as_attachment else 'inline', filename=download_name
+            )
+            if digest:
+                response.set_etag(digest)
+            return response
+        # Outside the folder nginx knows about: fall through and send it ourselves
+
+    try:
+        if mode == 'x-sendfile':
+            return werkzeug_send_file(
+                path,
+                request.environ,
+                mimetype=mimetype,
+                as_attachment=as_attachment,
+                download_name=download_name,
+                etag=digest or True,
+                use_x_sendfile=True,
+                response_class=current_app.response_class
+            )
+
+        return send_file(
+            path,
+            mimetype=mimetype,
+            as_attachment=as_attachment,
+            download_name=download_name,
+            conditional=True,
+            etag=digest or True
+        )
+    except RequestedRangeNotSatisfiable as e:
+        # 416 with Content-Range: */size, not the routes' generic 500
+        return e.get_response()
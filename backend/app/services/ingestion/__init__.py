@@ -0,0 +1,32 @@
+"""
+Streaming health data ingestion.
+
+Parsers yield ``(metric_type, value, unit, recorded_at)`` tuples one at a
+time; the writer turns them into fixed-size bulk INSERTs, so memory stays
+bounded by the chunk size rather than the file size. Uploads are imported
+off the request thread by ``health_data_jobs``; multi-file imports parse in
+worker processes (``ingest_files``). Apple Health, Fitbit and Google Fit
+exports are read natively (``wearables``), including zipped exports.
+"""
+
+from .pipeline import content_hash, health_data_file_type, ingest, process_health_data_file
+from .parsers import iter_csv, iter_json, iter_ndjson, iter_txt
+from .wearables import iter_apple_health
+from .writer import insert_metrics
+from .parallel import ingest_files
+from .jobs import health_data_jobs
+
+__all__ = [
+    'content_hash',
+    'health_data_file_type',
+    'ingest',
+    'ingest_files',
+    'process_health_data_file',
+    'health_data_jobs',
+    'iter_csv',
+    'iter_json',
+    'iter_ndjson',
+    'iter_txt',
+    'iter_apple_health',
+    'insert_metrics'
+]
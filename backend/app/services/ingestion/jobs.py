@@ -0,0 +1,222 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import update
+from app.models import db, HealthDataFile
+from .pipeline import ingest
+from .parallel import ingest_files
+from .validation import ErrorReport
+
+
+class HealthDataJobs:
+    """Imports uploaded health data files on a background thread pool.
+
+    The upload endpoint saves the file, creates a ``queued`` HealthDataFile
+    and calls ``submit``; a worker then streams the file into health_metrics
+    and marks the row ``completed`` (or ``failed`` with the error). Metrics
+    are committed chunk by chunk together with the file's running
+    ``total_records``, so progress is visible to every process and a failed
+    import keeps what it had already stored. Retrying a failed file is
+    cheap: readings that are already stored are skipped on insert.
+
+    Rows that fail validation are left out and summarised in the file's
+    ``error_report``.
+
+    ``submit_batch`` imports several files together, parsing them in up to
+    ``processes`` worker processes (see ``ingest_files``).
+
+    The queue itself lives in memory, so a restarted or crashed worker
+    loses whatever it held. ``recover`` (run once per process, on its first
+    request) re-submits ``queued`` rows and fails ``processing`` rows that
+    started more than ``stale_after`` ago. Rows stuck for that long can
+    also be retried or deleted at any time (``is_stale``). A worker only imports a file it
+    moved from ``queued`` to ``processing`` itself, so re-submitting a row
+    another process is already handling is harmless.
+    """
+
+    def __init__(self, workers=2, processes=None, stale_minutes=60):
+        self._executor = None
+        self._lock = threading.Lock()
+        self._recovered = False
+        self.configure(workers, processes, stale_minutes)
+
+    def configure(self, workers, processes=None, stale_minutes=60):
+        with self._lock:
+            if self._executor:
+                self._executor.shutdown(wait=False)
+            self.workers = workers
+            self.processes = processes
+            self.stale_after = timedelta(minutes=stale_minutes)
+            self._executor = None
+            self._recovered = False
+
+    def _get_executor(self):
+        # Created lazily so gunicorn workers don't inherit a pool from the master
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='health-data')
+        return self._executor
+
+    def submit(self, file_id):
+        """Queue a committed HealthDataFile for import"""
+        app = current_app._get_current_object()
+        return self._get_executor().submit(self._run, app, self._import, file_id)
+
+    def submit_batch(self, file_ids):
+        """Queue several committed HealthDataFiles to be parsed in parallel"""
+        app = current_app._get_current_object()
+        return self._get_executor().submit(self._run, app, self._import_batch, list(file_ids))
+
+    def is_stale(self, health_file):
+        """True for a queued or processing file whose worker has presumably gone away"""
+        since = {'queued': health_file.uploaded_at, 'processing': health_file.started_at}.get(health_file.status, False)
+        if since is False:
+            return False
+        return since is None or since < datetime.utcnow() - self.stale_after
+
+    def recover(self):
+        """Fail imports orphaned by a dead worker and re-submit queued ones; returns (failed, resubmitted)"""
+        from app.services.live_events import publish_health_data
+
+        stale = [f for f in HealthDataFile.query.filter_by(status='processing').all() if self.is_stale(f)]
+        for health_file in stale:
+            health_file.status = 'failed'
+            health_file.error = 'Import was interrupted; retry to finish it'
+            health_file.completed_at = datetime.utcnow()
+            publish_health_data(health_file, health_file.total_records or 0)
+        db.session.commit()
+
+        queued = [file_id for (file_id,) in db.session.query(HealthDataFile.id).filter_by(status='queued').all()]
+        for file_id in queued:
+            self.submit(file_id)
+        return len(stale), len(queued)
+
+    def recover_once(self):
+        """``recover`` on the first call in this process, nothing afterwards"""
+        if self._recovered:
+            return
+        with self._lock:
+            if self._recovered:
+                return
+            self._recovered = True
+        try:
+            self.recover()
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Health data job recovery failed: {e}")
+
+    def _run(self, app, fn, arg):
+        with app.app_context():
+            try:
+                fn(arg)
+            finally:
+                db.session.remove()
+
+    @staticmethod
+    def _claim(file_ids):
+        """Move queued files to processing; returns those this worker got (not another process)"""
+        claimed = []
+        for file_id in file_ids:
+            result = db.session.execute(
+                update(HealthDataFile)
+                .where(HealthDataFile.id == file_id, HealthDataFile.status == 'queued')
+                .values(
+                    status='processing',
+                    started_at=datetime.utcnow(),
+                    total_records=0,
+                    rejected_records=0,
+                    error=None,
+                    error_report=None
+                )
+            )
+            if result.rowcount == 1:
+                claimed.append(file_id)
+        db.session.commit()
+        if not claimed:
+            return []
+        return HealthDataFile.query.filter(HealthDataFile.id.in_(claimed)).all()
+
+    @staticmethod
+    def _record_progress(file_id, total):
+        # Goes out with the chunk's commit
+        db.session.execute(
+            update(HealthDataFile).where(HealthDataFile.id == file_id).values(total_records=total)
+        )
+
+    @staticmethod
+    def _finish(health_file, records_added, error, report):
+        from app.services.live_events import publish_health_data
+
+        health_file.total_records = records_added
+        health_file.rejected_records = report['rejected'] if report else 0
+        health_file.error_report = report if report and report['rejected'] else None
+        health_file.completed_at = datetime.utcnow()
+        if error:
+            print(f"❌ Health data import {health_file.id} failed: {error}")
+            health_file.status = 'failed'
+            health_file.error = error
+        else:
+            health_file.status = 'completed'
+            health_file.processed = True
+        publish_health_data(health_file, records_added)
+
+    def _import(self, file_id):
+        claimed = self._claim([file_id])
+        if not claimed:
+            return
+        health_file = claimed[0]
+        filepath, patient_id, file_type, name = (
+            health_file.file_path, health_file.patient_id, health_file.file_type, health_file.filename
+        )
+
+        report = ErrorReport()
+        committed = 0
+
+        def commit_chunk(total):
+            nonlocal committed
+            self._record_progress(file_id, total)
+            db.session.commit()
+            committed = total
+
+        try:
+            records_added = ingest(filepath, patient_id, file_type, progress=commit_chunk, report=report, name=name)
+            error = None
+        except Exception as e:
+            db.session.rollback()
+            records_added, error = committed, str(e)
+        self._finish(db.session.get(HealthDataFile, file_id), records_added, error, report.to_dict())
+        db.session.commit()
+
+    def _import_batch(self, file_ids):
+        files = self._claim(file_ids)
+        if not files:
+            return
+        # Plain values: the writer commits per chunk, which expires the ORM objects
+        jobs = [(f.id, f.file_path, f.file_type, f.patient_id, f.filename) for f in files]
+
+        try:
+            results = ingest_files(
+                jobs,
+                chunk_size=current_app.config['HEALTH_DATA_CHUNK_SIZE'],
+                processes=self.processes,
+                progress=self._record_progress
+            )
+            outcomes = {health_file.id: results[health_file.id] for health_file in files}
+        except Exception as e:
+            # The pool itself broke (could not start, a parser process died):
+            # fail every file, keeping what each had committed so far
+            db.session.rollback()
+            committed = dict(
+                db.session.query(HealthDataFile.id, HealthDataFile.total_records)
+                .filter(HealthDataFile.id.in_([health_file.id for health_file in files]))
+                .all()
+            )
+            outcomes = {file_id: (committed.get(file_id) or 0, str(e), None) for file_id in committed}
+        for health_file in files:
+            self._finish(health_file, *outcomes[health_file.id])
+        db.session.commit()
+
+
+health_data_jobs = HealthDataJobs()
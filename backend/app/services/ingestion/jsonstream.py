@@ -0,0 +1,83 @@
+import json
+import re
+
+BLOCK_SIZE = 64 * 1024
+_WHITESPACE = ' \t\n\r'
+# Only number characters left in the buffer: the value just decoded may be
+# cut off mid-number ('1e' decodes as 1) or mid-literal
+_PARTIAL_TAIL = re.compile(r'[0-9+\-.eE]*\Z')
+
+
+def iter_json_values(f, block_size=BLOCK_SIZE):
+    """Yield the elements of a top-level JSON array one at a time.
+
+    ``f`` is a text file object. The file is read in ``block_size`` pieces
+    into a sliding buffer and each element is decoded with ``raw_decode`` as
+    soon as it is complete, so memory is bounded by the largest element
+    rather than the file. A document that is not an array (e.g. a single
+    record) is decoded whole and yielded as one value.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = '', 0, False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        # Grow the read with the pending tail so one huge element isn't re-decoded block by block
+        data = f.read(max(block_size, len(buffer) - pos))
+        if not data:
+            eof = True
+            return
+        # Drop what has been consumed so the buffer only holds the unparsed tail
+        buffer = buffer[pos:] + data
+        pos = 0
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            fill()
+
+    skip_whitespace()
+    if pos >= len(buffer):
+        return
+    if buffer[pos] != '[':
+        # Not an array: decode the remaining document as a single value
+        while not eof:
+            fill()
+        yield json.loads(buffer[pos:])
+        return
+    pos += 1
+
+    expect_value, first = True, True
+    while True:
+        skip_whitespace()
+        if pos >= len(buffer):
+            raise json.JSONDecodeError('Unterminated array', buffer, pos)
+        char = buffer[pos]
+        if char == ']':
+            if expect_value and not first:
+                raise json.JSONDecodeError('Trailing comma in array', buffer, pos)
+            return
+        if not expect_value:
+            if char != ',':
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+            pos += 1
+            expect_value = True
+            continue
+
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+        if not eof and _PARTIAL_TAIL.match(buffer, end):
+            fill()
+            continue
+        pos = end
+        expect_value, first = False, False
+        yield value
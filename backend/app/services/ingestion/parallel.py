@@ -0,0 +1,101 @@
+import multiprocessing
+import os
+import queue as queue_module
+from concurrent.futures import ProcessPoolExecutor
+from app.models import db
+from .pipeline import health_data_file_type, iter_health_data_rows
+from .validation import ErrorReport
+from .writer import insert_metrics
+
+# Chunks buffered between the parser processes and the writer, per process
+QUEUE_DEPTH = 4
+
+_queue = None  # set in each parser process
+
+
+def _init_parser(queue):
+    global _queue
+    _queue = queue
+
+
+def _parse_into_queue(key, filepath, file_type, name, chunk_size):
+    """Parser process: stream ``(key, 'rows', chunk)`` messages, then ``'done'`` or ``'error'`` with the error report"""
+    report = ErrorReport()
+    try:
+        chunk = []
+        for row in iter_health_data_rows(filepath, file_type, report, name):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                _queue.put((key, 'rows', chunk))
+                chunk = []
+        if chunk:
+            _queue.put((key, 'rows', chunk))
+        _queue.put((key, 'done', (None, report.to_dict())))
+    except Exception as e:
+        _queue.put((key, 'error', (str(e), report.to_dict())))
+
+
+def ingest_files(files, chunk_size=5000, processes=None, progress=None):
+    """Import several health data files, parsing them in parallel worker processes.
+
+    ``files`` is a list of ``(key, filepath, file_type, patient_id, name)``,
+    ``name`` being the original file name (None for the file's own). Each
+    file is parsed in its own process and sends its rows back in chunks
+    through a bounded queue; this thread is the only writer and commits each
+    chunk as it arrives, so SQLite's single writer is never contended and
+    memory stays bounded however large the files are. Inserts skip existing
+    readings, so a file that fails part way can simply be imported again.
+
+    ``progress(key, total)`` is called after each chunk is inserted, inside
+    its transaction. Returns ``{key: (records_added, error, error_report)}``
+    with ``error`` None on success.
+    """
+    processes = processes or os.cpu_count() or 1
+    results = {key: [0, None, None] for key, _, _, _, _ in files}
+    patients = {key: patient_id for key, _, _, patient_id, _ in files}
+
+    # spawn: forking a threaded web worker can copy held locks into the child
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue(maxsize=QUEUE_DEPTH * processes)
+    with ProcessPoolExecutor(
+        max_workers=min(processes, len(files)) or 1,
+        mp_context=context,
+        initializer=_init_parser,
+        initargs=(queue,)
+    ) as executor:
+        futures = {
+            executor.submit(
+                _parse_into_queue, key, os.path.abspath(filepath),
+                file_type or health_data_file_type(name or filepath), name, chunk_size
+            ): key
+            for key, filepath, file_type, _, name in files
+        }
+        pending = set(results)
+        while pending:
+            try:
+                key, kind, payload = queue.get(timeout=1)
+            except queue_module.Empty:
+                # A crashed parser process never reports back
+                for future, key in futures.items():
+                    if key in pending and future.done() and future.exception():
+                        results[key][1] = str(future.exception())
+                        pending.discard(key)
+                continue
+
+            if kind == 'rows':
+                if results[key][1] is None:
+                    try:
+                        added = insert_metrics(patients[key], payload, len(payload))
+                        if progress:
+                            progress(key, results[key][0] + added)
+                        db.session.commit()
+                        results[key][0] += added
+                    except Exception as e:
+                        db.session.rollback()
+                        results[key][1] = str(e)
+                continue
+            error, results[key][2] = payload
+            results[key][1] = results[key][1] or error
+            pending.discard(key)
+
+    return {key: tuple(result) for key, result in results.items()}
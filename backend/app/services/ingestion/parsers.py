@@ -0,0 +1,183 @@
+import csv
+import itertools
+import json
+import os
+import re
+from datetime import datetime, timedelta
+from .jsonstream import iter_json_values
+from .timestamps import SAMPLE_SIZE, detect_timestamp_parser
+from .validation import ErrorReport, validate_value
+from .wearables import fitbit_kind, is_fitbit_record, iter_fitbit_records
+
+# Source column/field -> (metric_type, unit)
+CSV_COLUMNS = {
+    'heart_rate': ('heartbeat', 'bpm'),
+    'steps': ('steps', 'steps'),
+    'sleep_hours': ('sleep_hours', 'hours'),
+    'calories': ('calories', 'kcal'),
+    'blood_oxygen': ('blood_oxygen', '%'),
+}
+
+JSON_FIELDS = {
+    'heart_rate': ('heartbeat', 'bpm'),
+    'steps': ('steps', 'steps'),
+    'sleep': ('sleep_hours', 'hours'),
+    'calories': ('calories', 'kcal'),
+    'spo2': ('blood_oxygen', '%'),
+    'temperature': ('temperature', '°F'),
+}
+
+# Other exporters' CSV headers (lower-cased) -> our column; Google Fit Takeout first
+CSV_ALIASES = {
+    'average heart rate (bpm)': 'heart_rate',
+    'step count': 'steps',
+    'calories (kcal)': 'calories',
+}
+
+# Sniffing looks at this much of a .txt export to find its delimiter
+SNIFF_SIZE = 4096
+
+
+def undated_timestamps():
+    """Stand-in timestamps for rows without a date.
+
+    The import time plus one microsecond per row, so undated rows in one file
+    stay distinct under the (patient_id, metric_type, recorded_at) key
+    instead of collapsing onto a shared ``utcnow()``.
+    """
+    start = datetime.utcnow()
+    return (start + timedelta(microseconds=i) for i in itertools.count())
+
+
+def iter_csv(f, report=None, name='', dialect='excel'):
+    """Yield metric tuples from a CSV export (date, heart_rate, steps, sleep_hours, calories, blood_oxygen).
+
+    Headers are matched case-insensitively, and Google Fit's Takeout columns
+    are understood too; its per-day files only have a time of day, so the
+    date is taken from the file name (``2024-01-31.csv``). Rows with an
+    unparseable date and values that fail validation are left out and
+    recorded in ``report``.
+    """
+    report = report if report is not None else ErrorReport()
+    reader = csv.reader(f, dialect)
+    header = next(reader, None)
+    if not header:
+        return
+    index = {}
+    for i, column in enumerate(header):
+        column = column.strip().lower()
+        index.setdefault(CSV_ALIASES.get(column, column), i)
+    columns = [(index[column], column, metric_type, unit) for column, (metric_type, unit) in CSV_COLUMNS.items() if column in index]
+    date_index = index.get('date')
+    date_prefix = ''
+    if date_index is None and 'start time' in index:
+        file_date = re.search(r'\d{4}-\d{2}-\d{2}', os.path.basename(name))
+        if file_date:
+            date_index, date_prefix = index['start time'], file_date.group() + 'T'
+    undated = undated_timestamps()
+    
+    # Detect the date format from the first rows, then parse every row with it
+    sample = list(itertools.islice(reader, SAMPLE_SIZE))
+    parse_date = None
+    if date_index is not None:
+        parse_date = detect_timestamp_parser(date_prefix + row[date_index] for row in sample if date_index < len(row))
+    
+    # Data starts on line 2; csv.reader.line_num is unusable with the sample read ahead
+    for line, row in enumerate(itertools.chain(sample, reader), start=2):
+        if date_index is not None and date_index < len(row) and row[date_index]:
+            recorded_at = parse_date(date_prefix + row[date_index])
+            if recorded_at is None:
+                report.reject(line, 'date', row[date_index], 'unrecognised date')
+                continue
+        else:
+            recorded_at = next(undated)
+        
+        for i, column, metric_type, unit in columns:
+            if i < len(row) and row[i]:
+                reason = validate_value(metric_type, row[i])
+                if reason:
+                    report.reject(line, column, row[i], reason)
+                else:
+                    yield metric_type, row[i].strip(), unit, recorded_at
+
+
+def iter_txt(f, report=None, name=''):
+    """Yield metric tuples from a delimited text export, sniffing its delimiter (tab, semicolon, ...)"""
+    sample = f.read(SNIFF_SIZE)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t|')
+    except csv.Error:
+        dialect = 'excel'
+    yield from iter_csv(itertools.chain(sample.splitlines(keepends=True), f), report, name, dialect)
+
+
+def iter_json_record(record, line, parse_date, undated, report):
+    """Yield metric tuples from one JSON record ({timestamp, heart_rate, spo2, ...})"""
+    if not isinstance(record, dict):
+        report.reject(line, None, record, 'not a JSON object')
+        return
+    timestamp = record.get('timestamp')
+    if timestamp not in (None, ''):
+        recorded_at = parse_date(timestamp)
+        if recorded_at is None:
+            report.reject(line, 'timestamp', timestamp, 'unrecognised date')
+            return
+    else:
+        recorded_at = next(undated)
+    for field, (metric_type, unit) in JSON_FIELDS.items():
+        value = record.get(field)
+        if value:
+            reason = validate_value(metric_type, value)
+            if reason:
+                report.reject(line, field, value, reason)
+            else:
+                yield metric_type, str(value), unit, recorded_at
+
+
+def iter_json(f, report=None, name=''):
+    """Yield metric tuples from a JSON export holding one record or an array of records.
+
+    Records are decoded incrementally, so the document is never held in
+    memory whole; ``line`` in the error report is the record's position in
+    the array, starting at 1. Fitbit exports are read as well.
+    """
+    yield from _iter_records(enumerate(iter_json_values(f), start=1), report, name)
+
+
+def iter_ndjson(f, report=None, name=''):
+    """Yield metric tuples from newline-delimited JSON, one record per line"""
+    report = report if report is not None else ErrorReport()
+    
+    def records():
+        for line, text in enumerate(f, start=1):
+            text = text.strip()
+            if not text:
+                continue
+            try:
+                yield line, json.loads(text)
+            except ValueError:
+                report.reject(line, None, text, 'invalid JSON')
+    
+    yield from _iter_records(records(), report, name)
+
+
+def _iter_records(records, report, name=''):
+    report = report if report is not None else ErrorReport()
+    undated = undated_timestamps()
+    records = _normalise_fitbit(records, fitbit_kind(name))
+    sample = list(itertools.islice(records, SAMPLE_SIZE))
+    parse_date = detect_timestamp_parser(
+        record.get('timestamp') for _, record in sample if isinstance(record, dict)
+    )
+    for line, record in itertools.chain(sample, records):
+        yield from iter_json_record(record, line, parse_date, undated, report)
+
+
+def _normalise_fitbit(records, kind):
+    """Rewrite Fitbit records (``{"dateTime", "value"}``, sleep logs) as ours, leaving other records alone"""
+    for line, record in records:
+        if is_fitbit_record(record):
+            for normalised in iter_fitbit_records(record, kind):
+                yield line, normalised
+        else:
+            yield line, record
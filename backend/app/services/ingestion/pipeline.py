@@ -0,0 +1,109 @@
+import gzip
+import hashlib
+import io
+import os
+import zipfile
+from flask import current_app
+from app.models import db
+from .parsers import iter_csv, iter_json, iter_ndjson, iter_txt
+from .wearables import iter_apple_health
+from .writer import insert_metrics
+
+# Parsers take (stream, report, name); XML is read as bytes, the rest as text
+PARSERS = {
+    'csv': iter_csv,
+    'json': iter_json,
+    'ndjson': iter_ndjson,
+    'txt': iter_txt,
+    'xml': iter_apple_health,
+}
+
+BINARY_TYPES = {'xml'}
+
+ARCHIVE_TYPES = {'zip'}
+
+# Zip members that are never health data (Apple's clinical CDA document, macOS metadata)
+SKIPPED_ARCHIVE_MEMBERS = ('export_cda.xml', '__MACOSX/')
+
+
+def health_data_file_type(filename):
+    """Lower-case extension, keeping a trailing compression suffix: 'a.CSV' -> 'csv', 'a.json.gz' -> 'json.gz'"""
+    parts = filename.lower().rsplit('.', 2)
+    if len(parts) == 3 and parts[2] == 'gz':
+        return f'{parts[1]}.gz'
+    return parts[-1] if len(parts) > 1 else ''
+
+
+def _read_as(stream, file_type):
+    if file_type in BINARY_TYPES:
+        return stream
+    return io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+
+def iter_health_data_rows(filepath, file_type, report=None, name=None):
+    """Yield metric tuples from a stored upload.
+
+    ``.gz`` files are decompressed on the fly, and a ``.zip`` (such as an
+    Apple Health or Fitbit export) is read member by member without being
+    extracted; members of other types are skipped. ``name`` is the file's
+    original name (some exports are recognised by it), defaulting to the
+    stored file's.
+    """
+    if file_type in ARCHIVE_TYPES:
+        with zipfile.ZipFile(filepath) as archive:
+            for member in archive.infolist():
+                if member.is_dir() or any(skip in member.filename for skip in SKIPPED_ARCHIVE_MEMBERS):
+                    continue
+                member_type = health_data_file_type(member.filename)
+                parser = PARSERS.get(member_type.removesuffix('.gz'))
+                if parser is None:
+                    continue
+                with archive.open(member) as raw:
+                    stream = gzip.GzipFile(fileobj=raw) if member_type.endswith('.gz') else raw
+                    yield from parser(_read_as(stream, member_type.removesuffix('.gz')), report, member.filename)
+        return
+
+    parser = PARSERS.get(file_type.removesuffix('.gz'))
+    if parser is None:
+        return
+    opener = gzip.open if file_type.endswith('.gz') else open
+    with opener(filepath, 'rb') as raw:
+        yield from parser(_read_as(raw, file_type.removesuffix('.gz')), report, name or os.path.basename(filepath))
+
+
+def content_hash(stream, block_size=1024 * 1024):
+    """sha256 hex digest of a file-like object, rewound afterwards so it can still be saved"""
+    digest = hashlib.sha256()
+    for block in iter(lambda: stream.read(block_size), b''):
+        digest.update(block)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def ingest(filepath, patient_id, file_type=None, chunk_size=None, progress=None, report=None, name=None):
+    """Stream a health data file into health_metrics without committing.
+
+    ``progress`` is called with the running total after every chunk (the
+    caller may commit there). Rejected rows are recorded in ``report``.
+    Returns the number of metrics added.
+    """
+    file_type = file_type or health_data_file_type(name or filepath)
+    chunk_size = chunk_size or current_app.config['HEALTH_DATA_CHUNK_SIZE']
+    rows = iter_health_data_rows(filepath, file_type, report, name)
+    return insert_metrics(patient_id, rows, chunk_size, progress=progress)
+
+
+def process_health_data_file(filepath, patient_id, file_type=None, chunk_size=None):
+    """Stream a health data file into health_metrics and return the number of metrics added.
+
+    The whole file is imported in one transaction: either every valid
+    metric is committed or, on error, none are.
+    """
+    try:
+        records_added = ingest(filepath, patient_id, file_type, chunk_size)
+        db.session.commit()
+        return records_added
+    except Exception as e:
+        print(f"Error processing file: {str(e)}")
+        db.session.rollback()
+        raise
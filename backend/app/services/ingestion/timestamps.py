@@ -0,0 +1,116 @@
+"""
+Timestamp parsing for health data imports.
+
+Exports use one date format throughout, so the format is detected once per
+file from a sample of values and every row goes through that single parser.
+Values the detected parser rejects are rejected too: trying other formats
+per row could read 13/01 day-first after 05/01 was read month-first and
+mix two readings of the date in one series.
+"""
+import re
+from datetime import datetime
+from app.services.scheduling import to_naive_utc
+
+SAMPLE_SIZE = 50
+
+
+def parse_iso(value):
+    """'2024-01-31', '2024-01-31 08:00:00', '2024-01-31T08:00:00+02:00', ..."""
+    try:
+        result = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return to_naive_utc(result) if result.tzinfo else result
+
+
+def _pattern_parser(pattern, order):
+    """Parser for a numeric layout; ``order`` gives the group index of year, month, day, hour, minute, second.
+
+    Two-digit years are taken as 20xx.
+    """
+    match = re.compile(pattern).fullmatch
+    year, month, day, hour, minute, second = order
+
+    def parse(value):
+        m = match(value)
+        if m is None:
+            return None
+        g = m.groups()
+        h = int(g[hour]) if g[hour] else 0
+        meridiem = g[6] if len(g) > 6 else None
+        if meridiem:
+            h = h % 12 + (12 if meridiem in 'Pp' else 0)
+        y = int(g[year])
+        if y < 100:
+            y += 2000
+        try:
+            return datetime(
+                y, int(g[month]), int(g[day]), h,
+                int(g[minute]) if g[minute] else 0,
+                int(g[second]) if g[second] else 0
+            )
+        except ValueError:
+            return None
+    return parse
+
+
+_TIME = r'(?:[ T](\d{1,2}):(\d{2})(?::(\d{2}))?(?:\s*([AaPp])[Mm])?)?'
+
+parse_us = _pattern_parser(r'(\d{1,2})/(\d{1,2})/(\d{4}|\d{2})' + _TIME, (2, 0, 1, 3, 4, 5))   # 01/31/2024 8:00 PM, 01/31/24 (Fitbit)
+parse_day_first = _pattern_parser(r'(\d{1,2})[/.](\d{1,2})[/.](\d{4})' + _TIME, (2, 1, 0, 3, 4, 5))  # 31/01/2024, 31.01.2024
+parse_year_first = _pattern_parser(r'(\d{4})/(\d{1,2})/(\d{1,2})' + _TIME, (0, 1, 2, 3, 4, 5))   # 2024/01/31 08:00
+
+
+def parse_epoch(value):
+    """Unix time in seconds or milliseconds"""
+    try:
+        seconds = float(value)
+    except ValueError:
+        return None
+    if seconds > 1e11:
+        seconds /= 1000
+    try:
+        return datetime.utcfromtimestamp(seconds)
+    except (OverflowError, OSError, ValueError):
+        return None
+
+
+# Detection order: month-first wins over day-first when a sample fits both
+PARSERS = [parse_iso, parse_us, parse_day_first, parse_year_first, parse_epoch]
+
+
+def parse_timestamp(value):
+    """Parse a timestamp in any supported format as naive UTC, or None"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    for parser in PARSERS:
+        result = parser(value)
+        if result is not None:
+            return result
+    return None
+
+
+def detect_timestamp_parser(samples):
+    """Return a parser for the format every sample value is in.
+
+    ``samples`` are raw values from the start of a file. The returned
+    callable takes a raw value and returns naive UTC, or None for a value
+    that is not in the detected format. Only when no single format fits
+    the whole sample is each value parsed on its own (``parse_timestamp``).
+    """
+    samples = [str(value).strip() for value in samples if value not in (None, '')]
+    detected = next(
+        (parser for parser in PARSERS if samples and all(parser(value) is not None for value in samples)),
+        None
+    )
+    if detected is None:
+        return parse_timestamp
+
+    def parse(value):
+        if value is None:
+            return None
+        if not isinstance(value, str):
+            value = str(value)
+        return detected(value) or detected(value.strip())
+    return parse
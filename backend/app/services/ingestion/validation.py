@@ -0,0 +1,74 @@
+"""
+Row-level validation for health data imports.
+
+Rows that can't be imported (unparseable dates, non-numeric or
+out-of-range values) are left out and recorded in an ``ErrorReport`` that
+is stored with the HealthDataFile, instead of failing the whole file.
+"""
+import math
+from collections import Counter
+
+# Plausible (min, max) per metric type, in the units the importers store
+RANGES = {
+    'heartbeat': (20, 250),        # bpm
+    'steps': (0, 200000),
+    'sleep_hours': (0, 24),
+    'calories': (0, 20000),        # kcal
+    'blood_oxygen': (50, 100),     # %
+    'temperature': (86, 113),      # °F
+    'sugar_level': (20, 600),      # mg/dL
+}
+
+MAX_EXAMPLES = 50
+
+
+def validate_value(metric_type, value):
+    """Return the reason ``value`` can't be stored as ``metric_type``, or None if it is valid"""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return 'missing value'
+    if metric_type == 'blood_pressure':
+        systolic, _, diastolic = str(value).partition('/')
+        if not (systolic.strip().isdigit() and diastolic.strip().isdigit()):
+            return 'not a systolic/diastolic reading'
+        return None
+    bounds = RANGES.get(metric_type)
+    if bounds is None:
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return 'not a number'
+    if math.isnan(number) or not bounds[0] <= number <= bounds[1]:
+        return 'out of range'
+    return None
+
+
+class ErrorReport:
+    """Compact summary of rejected rows: a count per reason plus the first few examples"""
+
+    def __init__(self, max_examples=MAX_EXAMPLES):
+        self.max_examples = max_examples
+        self.rejected = 0
+        self.reasons = Counter()
+        self.examples = []
+
+    def __bool__(self):
+        return self.rejected > 0
+
+    def reject(self, line, field, value, reason):
+        self.rejected += 1
+        self.reasons[reason] += 1
+        if len(self.examples) < self.max_examples:
+            self.examples.append({
+                'line': line,
+                'field': field,
+                'value': None if value is None else str(value)[:100],
+                'reason': reason
+            })
+
+    def to_dict(self):
+        return {
+            'rejected': self.rejected,
+            'reasons': dict(self.reasons),
+            'examples': self.examples
+        }
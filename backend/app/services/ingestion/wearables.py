@@ -0,0 +1,255 @@
+"""
+Parsers for wearable vendors' own export formats.
+
+Apple Health ``export.xml`` is streamed with ``iterparse``, clearing each
+element once it has been read so memory stays flat on multi-GB exports.
+Fitbit JSON records are rewritten into our own JSON record shape and go
+through the regular JSON path (validation, date detection).
+"""
+import os
+import re
+from datetime import datetime, timedelta
+from xml.etree.ElementTree import iterparse
+from .timestamps import parse_iso, parse_timestamp
+from .validation import ErrorReport, validate_value
+
+# ---------------------------------------------------------------------------
+# Apple Health
+# ---------------------------------------------------------------------------
+
+APPLE_SLEEP = 'HKCategoryTypeIdentifierSleepAnalysis'
+APPLE_BLOOD_PRESSURE = 'HKCorrelationTypeIdentifierBloodPressure'
+APPLE_ASLEEP = {
+    'HKCategoryValueSleepAnalysisAsleep',
+    'HKCategoryValueSleepAnalysisAsleepUnspecified',
+    'HKCategoryValueSleepAnalysisAsleepCore',
+    'HKCategoryValueSleepAnalysisAsleepDeep',
+    'HKCategoryValueSleepAnalysisAsleepREM',
+}
+
+
+def _fahrenheit(value, unit):
+    return value * 9 / 5 + 32 if unit == 'degC' else value
+
+
+def _kcal(value, unit):
+    return value / 4.184 if unit == 'kJ' else value
+
+
+def _mg_dl(value, unit):
+    return value * 18.016 if unit.startswith('mmol') else value
+
+
+# Record type -> (metric_type, unit, convert(value, source_unit))
+APPLE_RECORDS = {
+    'HKQuantityTypeIdentifierHeartRate': ('heartbeat', 'bpm', None),
+    'HKQuantityTypeIdentifierStepCount': ('steps', 'steps', None),
+    'HKQuantityTypeIdentifierActiveEnergyBurned': ('calories', 'kcal', _kcal),
+    'HKQuantityTypeIdentifierOxygenSaturation': ('blood_oxygen', '%', lambda v, u: v * 100 if v <= 1 else v),
+    'HKQuantityTypeIdentifierBodyTemperature': ('temperature', '°F', _fahrenheit),
+    'HKQuantityTypeIdentifierBloodGlucose': ('sugar_level', 'mg/dL', _mg_dl),
+}
+
+
+def _format_number(value):
+    return ('%.2f' % value).rstrip('0').rstrip('.')
+
+
+def _apple_date(value):
+    # '2023-01-01 09:59:00 -0500'
+    return parse_iso(value) or parse_timestamp(value) if value else None
+
+
+def _apple_night(value, start):
+    """The night a sleep segment belongs to: the local date twelve hours before it started"""
+    try:
+        # '2023-01-01 23:40:00 -0500' -> local wall-clock time
+        local = datetime.fromisoformat(value[:19])
+    except ValueError:
+        local = start
+    return (local - timedelta(hours=12)).date()
+
+
+def _apple_sleep(elem, line, report):
+    """(night, start, end) of an asleep <Record> segment, or None"""
+    if elem.get('value') not in APPLE_ASLEEP:
+        return None
+    start, end = _apple_date(elem.get('startDate')), _apple_date(elem.get('endDate'))
+    if start is None or end is None:
+        report.reject(line, 'startDate', elem.get('startDate'), 'unrecognised date')
+        return None
+    if end <= start:
+        return None
+    return _apple_night(elem.get('startDate'), start), start, end
+
+
+def _apple_sleep_totals(nights, report):
+    """One sleep_hours tuple per night, at the night's first segment.
+
+    Overlapping segments (the phone and the watch both tracking the same
+    night) are merged, not added up.
+    """
+    for night in sorted(nights):
+        segments = sorted(nights[night])
+        total = timedelta()
+        current_start, current_end = segments[0]
+        for start, end in segments[1:]:
+            if start > current_end:
+                total += current_end - current_start
+                current_start, current_end = start, end
+            else:
+                current_end = max(current_end, end)
+        total += current_end - current_start
+        value = _format_number(total.total_seconds() / 3600)
+        reason = validate_value('sleep_hours', value)
+        if reason:
+            report.reject(None, APPLE_SLEEP, f'{night}: {value}', reason)
+            continue
+        yield 'sleep_hours', value, 'hours', segments[0][0]
+
+
+def _apple_record(elem, line, report):
+    """Metric tuple for one top-level <Record>, or None"""
+    record_type = elem.get('type')
+    mapping = APPLE_RECORDS.get(record_type)
+    if mapping is None:
+        return None
+    metric_type, unit, convert = mapping
+    recorded_at = _apple_date(elem.get('startDate'))
+    if recorded_at is None:
+        report.reject(line, 'startDate', elem.get('startDate'), 'unrecognised date')
+        return None
+    raw = elem.get('value')
+    try:
+        value = float(raw)
+    except (TypeError, ValueError):
+        report.reject(line, record_type, raw, 'not a number')
+        return None
+    if convert:
+        value = convert(value, elem.get('unit') or '')
+    value = _format_number(value)
+    reason = validate_value(metric_type, value)
+    if reason:
+        report.reject(line, record_type, raw, reason)
+        return None
+    return metric_type, value, unit, recorded_at
+
+
+def _apple_blood_pressure(elem, line, report):
+    """Metric tuple for a blood pressure <Correlation> holding systolic and diastolic records"""
+    readings = {child.get('type'): child.get('value') for child in elem.iter('Record')}
+    systolic = readings.get('HKQuantityTypeIdentifierBloodPressureSystolic')
+    diastolic = readings.get('HKQuantityTypeIdentifierBloodPressureDiastolic')
+    recorded_at = _apple_date(elem.get('startDate'))
+    if recorded_at is None:
+        report.reject(line, 'startDate', elem.get('startDate'), 'unrecognised date')
+        return None
+    try:
+        value = f'{round(float(systolic))}/{round(float(diastolic))}'
+    except (TypeError, ValueError):
+        report.reject(line, APPLE_BLOOD_PRESSURE, f'{systolic}/{diastolic}', 'not a systolic/diastolic reading')
+        return None
+    return 'blood_pressure', value, 'mmHg', recorded_at
+
+
+def iter_apple_health(f, report=None, name=''):
+    """Yield metric tuples from an Apple Health export.xml (binary stream).
+
+    Only direct children of <HealthData> are looked at; each is cleared
+    from the tree as soon as it has been handled, so memory does not grow
+    with the export. ``line`` in the error report is the element's position
+    among them. Systolic/diastolic records are taken from their blood
+    pressure correlation, not on their own.
+
+    Sleep is exported as many Core/Deep/REM segments per night; they are
+    collected per night and yielded as one nightly total once the file has
+    been read, like Fitbit's sleep logs.
+    """
+    report = report if report is not None else ErrorReport()
+    depth = 0
+    root = None
+    line = 0
+    nights = {}  # night date -> [(start, end), ...]
+    for event, elem in iterparse(f, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            depth += 1
+            continue
+        depth -= 1
+        if depth != 1:
+            continue
+        line += 1
+        row = None
+        if elem.tag == 'Record' and elem.get('type') == APPLE_SLEEP:
+            segment = _apple_sleep(elem, line, report)
+            if segment:
+                nights.setdefault(segment[0], []).append(segment[1:])
+        elif elem.tag == 'Record':
+            row = _apple_record(elem, line, report)
+        elif elem.tag == 'Correlation' and elem.get('type') == APPLE_BLOOD_PRESSURE:
+            row = _apple_blood_pressure(elem, line, report)
+        # Drop the handled element (and any earlier siblings) from the tree
+        root.clear()
+        if row:
+            yield row
+    yield from _apple_sleep_totals(nights, report)
+
+
+# ---------------------------------------------------------------------------
+# Fitbit
+# ---------------------------------------------------------------------------
+
+# File name prefix in a Fitbit data export (heart_rate-2024-01-01.json) -> our JSON field
+FITBIT_FILES = {
+    'heart_rate': 'heart_rate',
+    'steps': 'steps',
+    'calories': 'calories',
+    'sleep': 'sleep',
+}
+
+
+def fitbit_kind(name):
+    """Our JSON field for a Fitbit export file name, or None"""
+    stem = re.split(r'[-_ ]\d{4}-\d{2}-\d{2}', os.path.basename(name or ''))[0].lower()
+    return FITBIT_FILES.get(stem)
+
+
+def is_fitbit_record(record):
+    return isinstance(record, dict) and (
+        ('dateTime' in record and 'value' in record)
+        or 'minutesAsleep' in record
+        or any(key.startswith('activities-') for key in record)
+    )
+
+
+def iter_fitbit_records(record, kind):
+    """Rewrite one Fitbit record as our JSON records ({timestamp, heart_rate, ...})"""
+    if not isinstance(record, dict):
+        yield record
+        return
+    if 'minutesAsleep' in record:
+        # Sleep log: one night's total at its start time
+        yield {
+            'timestamp': record.get('startTime') or record.get('dateOfSleep'),
+            'sleep': round(record['minutesAsleep'] / 60, 2)
+        }
+        return
+
+    # Web API summaries: {"activities-steps": [{"dateTime": ..., "value": ...}, ...]}
+    summaries = [(key, value) for key, value in record.items() if key.startswith('activities-') and isinstance(value, list)]
+    if summaries:
+        for key, entries in summaries:
+            summary_kind = FITBIT_FILES.get(key[len('activities-'):].replace('heart', 'heart_rate'))
+            for entry in entries:
+                yield from iter_fitbit_records(entry, summary_kind)
+        return
+
+    value = record.get('value')
+    if isinstance(value, dict):
+        # Heart rate: {"bpm": 62, "confidence": 2}; daily summary: {"restingHeartRate": 58}
+        value = value.get('bpm', value.get('restingHeartRate'))
+        kind = kind or 'heart_rate'
+    if kind is None or value is None:
+        return
+    yield {'timestamp': record.get('dateTime'), kind: value}
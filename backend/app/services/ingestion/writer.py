@@ -0,0 +1,55 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models import db, HealthMetric
+
+IMPORT_NOTE = 'Imported from health data file'
+UNIQUE_KEY = ['patient_id', 'metric_type', 'recorded_at']
+
+
+def _insert_statement():
+    """INSERT that skips readings already stored under (patient_id, metric_type, recorded_at)"""
+    table = HealthMetric.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        statement = postgresql.insert(table).on_conflict_do_nothing(index_elements=UNIQUE_KEY)
+    elif dialect == 'sqlite':
+        statement = sqlite.insert(table).on_conflict_do_nothing(index_elements=UNIQUE_KEY)
+    else:
+        return table.insert(), False
+    return statement.returning(table.c.id), True
+
+
+def insert_metrics(patient_id, rows, chunk_size=5000, notes=IMPORT_NOTE, progress=None):
+    """Insert ``(metric_type, value, unit, recorded_at)`` rows as executemany chunks.
+
+    Only one chunk of parameters is held in memory at a time and no ORM
+    objects are created. Readings that already exist for the patient are
+    skipped by the database (ON CONFLICT DO NOTHING), so re-importing an
+    overlapping export only adds the new ones. Runs inside the caller's
+    transaction; returns the number of rows actually inserted.
+    ``progress`` is called with the running total after each chunk.
+    """
+    statement, returning = _insert_statement()
+    total = 0
+    chunk = []
+
+    def flush():
+        result = db.session.execute(statement, chunk)
+        return len(result.all()) if returning else len(chunk)
+
+    for metric_type, value, unit, recorded_at in rows:
+        chunk.append({
+            'patient_id': patient_id,
+            'metric_type': metric_type,
+            'value': value,
+            'unit': unit,
+            'recorded_at': recorded_at,
+            'notes': notes
+        })
+        if len(chunk) >= chunk_size:
+            total += flush()
+            chunk = []
+            if progress:
+                progress(total)
+    if chunk:
+        total += flush()
+    return total
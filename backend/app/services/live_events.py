@@ -0,0 +1,42 @@
+"""Domain events pushed to SSE clients once the surrounding transaction commits"""
+from app.models import db
+from app.services.pubsub import publish_after_commit
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def patient_channel(patient_id):
+    return f'patient:{patient_id}'
+
+
+def publish_notifications(notifications):
+    if not notifications:
+        return
+    db.session.flush()  # assigns ids and created_at
+    for n in notifications:
+        publish_after_commit(user_channel(n.user_id), 'notification', n.to_dict())
+
+
+def publish_appointment(appointment, action):
+    """Send the appointment's new state to both participants"""
+    db.session.flush()
+    data = dict(appointment.to_dict(), action=action)
+    publish_after_commit(user_channel(appointment.patient.user_id), 'appointment', data)
+    publish_after_commit(user_channel(appointment.doctor.user_id), 'appointment', data)
+
+
+def publish_metric(metric):
+    """New vital reading for the patient and every doctor watching them"""
+    db.session.flush()
+    publish_after_commit(patient_channel(metric.patient_id), 'metric', metric.to_dict())
+
+
+def publish_health_data(health_file, records_added):
+    db.session.flush()
+    publish_after_commit(
+        patient_channel(health_file.patient_id),
+        'health_data',
+        dict(health_file.to_dict(), records_added=records_added)
+    )
@@ -0,0 +1,209 @@
+from datetime import datetime, timedelta
+from sqlalchemy import DateTime, String, and_, case, cast, func, literal, null, or_, select, union_all
+from app.models import db, Appointment, Doctor, Notification, PatientDoctorAssignment, PatientDoctorRequest
+from app.services.live_events import publish_notifications
+
+ACCEPTED_REQUEST_DAYS = 7
+
+# Single-reading thresholds, matching the averages flagged by the auto-metrics summary
+METRIC_ALERTS = {
+    'heartbeat': (lambda v: v > 100, 'warning', 'Heart rate elevated: {value} bpm'),
+    'blood_pressure': (lambda v: v > 140, 'warning', 'Systolic pressure elevated: {value} mmHg'),
+    'blood_oxygen': (lambda v: v < 95, 'critical', 'Low blood oxygen: {value}%'),
+}
+
+
+def patient_notifications(patient_id):
+    """Notification list for a patient, built from a single statement.
+
+    One row carries the pending-request and next-24h appointment counts;
+    the remaining rows are requests accepted in the last week, already
+    joined to the doctor's name.
+    """
+    now = datetime.utcnow()
+    pending_requests = select(func.count(PatientDoctorRequest.id)).where(
+        PatientDoctorRequest.patient_id == patient_id,
+        PatientDoctorRequest.status == 'pending'
+    ).scalar_subquery()
+    upcoming = select(func.count(Appointment.id)).where(
+        Appointment.patient_id == patient_id,
+        Appointment.status == 'scheduled',
+        Appointment.appointment_date <= now + timedelta(days=1),
+        Appointment.appointment_date >= now
+    ).scalar_subquery()
+
+    counts = select(
+        literal('counts').label('kind'),
+        pending_requests.label('pending_requests'),
+        upcoming.label('upcoming'),
+        cast(null(), DateTime).label('date'),
+        cast(null(), String).label('doctor_name')
+    )
+    accepted = select(
+        literal('accepted'),
+        null(),
+        null(),
+        PatientDoctorRequest.updated_at,
+        Doctor.full_name
+    ).join(
+        Doctor, Doctor.id == PatientDoctorRequest.doctor_id
+    ).where(
+        PatientDoctorRequest.patient_id == patient_id,
+        PatientDoctorRequest.status == 'accepted',
+        PatientDoctorRequest.updated_at >= now - timedelta(days=ACCEPTED_REQUEST_DAYS)
+    )
+    rows = db.session.execute(union_all(counts, accepted)).all()
+
+    notifications = []
+    for row in rows:
+        if row.kind != 'counts':
+            continue
+        if row.pending_requests:
+            notifications.append({
+                'type': 'pending_request',
+                'message': f'You have {row.pending_requests} pending doctor request(s)',
+                'count': row.pending_requests
+            })
+        if row.upcoming:
+            notifications.append({
+                'type': 'upcoming_appointment',
+                'message': f'You have {row.upcoming} upcoming appointment(s)',
+                'count': row.upcoming
+            })
+    for row in rows:
+        if row.kind == 'accepted':
+            notifications.append({
+                'type': 'request_accepted',
+                'message': f'Dr. {row.doctor_name} accepted your request',
+                'doctor_name': row.doctor_name,
+                'date': row.date.isoformat()
+            })
+    return notifications
+
+
+def doctor_notifications(doctor_id):
+    """Notification list for a doctor from one aggregate over their appointments.
+
+    Pending appointments and those in the next 24 hours are counted with
+    conditional aggregates; pending patient requests ride along as a scalar
+    subquery.
+    """
+    now = datetime.utcnow()
+    tomorrow = now + timedelta(days=1)
+    is_upcoming = and_(
+        Appointment.status.in_(['scheduled', 'approved']),
+        Appointment.appointment_date <= tomorrow,
+        Appointment.appointment_date >= now
+    )
+    pending_requests = select(func.count(PatientDoctorRequest.id)).where(
+        PatientDoctorRequest.doctor_id == doctor_id,
+        PatientDoctorRequest.status == 'pending'
+    ).scalar_subquery()
+
+    row = db.session.execute(
+        select(
+            pending_requests.label('pending_requests'),
+            func.count(case((Appointment.status == 'pending', 1))).label('pending_appointments'),
+            func.count(case((is_upcoming, 1))).label('upcoming')
+        ).select_from(Appointment).where(
+            Appointment.doctor_id == doctor_id,
+            or_(Appointment.status == 'pending', is_upcoming)
+        )
+    ).one()
+
+    notifications = []
+    if row.pending_requests:
+        notifications.append({
+            'type': 'pending_request',
+            'message': f'You have {row.pending_requests} pending patient request(s)',
+            'count': row.pending_requests
+        })
+    if row.pending_appointments:
+        notifications.append({
+            'type': 'pending_appointment',
+            'message': f'You have {row.pending_appointments} appointment request(s) to review',
+            'count': row.pending_appointments
+        })
+    if row.upcoming:
+        notifications.append({
+            'type': 'upcoming_appointment',
+            'message': f'You have {row.upcoming} upcoming appointment(s) in the next 24 hours',
+            'count': row.upcoming
+        })
+    return notifications
+
+
+# ---------------------------------------------------------------------------
+# Persistent inbox
+# ---------------------------------------------------------------------------
+
+def notify(user_ids, type, message, **data):
+    """Queue an inbox entry for each user; it is committed with the caller's transaction"""
+    if isinstance(user_ids, int):
+        user_ids = [user_ids]
+    notifications = [
+        Notification(user_id=user_id, type=type, message=message, data=data or None)
+        for user_id in user_ids if user_id
+    ]
+    db.session.add_all(notifications)
+    publish_notifications(notifications)
+    return notifications
+
+
+def notify_appointment(appointment, event, recipient):
+    """Tell the patient or doctor of an appointment that it was approved/rejected/cancelled"""
+    when = appointment.appointment_date.strftime('%Y-%m-%d %H:%M')
+    if recipient == 'patient':
+        user_id = appointment.patient.user_id
+        messages = {
+            'approved': f'Dr. {appointment.doctor.full_name} approved your appointment on {when}',
+            'rejected': f'Dr. {appointment.doctor.full_name} declined your appointment request for {when}',
+            'cancelled': f'Your appointment with Dr. {appointment.doctor.full_name} on {when} was cancelled'
+        }
+    else:
+        user_id = appointment.doctor.user_id
+        messages = {
+            'cancelled': f'{appointment.patient.full_name} cancelled the appointment on {when}'
+        }
+    return notify(
+        user_id,
+        f'appointment_{event}',
+        messages[event],
+        appointment_id=appointment.id,
+        appointment_date=appointment.appointment_date.isoformat()
+    )
+
+
+def metric_alert(metric_type, value):
+    """(level, message) if a single reading is out of range, else None"""
+    rule = METRIC_ALERTS.get(metric_type)
+    if not rule:
+        return None
+    check, level, template = rule
+    try:
+        # Blood pressure is stored as "systolic/diastolic"
+        number = float(str(value).split('/')[0])
+    except ValueError:
+        return None
+    if not check(number):
+        return None
+    return level, template.format(value=value)
+
+
+def notify_metric_alert(patient, metric):
+    """Alert the patient and their active doctors about an out-of-range reading"""
+    alert = metric_alert(metric.metric_type, metric.value)
+    if not alert:
+        return []
+    level, message = alert
+    doctor_user_ids = [row.user_id for row in db.session.query(Doctor.user_id).join(
+        PatientDoctorAssignment, PatientDoctorAssignment.doctor_id == Doctor.id
+    ).filter(
+        PatientDoctorAssignment.patient_id == patient.id,
+        PatientDoctorAssignment.is_active == True
+    )]
+    data = {'level': level, 'metric_type': metric.metric_type, 'value': metric.value, 'patient_id': patient.id}
+    return (
+        notify(patient.user_id, 'metric_alert', message, **data)
+        + notify(doctor_user_ids, 'metric_alert', f'{patient.full_name}: {message}', **data)
+    )
@@ -0,0 +1,73 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when no hashing slot frees up within the queue timeout"""
+
+
+class PasswordHasher:
+    """Runs password hashing and verification on a bounded worker pool.
+
+    Hashing is deliberately slow, so a burst of logins can otherwise occupy
+    every request thread. At most ``workers`` hashes run at once per process;
+    callers wait up to ``queue_timeout`` seconds for a slot and get
+    ``PasswordHasherBusy`` after that so the endpoint can answer 503 instead
+    of piling up. ``method`` is any Werkzeug method string, e.g.
+    ``scrypt:32768:8:1`` or ``pbkdf2:sha256:600000``.
+    """
+
+    def __init__(self, method='scrypt:32768:8:1', workers=4, queue_timeout=5.0, pool='thread'):
+        self._executor = None
+        self._lock = threading.Lock()
+        self.configure(method, workers, queue_timeout, pool)
+
+    def configure(self, method, workers, queue_timeout, pool='thread'):
+        with self._lock:
+            if self._executor:
+                self._executor.shutdown(wait=False)
+            self.method = method
+            self.workers = workers
+            self.queue_timeout = queue_timeout
+            self.pool = pool
+            self._slots = threading.BoundedSemaphore(workers)
+            self._executor = None
+            self._method_prefix = None
+
+    def _get_executor(self):
+        # Created lazily so gunicorn workers don't inherit a pool from the master
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    executor_class = ProcessPoolExecutor if self.pool == 'process' else ThreadPoolExecutor
+                    self._executor = executor_class(max_workers=self.workers)
+        return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise PasswordHasherBusy('Password hashing is saturated, try again shortly')
+        try:
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    @property
+    def method_prefix(self):
+        """The normalized method string Werkzeug stores in front of the salt"""
+        if self._method_prefix is None:
+            self._method_prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return self._method_prefix
+
+    def needs_rehash(self, pwhash):
+        """True if the stored hash was made with different parameters"""
+        return pwhash.split('$', 1)[0] != self.method_prefix
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,176 @@
+import re
+from sqlalchemy import DDL, event, func, text
+from sqlalchemy.orm import joinedload
+from app.models import db, Patient, HealthMetric
+
+MAX_PER_PAGE = 50
+VITAL_TYPES = ['heartbeat', 'blood_pressure', 'temperature', 'blood_oxygen', 'sugar_level']
+
+# ---------------------------------------------------------------------------
+# SQLite: trigram FTS5 table over name, email and phone so substring matches
+# are served from the index. Email lives on `users`, so it is copied in by the
+# triggers.
+# ---------------------------------------------------------------------------
+
+SQLITE_INDEX_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS patients_fts USING fts5(
+        full_name, email, phone, tokenize='trigram'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS patients_fts_ai AFTER INSERT ON patients BEGIN
+        INSERT INTO patients_fts(rowid, full_name, email, phone)
+        VALUES (new.id, new.full_name, (SELECT email FROM users WHERE id = new.user_id), new.phone);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS patients_fts_ad AFTER DELETE ON patients BEGIN
+        DELETE FROM patients_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS patients_fts_au AFTER UPDATE OF full_name, phone, user_id ON patients BEGIN
+        DELETE FROM patients_fts WHERE rowid = old.id;
+        INSERT INTO patients_fts(rowid, full_name, email, phone)
+        VALUES (new.id, new.full_name, (SELECT email FROM users WHERE id = new.user_id), new.phone);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS patients_fts_email_au AFTER UPDATE OF email ON users BEGIN
+        UPDATE patients_fts SET email = new.email
+        WHERE rowid IN (SELECT id FROM patients WHERE user_id = new.id);
+    END""",
+]
+
+# ---------------------------------------------------------------------------
+# PostgreSQL: trigram GIN indexes make ILIKE '%q%' index-backed
+# ---------------------------------------------------------------------------
+
+POSTGRES_INDEX_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_patients_full_name_trgm ON patients USING gin (full_name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_patients_phone_trgm ON patients USING gin (phone gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_users_email_trgm ON users USING gin (email gin_trgm_ops)",
+]
+
+for statement in SQLITE_INDEX_DDL:
+    event.listen(Patient.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+for statement in POSTGRES_INDEX_DDL:
+    event.listen(Patient.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+
+
+def _scope_join(doctor_id):
+    if doctor_id is None:
+        return '', {}
+    return (
+        "JOIN patient_doctor_assignments a ON a.patient_id = p.id "
+        "AND a.doctor_id = :doctor_id AND a.is_active = :active",
+        {'doctor_id': doctor_id, 'active': True}
+    )
+
+
+def search_patients(query, doctor_id=None, page=1, per_page=20):
+    """Search patients by name, email, phone or id.
+
+    ``doctor_id`` restricts results to that doctor's active patients;
+    ``None`` searches the whole registry. Returns ``(patients, has_more)``
+    with each patient's ``user`` already loaded.
+    """
+    page = max(page, 1)
+    per_page = min(max(per_page, 1), MAX_PER_PAGE)
+    offset = (page - 1) * per_page
+    query = (query or '').strip()
+    if not query:
+        return [], False
+
+    join, params = _scope_join(doctor_id)
+    params.update({'limit': per_page + 1, 'offset': offset})
+    # Longer digit strings can't be an id (and overflow a 64-bit INTEGER bind)
+    params['patient_id'] = int(query) if query.isdigit() and len(query) <= 18 else -1
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        ids = _search_sqlite(query, join, params)
+    elif dialect == 'postgresql':
+        ids = _search_postgres(query, join, params)
+    else:
+        ids = _search_like(query, join, params)
+
+    has_more = len(ids) > per_page
+    ids = ids[:per_page]
+    patients = Patient.query.options(joinedload(Patient.user)).filter(Patient.id.in_(ids)).all() if ids else []
+    by_id = {p.id: p for p in patients}
+    return [by_id[i] for i in ids if i in by_id], has_more
+
+
+def _search_sqlite(query, join, params):
+    # Trigram matching needs at least three characters per term
+    terms = [t.replace('"', '') for t in query.split() if len(t) >= 3]
+    if not terms:
+        params['prefix'] = f'{query}%'
+        rows = db.session.execute(text(f"""
+            SELECT p.id FROM patients p {join}
+            WHERE p.id = :patient_id OR p.full_name LIKE :prefix
+            ORDER BY p.id = :patient_id DESC, p.full_name
+            LIMIT :limit OFFSET :offset
+        """), params)
+        return [row[0] for row in rows]
+
+    params['match'] = ' AND '.join(f'"{t}"' for t in terms)
+    rows = db.session.execute(text(f"""
+        SELECT p.id FROM patients p {join}
+        WHERE p.id = :patient_id
+           OR p.id IN (SELECT rowid FROM patients_fts WHERE patients_fts MATCH :match)
+        ORDER BY p.id = :patient_id DESC, p.full_name
+        LIMIT :limit OFFSET :offset
+    """), params)
+    return [row[0] for row in rows]
+
+
+def _search_postgres(query, join, params):
+    params['like'] = f'%{query}%'
+    params['raw'] = query
+    rows = db.session.execute(text(f"""
+        SELECT p.id FROM patients p
+        JOIN users u ON u.id = p.user_id {join}
+        WHERE p.id = :patient_id
+           OR p.full_name ILIKE :like OR u.email ILIKE :like OR p.phone ILIKE :like
+        ORDER BY p.id = :patient_id DESC, similarity(p.full_name, :raw) DESC, p.id
+        LIMIT :limit OFFSET :offset
+    """), params)
+    return [row[0] for row in rows]
+
+
+def _search_like(query, join, params):
+    params['like'] = f'%{query}%'
+    rows = db.session.execute(text(f"""
+        SELECT p.id FROM patients p
+        JOIN users u ON u.id = p.user_id {join}
+        WHERE p.id = :patient_id
+           OR lower(p.full_name) LIKE lower(:like) OR lower(u.email) LIKE lower(:like)
+           OR p.phone LIKE :like
+        ORDER BY p.full_name
+        LIMIT :limit OFFSET :offset
+    """), params)
+    return [row[0] for row in rows]
+
+
+def latest_vitals(patient_ids, metric_types=VITAL_TYPES):
+    """Latest reading of each vital for every patient, fetched in one query.
+
+    Returns ``{patient_id: {metric_type: HealthMetric}}``.
+    """
+    if not patient_ids:
+        return {}
+
+    ranked = db.session.query(
+        HealthMetric.id,
+        func.row_number().over(
+            partition_by=(HealthMetric.patient_id, HealthMetric.metric_type),
+            order_by=HealthMetric.recorded_at.desc()
+        ).label('rn')
+    ).filter(
+        HealthMetric.patient_id.in_(patient_ids),
+        HealthMetric.metric_type.in_(metric_types)
+    ).subquery()
+
+    metrics = HealthMetric.query.join(
+        ranked, ranked.c.id == HealthMetric.id
+    ).filter(ranked.c.rn == 1).all()
+
+    result = {}
+    for metric in metrics:
+        result.setdefault(metric.patient_id, {})[metric.metric_type] = metric
+    return result
@@ -0,0 +1,200 @@
+import itertools
+import json
+import queue
+import threading
+import time
+from collections import deque
+
+# Per-subscriber buffer; a client that falls this far behind is told to resync
+SUBSCRIBER_QUEUE_SIZE = 100
+LATENCY_SAMPLES = 1000
+
+
+class Subscription:
+    """A live-event consumer (one SSE connection) registered on some channels"""
+
+    def __init__(self, broker, channels):
+        self.broker = broker
+        self.channels = frozenset(channels)
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.lagged = False
+
+    def get(self, timeout):
+        """Next message, or None if nothing arrived within timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LocalBackend:
+    """In-process delivery only; enough for a single gunicorn worker"""
+
+    def __init__(self, deliver):
+        self._deliver = deliver
+
+    def publish(self, channel, payload):
+        self._deliver(channel, payload)
+
+
+class RedisBackend:
+    """Cross-worker delivery over Redis pub/sub (needs the `redis` package).
+
+    Every worker publishes to Redis and runs one listener thread that hands
+    incoming messages to its local subscribers.
+    """
+
+    def __init__(self, deliver, url, prefix='hms'):
+        import redis
+        self._deliver = deliver
+        self._prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.psubscribe(**{f'{prefix}:*': self._on_message})
+        self._thread = self._pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+    def _on_message(self, message):
+        channel = message['channel']
+        if isinstance(channel, bytes):
+            channel = channel.decode()
+        self._deliver(channel[len(self._prefix) + 1:], json.loads(message['data']))
+
+    def publish(self, channel, payload):
+        self._client.publish(f'{self._prefix}:{channel}', json.dumps(payload))
+
+
+class PubSub:
+    """Channel-based fan-out for live events.
+
+    Routes publish after their transaction commits; SSE streams subscribe.
+    The backend is chosen by ``configure``: local by default, Redis when a
+    URL is given, created lazily so no thread starts before gunicorn forks.
+    """
+
+    def __init__(self):
+        self.url = None
+        self._backend = None
+        self._subscribers = {}  # channel -> set of Subscription
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._connections = 0
+        self._published = 0
+        self._delivered = 0
+        self._dropped = 0
+
+    def configure(self, url=None):
+        self.url = url or None
+        self._backend = None
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    if self.url:
+                        self._backend = RedisBackend(self._deliver, self.url)
+                    else:
+                        self._backend = LocalBackend(self._deliver)
+        return self._backend
+
+    def subscribe(self, channels):
+        subscription = Subscription(self, channels)
+        self.backend  # start the listener before the first message can be missed
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+            self._connections += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers and subscription in subscribers:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+            self._connections -= 1
+
+    def publish(self, channel, event, data):
+        payload = {'channel': channel, 'event': event, 'data': data, 'published_at': time.time()}
+        self._published += 1
+        self.backend.publish(channel, payload)
+
+    def _deliver(self, channel, payload):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        if not subscribers:
+            return
+        message = dict(payload, id=next(self._ids))
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(message)
+                self._delivered += 1
+            except queue.Full:
+                subscription.lagged = True
+                self._dropped += 1
+        self._latencies.append((time.time() - payload['published_at']) * 1000)
+
+    def stats(self):
+        latencies = sorted(self._latencies)
+
+        def pct(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))], 3)
+
+        with self._lock:
+            channels = len(self._subscribers)
+        return {
+            'backend': 'redis' if self.url else 'local',
+            'connections': self._connections,
+            'channels': channels,
+            'published': self._published,
+            'delivered': self._delivered,
+            'dropped': self._dropped,
+            'fanout_latency_ms': {'p50': pct(50), 'p95': pct(95), 'p99': pct(99), 'samples': len(latencies)}
+        }
+
+
+pubsub = PubSub()
+
+
+# ---------------------------------------------------------------------------
+# Publish-on-commit: events queued during a request are only sent once the
+# transaction that produced them has committed.
+# ---------------------------------------------------------------------------
+
+def publish_after_commit(channel, event, data):
+    from app.models import db
+    db.session.info.setdefault('pubsub_pending', []).append((channel, event, data))
+
+
+def _flush_pending(session):
+    pending = session.info.pop('pubsub_pending', None)
+    for channel, event, data in pending or ():
+        try:
+            pubsub.publish(channel, event, data)
+        except Exception as e:
+            print(f"⚠️ Live event publish failed: {e}")
+
+
+def _discard_pending(session):
+    session.info.pop('pubsub_pending', None)
+
+
+def install_session_hooks(session):
+    from sqlalchemy import event
+    if not event.contains(session, 'after_commit', _flush_pending):
+        event.listen(session, 'after_commit', _flush_pending)
+        event.listen(session, 'after_rollback', _discard_pending)
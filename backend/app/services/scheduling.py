@@ -0,0 +1,105 @@
+from datetime import datetime, timezone, timedelta
+from sqlalchemy import select
+from app.models import db, Appointment, Doctor
+
+DEFAULT_DURATION_MINUTES = 30
+MIN_DURATION_MINUTES = 5
+# Upper bound on a single appointment. It also bounds how far back the
+# overlap query has to look, which keeps it a short index range scan.
+MAX_DURATION_MINUTES = 240
+
+# Appointments in these states hold their time slot
+BLOCKING_STATUSES = ('pending', 'approved', 'scheduled')
+
+
+def to_naive_utc(value):
+    """Appointment times are stored as naive UTC"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def parse_duration(value):
+    """Validate a requested duration, returning minutes or raising ValueError"""
+    if value is None:
+        return DEFAULT_DURATION_MINUTES
+    minutes = int(value)
+    if not MIN_DURATION_MINUTES <= minutes <= MAX_DURATION_MINUTES:
+        raise ValueError(
+            f'duration_minutes must be between {MIN_DURATION_MINUTES} and {MAX_DURATION_MINUTES}'
+        )
+    return minutes
+
+
+def booked_intervals(doctor_ids, start, end):
+    """Blocking appointments overlapping [start, end) as (doctor_id, start, end, id), ordered by start.
+
+    Uses the (doctor_id, appointment_date) index: an appointment can only
+    overlap the window if it starts less than MAX_DURATION_MINUTES before it.
+    """
+    rows = db.session.execute(
+        select(
+            Appointment.doctor_id,
+            Appointment.appointment_date,
+            Appointment.duration_minutes,
+            Appointment.id
+        ).where(
+            Appointment.doctor_id.in_(doctor_ids),
+            Appointment.status.in_(BLOCKING_STATUSES),
+            Appointment.appointment_date > start - timedelta(minutes=MAX_DURATION_MINUTES),
+            Appointment.appointment_date < end
+        ).order_by(Appointment.doctor_id, Appointment.appointment_date)
+    ).all()
+
+    # Plain tuples and cached timedeltas: this runs over every booking in the range
+    durations = {}
+    intervals = []
+    for doctor_id, apt_start, minutes, apt_id in rows:
+        delta = durations.get(minutes)
+        if delta is None:
+            delta = durations[minutes] = timedelta(minutes=minutes or DEFAULT_DURATION_MINUTES)
+        apt_end = apt_start + delta
+        if apt_end > start:
+            intervals.append((doctor_id, apt_start, apt_end, apt_id))
+    return intervals
+
+
+def _lock_doctor(doctor_id):
+    if db.session.get_bind().dialect.name == 'sqlite':
+        connection = db.session.connection()
+        # pysqlite only opens a transaction at the first write; one that is
+        # already open holds the write lock
+        if not connection.connection.dbapi_connection.in_transaction:
+            connection.exec_driver_sql('BEGIN IMMEDIATE')
+        return
+    db.session.query(Doctor.id).filter(Doctor.id == doctor_id).with_for_update().first()
+
+
+def find_conflict(doctor_id, start, duration_minutes, exclude_id=None):
+    """Return (id, start, end) of a blocking appointment overlapping the slot, or None.
+
+    Takes a write lock first so two concurrent bookings for the same doctor
+    cannot both pass the check and both insert: the doctor row on Postgres,
+    the whole database on SQLite, where pysqlite would otherwise run the
+    check outside any transaction. The lock is held until the caller
+    commits or rolls back.
+    """
+    _lock_doctor(doctor_id)
+
+    end = start + timedelta(minutes=duration_minutes)
+    for _, apt_start, apt_end, apt_id in booked_intervals([doctor_id], start, end):
+        if apt_id != exclude_id:
+            return apt_id, apt_start, apt_end
+    return None
+
+
+def conflict_response(conflict):
+    """JSON body for a 409 caused by an overlapping appointment"""
+    _, start, end = conflict
+    return {
+        'error': 'The doctor already has an appointment at this time',
+        'conflict': {
+            'start': start.isoformat(),
+            'end': end.isoformat()
+        }
+    }
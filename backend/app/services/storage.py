@@ -0,0 +1,157 @@
+import hashlib
+import os
+import tempfile
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models import db, StoredFile
+
+BLOCK_SIZE = 1024 * 1024
+
+Stored = namedtuple('Stored', 'digest path size')
+
+
+class ContentStore:
+    """Uploaded files stored once, under their sha256.
+
+    ``save`` hashes an upload while streaming it to a temp file and then
+    renames it to ``<root>/ab/cd/<digest>``, so the same lab PDF uploaded by
+    a patient and by their doctor is kept once, a half-written file is never
+    visible, and two requests saving the same bytes at once simply both
+    rename identical content into place.
+
+    Each saved file holds one reference in ``stored_files``, counted in the
+    caller's transaction; ``release`` drops one when a MedicalRecord or
+    HealthDataFile goes away. Files are only deleted by ``collect`` once
+    they have had no references for a grace period. Saving takes its
+    reference before moving the file into place and ``collect`` deletes
+    the row and the file before committing, so a save of the same bytes
+    waits on the row (or SQLite's write lock) and always renames its copy
+    in after the delete. Paths outside the store (uploads from before it
+    existed) are deleted directly, as before.
+    """
+
+    def __init__(self, root='uploads/objects'):
+        self.configure(root)
+
+    def configure(self, root):
+        self.root = root
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def digest_of(self, path):
+        """The digest a store path was saved under, or None for a file outside the store"""
+        if not path:
+            return None
+        digest = os.path.basename(path)
+        if len(digest) == 64 and os.path.abspath(path) == os.path.abspath(self.path(digest)):
+            return digest
+        return None
+
+    def save(self, stream):
+        """Store the contents of a binary file-like object; returns ``Stored(digest, path, size)``"""
+        temp_dir = os.path.join(self.root, 'tmp')
+        os.makedirs(temp_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=temp_dir)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for block in iter(lambda: stream.read(BLOCK_SIZE), b''):
+                    digest.update(block)
+                    f.write(block)
+                    size += len(block)
+            return self._add(temp_path, digest.hexdigest(), size)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def save_file(self, temp_path, digest):
+        """Move an already hashed file (e.g. a finished resumable upload) into the store"""
+        return self._add(temp_path, digest, os.path.getsize(temp_path))
+
+    def _add(self, temp_path, digest, size):
+        path = self.path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Reference first: it waits for a collect deleting this digest to commit
+        self._acquire(digest, size)
+        # Same name means same bytes, so replacing an existing copy is harmless
+        os.replace(temp_path, path)
+        return Stored(digest, path, size)
+
+    def _acquire(self, digest, size):
+        table = StoredFile.__table__
+        now = datetime.utcnow()
+        values = {'digest': digest, 'size': size, 'ref_count': 1, 'created_at': now, 'last_used_at': now}
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            insert = (postgresql if dialect == 'postgresql' else sqlite).insert(table).values(values)
+            db.session.execute(insert.on_conflict_do_update(
+                index_elements=['digest'],
+                set_={'ref_count': table.c.ref_count + 1, 'last_used_at': now}
+            ))
+            return
+        result = db.session.execute(
+            update(table).where(table.c.digest == digest).values(ref_count=table.c.ref_count + 1, last_used_at=now)
+        )
+        if result.rowcount == 0:
+            db.session.execute(table.insert().values(values))
+
+    def release(self, path):
+        """Drop one reference to a stored file (in the caller's transaction)"""
+        digest = self.digest_of(path)
+        if digest is None:
+            if path and os.path.exists(path):
+                os.remove(path)
+            return
+        table = StoredFile.__table__
+        db.session.execute(
+            update(table)
+            .where(table.c.digest == digest, table.c.ref_count > 0)
+            .values(ref_count=table.c.ref_count - 1, last_used_at=datetime.utcnow())
+        )
+
+    def collect(self, grace=timedelta(hours=1)):
+        """Delete files without references for longer than ``grace``, and orphaned temp files; returns bytes freed"""
+        cutoff = datetime.utcnow() - grace
+        freed = 0
+        unused = db.session.query(StoredFile.digest, StoredFile.size).filter(
+            StoredFile.ref_count == 0,
+            StoredFile.last_used_at < cutoff
+        ).all()
+        for digest, size in unused:
+            # Re-checked in the DELETE in case the file was referenced again
+            # meanwhile; the file goes while the row is still locked, so a
+            # concurrent save can only put its copy back after the commit
+            deleted = StoredFile.query.filter(
+                StoredFile.digest == digest,
+                StoredFile.ref_count == 0
+            ).delete(synchronize_session=False)
+            if deleted:
+                try:
+                    os.remove(self.path(digest))
+                    freed += size
+                except FileNotFoundError:
+                    pass
+            db.session.commit()
+
+        # Files whose saving transaction was rolled back, and temp files left
+        # by uploads that died mid-write
+        oldest = time.time() - grace.total_seconds()
+        for directory, _, names in os.walk(self.root):
+            in_temp = os.path.normpath(directory) == os.path.normpath(os.path.join(self.root, 'tmp'))
+            for name in names:
+                path = os.path.join(directory, name)
+                if os.path.getmtime(path) >= oldest:
+                    continue
+                if in_temp or (self.digest_of(path) and not db.session.get(StoredFile, name)):
+                    freed += os.path.getsize(path)
+                    os.remove(path)
+        return freed
+
+
+content_store = ContentStore()
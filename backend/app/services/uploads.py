@@ -0,0 +1,206 @@
+import hashlib
+import os
+import secrets
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from app.models import db, UploadSession
+
+BLOCK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """A chunk or completion request that can't be accepted; ``status`` is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+class ResumableUploads:
+    """Large uploads sent as a series of chunks that survive dropped connections.
+
+    ``create`` records an UploadSession and an empty temp file in
+    ``folder``; ``append`` receives one chunk from the request body and
+    adds it to the end of the file under the upload's row lock, only
+    accepting it at the offset the server has (so a client that lost a
+    response asks for the offset and carries on),
+    and ``finish`` checks the size and sha256 and returns the completed
+    file for the regular record/ingestion path to take over.
+
+    The running sha256 is kept in memory per upload, so completing needs no
+    second pass over the file; if the chunks went to different worker
+    processes the file is hashed once at the end instead.
+    """
+
+    def __init__(self, folder='uploads/partial', chunk_size=8 * 1024 * 1024, max_size=2 * 1024 ** 3, ttl_hours=24):
+        self._lock_hashers = threading.Lock()
+        self._hashers = {}  # upload id -> (offset, sha256 of bytes up to offset)
+        self.configure(folder, chunk_size, max_size, ttl_hours)
+
+    def configure(self, folder, chunk_size, max_size, ttl_hours):
+        self.folder = folder
+        self.chunk_size = chunk_size
+        self.max_size = max_size
+        self.ttl = timedelta(hours=ttl_hours)
+
+    def path(self, upload):
+        return os.path.join(self.folder, f'{upload.id}.part')
+
+    def create(self, user_id, patient_id, purpose, filename, size, sha256=None, fields=None):
+        """Start an upload and add its UploadSession to the db session"""
+        if size <= 0:
+            raise UploadError('size must be a positive number of bytes')
+        if size > self.max_size:
+            raise UploadError(f'File is larger than the {self.max_size} byte limit', 413)
+        if sha256 is not None and (len(sha256) != 64 or any(c not in '0123456789abcdef' for c in sha256.lower())):
+            raise UploadError('sha256 must be a hex digest')
+
+        self.purge_expired()
+        upload = UploadSession(
+            id=secrets.token_hex(16),
+            user_id=user_id,
+            patient_id=patient_id,
+            purpose=purpose,
+            filename=filename,
+            size=size,
+            received=0,
+            sha256=sha256.lower() if sha256 else None,
+            fields=fields or {},
+            expires_at=datetime.utcnow() + self.ttl
+        )
+        os.makedirs(self.folder, exist_ok=True)
+        open(self.path(upload), 'wb').close()
+        db.session.add(upload)
+        with self._lock_hashers:
+            self._hashers[upload.id] = (0, hashlib.sha256())
+        return upload
+
+    def append(self, upload, offset, stream, length=None, chunk_sha256=None):
+        """Write one chunk read from ``stream`` at ``offset`` and commit the new offset.
+
+        ``length`` is the chunk size the client declared (Content-Range),
+        checked against what actually arrived. The chunk is first received
+        into its own temp file, so one that is cut off or fails its checksum
+        never touches the upload; it is only appended while holding the
+        upload's lock, after checking the offset is still current.
+        """
+        if upload.expires_at < datetime.utcnow():
+            raise UploadError('Upload has expired', 410)
+        if offset != upload.received:
+            raise UploadError('Chunk does not start at the current offset', 409, upload.received)
+
+        fd, chunk_path = tempfile.mkstemp(dir=self.folder, prefix=f'{upload.id}.', suffix='.chunk')
+        try:
+            written = self._receive(fd, stream, offset, upload.size, length, chunk_sha256)
+
+            upload = self._lock(upload)
+            if offset != upload.received:
+                db.session.rollback()
+                raise UploadError('Chunk does not start at the current offset', 409, upload.received)
+
+            with self._lock_hashers:
+                cached = self._hashers.get(upload.id)
+            hasher = cached[1].copy() if cached and cached[0] == offset else None
+
+            path = self.path(upload)
+            try:
+                with open(path, 'r+b') as f, open(chunk_path, 'rb') as chunk:
+                    f.seek(offset)
+                    for block in iter(lambda: chunk.read(BLOCK_SIZE), b''):
+                        f.write(block)
+                        if hasher:
+                            hasher.update(block)
+                    f.truncate()
+                upload.received = offset + written
+                db.session.commit()
+            except BaseException:
+                # Still holding the lock, so nobody else has written past offset
+                with open(path, 'r+b') as f:
+                    f.truncate(offset)
+                db.session.rollback()
+                raise
+        finally:
+            os.remove(chunk_path)
+
+        with self._lock_hashers:
+            if hasher:
+                self._hashers[upload.id] = (offset + written, hasher)
+            else:
+                self._hashers.pop(upload.id, None)
+        return upload.received
+
+    def _receive(self, fd, stream, offset, size, length, chunk_sha256):
+        """Copy one chunk from ``stream`` into ``fd``; returns its length"""
+        chunk_hasher = hashlib.sha256() if chunk_sha256 else None
+        written = 0
+        with os.fdopen(fd, 'wb') as f:
+            while True:
+                block = stream.read(min(BLOCK_SIZE, self.chunk_size + 1 - written))
+                if not block:
+                    break
+                written += len(block)
+                if written > self.chunk_size or offset + written > size:
+                    raise UploadError('Chunk is larger than allowed', 413)
+                f.write(block)
+                if chunk_hasher:
+                    chunk_hasher.update(block)
+        if written == 0:
+            raise UploadError('Empty chunk')
+        if length is not None and written != length:
+            raise UploadError(f'Expected {length} bytes, received {written}')
+        if chunk_hasher and chunk_hasher.hexdigest() != chunk_sha256.lower():
+            raise UploadError('Chunk checksum mismatch')
+        return written
+
+    @staticmethod
+    def _lock(upload):
+        """Reload the upload holding its row lock (SQLite: the database write lock) until commit"""
+        if db.session.get_bind().dialect.name == 'sqlite':
+            connection = db.session.connection()
+            # pysqlite only opens a transaction at the first write; one that is
+            # already open holds the write lock
+            if not connection.connection.dbapi_connection.in_transaction:
+                connection.exec_driver_sql('BEGIN IMMEDIATE')
+        return UploadSession.query.filter_by(id=upload.id).with_for_update().populate_existing().one()
+
+    def finish(self, upload):
+        """Check a fully received upload; returns ``(path, sha256)`` of the temp file"""
+        if upload.received != upload.size:
+            raise UploadError(f'Upload is incomplete: {upload.received} of {upload.size} bytes received', 409, upload.received)
+
+        path = self.path(upload)
+        if os.path.getsize(path) != upload.size:
+            raise UploadError('Received data does not match the upload size; start a new upload', 409)
+        with self._lock_hashers:
+            cached = self._hashers.get(upload.id)
+        if cached and cached[0] == upload.size:
+            digest = cached[1].hexdigest()
+        else:
+            hasher = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    hasher.update(block)
+            digest = hasher.hexdigest()
+
+        if upload.sha256 and digest != upload.sha256:
+            raise UploadError('File checksum mismatch')
+        return path, digest
+
+    def discard(self, upload):
+        """Delete the temp file and the UploadSession (not committed)"""
+        with self._lock_hashers:
+            self._hashers.pop(upload.id, None)
+        try:
+            os.remove(self.path(upload))
+        except FileNotFoundError:
+            pass
+        db.session.delete(upload)
+
+    def purge_expired(self):
+        for upload in UploadSession.query.filter(UploadSession.expires_at < datetime.utcnow()).all():
+            self.discard(upload)
+
+
+resumable_uploads = ResumableUploads()
@@ -1,5 +1,5 @@
 from functools import wraps
-from flask import jsonify
+from flask import current_app, jsonify
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
 from app.models import User
 
@@ -42,6 +42,25 @@ def role_required(role):
         return decorated
     return decorator
 
+def ops_required(f):
+    """Only accounts listed in OPS_EMAILS"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        try:
+            verify_jwt_in_request()
+            user = User.query.get(int(get_jwt_identity()))
+        except Exception as e:
+            return jsonify({'error': f'Invalid or expired token: {str(e)}'}), 401
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        if user.email.lower() not in current_app.config['OPS_EMAILS']:
+            return jsonify({'error': 'Access denied. Operations access required'}), 403
+        
+        return f(*args, **kwargs)
+    return decorated
+
 def get_current_user():
     """Helper function to get current user from JWT"""
     try:
@@ -0,0 +1,77 @@
+"""Minimal iCalendar (RFC 5545) writer for appointment feeds"""
+
+PRODID = '-//Healthcare Management System//Appointments//EN'
+
+EVENT_STATUS = {
+    'pending': 'TENTATIVE',
+    'approved': 'CONFIRMED',
+    'scheduled': 'CONFIRMED',
+    'completed': 'CONFIRMED',
+    'cancelled': 'CANCELLED',
+    'rejected': 'CANCELLED'
+}
+
+
+def escape_text(value):
+    """Escape a TEXT property value"""
+    return (
+        str(value or '')
+        .replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+
+def format_datetime(value):
+    """Naive UTC datetime -> 20300101T100000Z"""
+    return value.strftime('%Y%m%dT%H%M%SZ')
+
+
+def fold(line):
+    """Fold a content line at 75 octets as required by RFC 5545"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    start, limit = 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # Never split a multi-byte UTF-8 sequence
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode('utf-8'))
+        start, limit = end, 74  # continuation lines start with a space
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def calendar_header(name):
+    return ''.join(fold(line) for line in [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape_text(name)}'
+    ])
+
+
+def calendar_footer():
+    return 'END:VCALENDAR\r\n'
+
+
+def event(uid, start, end, stamp, summary, status, description=None):
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:{uid}',
+        f'DTSTAMP:{format_datetime(stamp)}',
+        f'DTSTART:{format_datetime(start)}',
+        f'DTEND:{format_datetime(end)}',
+        f'SUMMARY:{escape_text(summary)}',
+        f'STATUS:{EVENT_STATUS.get(status, "CONFIRMED")}'
+    ]
+    if description:
+        lines.append(f'DESCRIPTION:{escape_text(description)}')
+    lines.append('END:VEVENT')
+    return ''.join(fold(line) for line in lines)
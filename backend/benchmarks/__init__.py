@@ -0,0 +1,6 @@
+"""
+Benchmark scripts for the Healthcare Management System backend.
+
+Run from the backend directory, e.g. ``python -m benchmarks.login_bench``.
+Each script builds the app against a throwaway SQLite database.
+"""
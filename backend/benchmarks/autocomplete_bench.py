@@ -0,0 +1,56 @@
+"""
+Autocomplete prefix index benchmark.
+
+Builds a PrefixIndex over synthetic doctors and times prefix lookups of
+increasing length, plus in-place updates.
+
+    python -m benchmarks.autocomplete_bench --doctors 100000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from benchmarks.common import percentile
+from benchmarks.doctor_search_bench import FIRST_NAMES, LAST_NAMES, SPECIALIZATIONS
+from app.services.autocomplete import PrefixIndex
+
+QUERIES = ['p', 'pa', 'pat', 'patel', 'car', 'cardiology', 'john sm', 'wei ki', 'neuro lee']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--doctors', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--limit', type=int, default=8)
+    args = parser.parse_args()
+    
+    rng = random.Random(42)
+    index = PrefixIndex()
+    start = time.perf_counter()
+    for i in range(args.doctors):
+        name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+        specialization = rng.choice(SPECIALIZATIONS)
+        rating = round(rng.uniform(3.0, 5.0), 1)
+        index.upsert(i, f'{name} {specialization}', rating, {'id': i, 'full_name': name})
+    print(f"Built index of {len(index)} doctors in {time.perf_counter() - start:.2f}s\n")
+    
+    print(f"{'query':<14}{'p50 us':>10}{'p95 us':>10}{'hits':>6}")
+    for query in QUERIES:
+        timings = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            hits = index.search(query, args.limit)
+            timings.append((time.perf_counter() - t0) * 1e6)
+        print(f"{query:<14}{statistics.median(timings):>10.1f}{percentile(timings, 95):>10.1f}{len(hits):>6}")
+    
+    timings = []
+    for i in range(args.repeat):
+        t0 = time.perf_counter()
+        index.upsert(i, f'Updated Name{i} Cardiology', 4.2, {'id': i})
+        timings.append((time.perf_counter() - t0) * 1e6)
+    print(f"\nupsert p50 {statistics.median(timings):.1f}us, p95 {percentile(timings, 95):.1f}us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Free-slot computation benchmark.
+
+Seeds doctors with a weekday schedule, a few days off and a realistic load
+of booked appointments, then times free-slot computation for a month-long
+range across all of them.
+
+    python -m benchmarks.availability_bench --doctors 300 --days 31
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, time as dtime, timedelta
+
+from benchmarks.common import create_benchmark_app, percentile
+from benchmarks.doctor_search_bench import seed
+from app.models import db, Appointment, DoctorAvailability, DoctorAvailabilityException
+from app.services.availability import free_slots, free_windows
+
+
+def seed_schedules(app, doctors, start, days, bookings_per_day):
+    rng = random.Random(7)
+    with app.app_context():
+        db.session.execute(DoctorAvailability.__table__.insert(), [
+            {'doctor_id': d, 'weekday': w, 'start_time': dtime(9), 'end_time': dtime(17)}
+            for d in range(1, doctors + 1) for w in range(5)
+        ])
+        db.session.execute(DoctorAvailabilityException.__table__.insert(), [
+            {'doctor_id': d, 'date': (start + timedelta(days=rng.randrange(days))).date(), 'is_available': False}
+            for d in range(1, doctors + 1) for _ in range(2)
+        ])
+        rows = []
+        for d in range(1, doctors + 1):
+            for day in range(days):
+                for slot in rng.sample(range(16), bookings_per_day):
+                    rows.append({
+                        'patient_id': 1,
+                        'doctor_id': d,
+                        'appointment_date': start + timedelta(days=day, hours=9, minutes=30 * slot),
+                        'duration_minutes': 30,
+                        'status': 'approved',
+                        'created_at': datetime.utcnow()
+                    })
+        db.session.execute(Appointment.__table__.insert(), rows)
+        db.session.commit()
+        return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--doctors', type=int, default=300)
+    parser.add_argument('--days', type=int, default=31)
+    parser.add_argument('--bookings-per-day', type=int, default=6)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+    
+    app = create_benchmark_app()
+    start = (datetime.utcnow() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    end = start + timedelta(days=args.days)
+    seed(app, args.doctors)
+    booked = seed_schedules(app, args.doctors, start, args.days, args.bookings_per_day)
+    print(f"Seeded {args.doctors} doctors, {booked} appointments over {args.days} days\n")
+    
+    doctor_ids = list(range(1, args.doctors + 1))
+    with app.app_context():
+        for label, fn in [
+            ('one doctor', lambda: free_slots([1], start, end)),
+            ('all doctors (windows)', lambda: free_windows(doctor_ids, start, end)),
+            ('all doctors (slots)', lambda: free_slots(doctor_ids, start, end)),
+        ]:
+            timings = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                result = fn()
+                timings.append((time.perf_counter() - t0) * 1000)
+            total = sum(len(v) for v in result.values())
+            print(f"{label:<24} p50 {statistics.median(timings):8.1f}ms  p95 {percentile(timings, 95):8.1f}ms  ({total} results)")
+
+
+if __name__ == '__main__':
+    main()
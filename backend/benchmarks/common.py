@@ -0,0 +1,60 @@
+import os
+import tempfile
+import threading
+import time
+
+# The OpenAI client is created at import time and refuses to start without a key
+os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+
+from app import create_app
+from app.config import Config
+from app.models import db
+
+
+def create_benchmark_app(db_path=None, **overrides):
+    """Create the app against a temporary SQLite database with all tables created"""
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='hms-bench-'), 'bench.db')
+    
+    settings = {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}', 'TESTING': True}
+    settings.update(overrides)
+    config_class = type('BenchmarkConfig', (Config,), settings)
+    
+    app = create_app(config_class)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_concurrently(fn, count, concurrency):
+    """Call fn(i) for i in range(count) from `concurrency` threads, returning latencies in ms"""
+    latencies = []
+    lock = threading.Lock()
+    counter = iter(range(count))
+    
+    def worker():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            start = time.perf_counter()
+            fn(i)
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+    
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies
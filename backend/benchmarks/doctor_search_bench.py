@@ -0,0 +1,108 @@
+"""
+Doctor search benchmark: legacy ILIKE scan vs. the full-text index.
+
+Seeds a temporary SQLite database with synthetic doctors (100k by default)
+and times a mix of name, specialization, bio and misspelled queries.
+
+    python -m benchmarks.doctor_search_bench --doctors 100000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from benchmarks.common import create_benchmark_app, percentile
+from app.models import db, User, Doctor
+from app.services.doctor_search import search_doctors
+
+FIRST_NAMES = ['James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda', 'David',
+               'Elizabeth', 'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Priya',
+               'Ahmed', 'Wei', 'Sofia', 'Mateo', 'Aisha', 'Kenji', 'Olga', 'Fatima', 'Lucas']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez',
+              'Martinez', 'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor',
+              'Moore', 'Jackson', 'Martin', 'Lee', 'Patel', 'Khan', 'Nguyen', 'Kim', 'Ivanova']
+SPECIALIZATIONS = ['Cardiology', 'Neurology', 'Dermatology', 'Pediatrics', 'Oncology', 'Orthopedics',
+                   'Psychiatry', 'Radiology', 'Endocrinology', 'Gastroenterology', 'Nephrology',
+                   'Ophthalmology', 'Urology', 'Rheumatology', 'Pulmonology', 'General Practice']
+CITIES = ['Boston', 'Chicago', 'Denver', 'Austin', 'Seattle', 'Miami', 'Phoenix', 'Atlanta', 'Portland']
+BIO_WORDS = ['experienced', 'board', 'certified', 'compassionate', 'research', 'minimally', 'invasive',
+             'sports', 'injuries', 'diabetes', 'hypertension', 'sleep', 'disorders', 'telehealth',
+             'multilingual', 'chronic', 'pain', 'management', 'preventive', 'care', 'surgery']
+
+QUERIES = [
+    ('name', 'patel', ''),
+    ('full name', 'priya khan', ''),
+    ('prefix', 'card', ''),
+    ('specialization filter', '', 'neurology'),
+    ('name + specialization', 'lee', 'oncology'),
+    ('bio term', 'telehealth', ''),
+    ('misspelled', 'dermatolgy', ''),
+]
+
+
+def seed(app, count, batch=5000):
+    rng = random.Random(42)
+    with app.app_context():
+        for start in range(0, count, batch):
+            n = min(batch, count - start)
+            db.session.execute(User.__table__.insert(), [
+                {'email': f'doctor{start + i}@bench.local', 'password_hash': 'x', 'role': 'doctor'}
+                for i in range(n)
+            ])
+            db.session.execute(Doctor.__table__.insert(), [
+                {
+                    'user_id': start + i + 1,
+                    'full_name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                    'specialization': rng.choice(SPECIALIZATIONS),
+                    'location': f'{rng.randint(1, 999)} Main St, {rng.choice(CITIES)}',
+                    'qualifications': 'MD, ' + rng.choice(['FACC', 'FACP', 'PhD', 'MPH', 'FRCS']),
+                    'bio': ' '.join(rng.choice(BIO_WORDS) for _ in range(20)),
+                    'rating': round(rng.uniform(3.0, 5.0), 1),
+                }
+                for i in range(n)
+            ])
+            db.session.commit()
+
+
+def legacy_search(query, specialization):
+    doctors_query = Doctor.query
+    if query:
+        doctors_query = doctors_query.filter(Doctor.full_name.ilike(f'%{query}%'))
+    if specialization:
+        doctors_query = doctors_query.filter(Doctor.specialization.ilike(f'%{specialization}%'))
+    return doctors_query.limit(20).all()
+
+
+def time_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+        db.session.expire_all()
+    return timings, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--doctors', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    
+    app = create_benchmark_app()
+    print(f"Seeding {args.doctors} doctors...")
+    start = time.perf_counter()
+    seed(app, args.doctors)
+    print(f"  done in {time.perf_counter() - start:.1f}s\n")
+    
+    print(f"{'query':<24}{'legacy p50':>12}{'legacy hits':>13}{'index p50':>12}{'index p95':>12}{'index hits':>12}")
+    with app.app_context():
+        for label, query, specialization in QUERIES:
+            legacy_times, legacy_rows = time_ms(lambda: legacy_search(query, specialization), args.repeat)
+            index_times, (index_rows, _) = time_ms(lambda: search_doctors(query, specialization), args.repeat)
+            print(f"{label:<24}{statistics.median(legacy_times):>10.2f}ms{len(legacy_rows):>13}"
+                  f"{statistics.median(index_times):>10.2f}ms{percentile(index_times, 95):>10.2f}ms{len(index_rows):>12}")
+
+
+if __name__ == '__main__':
+    main()
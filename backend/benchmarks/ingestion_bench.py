@@ -0,0 +1,229 @@
+"""
+Health data ingestion throughput benchmark.
+
+Generates synthetic CSV / JSON / NDJSON exports and imports each one into a
+fresh temporary SQLite database with every ingestion mode:
+
+    single    process_health_data_file, one transaction for the whole file
+    chunked   ingest() committing after every chunk, as the upload jobs do
+    parallel  ingest_files() with parser processes and a single writer
+
+Each run happens in its own process, so peak RSS is that run's alone (for
+``parallel`` the largest parser process is reported too). Reports rows/s,
+metrics/s, peak RSS and commit latency, and writes the results as JSON so
+runs can be compared across releases with ``--baseline``.
+
+    python -m benchmarks.ingestion_bench --rows 10000 100000 1000000
+    python -m benchmarks.ingestion_bench --rows 5000000 --formats csv --modes chunked parallel
+    python -m benchmarks.ingestion_bench --output after.json --baseline before.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from benchmarks.common import percentile
+
+FORMATS = ('csv', 'json', 'ndjson')
+MODES = ('single', 'chunked', 'parallel')
+METRICS_PER_ROW = 5
+
+# Flag a run as a regression when its rows/s drops by more than this against the baseline
+REGRESSION_THRESHOLD = 0.10
+
+
+def write_export(path, rows, file_format):
+    """Synthetic export with one reading per minute and five metrics per row"""
+    start = datetime(2020, 1, 1)
+    with open(path, 'w', newline='') as f:
+        if file_format == 'csv':
+            f.write('date,heart_rate,steps,sleep_hours,calories,blood_oxygen\n')
+        elif file_format == 'json':
+            f.write('[\n')
+        for i in range(rows):
+            recorded_at = start + timedelta(minutes=i)
+            heart_rate, steps = 60 + i % 40, i % 12000
+            if file_format == 'csv':
+                f.write(f'{recorded_at:%Y-%m-%d %H:%M:%S},{heart_rate},{steps},7,2000,97\n')
+                continue
+            record = json.dumps({
+                'timestamp': f'{recorded_at:%Y-%m-%dT%H:%M:%S}',
+                'heart_rate': heart_rate,
+                'steps': steps,
+                'sleep': 7,
+                'calories': 2000,
+                'spo2': 97
+            })
+            if file_format == 'json':
+                f.write(record + (',\n' if i < rows - 1 else '\n'))
+            else:
+                f.write(record + '\n')
+        if file_format == 'json':
+            f.write(']\n')
+
+
+def _peak_rss_mb(who=resource.RUSAGE_SELF):
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(who).ru_maxrss
+    return round(peak / (2 ** 20 if platform.system() == 'Darwin' else 2 ** 10), 1)
+
+
+def run_case(path, file_format, rows, mode, chunk_size, processes):
+    """Import ``path`` with ``mode`` into a new database; runs in a fresh process"""
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+    from benchmarks.common import create_benchmark_app
+    from app.models import db, User, Patient, HealthMetric
+    from app.services.ingestion import ingest, ingest_files, process_health_data_file
+
+    workdir = tempfile.mkdtemp(prefix='hms-bench-')
+    app = create_benchmark_app(os.path.join(workdir, 'bench.db'), HEALTH_DATA_CHUNK_SIZE=chunk_size)
+    commits = []
+    started = {}
+
+    @event.listens_for(Session, 'before_commit')
+    def before_commit(session):
+        started[id(session)] = time.perf_counter()
+
+    @event.listens_for(Session, 'after_commit')
+    def after_commit(session):
+        start = started.pop(id(session), None)
+        if start is not None:
+            commits.append((time.perf_counter() - start) * 1000)
+
+    with app.app_context():
+        user = User(email='bench@bench.local', password_hash='x', role='patient')
+        db.session.add(user)
+        db.session.flush()
+        patient = Patient(user_id=user.id, full_name='Bench Patient')
+        db.session.add(patient)
+        db.session.commit()
+        patient_id = patient.id
+        commits.clear()
+        baseline_rss = _peak_rss_mb()
+
+        start = time.perf_counter()
+        if mode == 'single':
+            added = process_health_data_file(path, patient_id, file_format, chunk_size)
+        elif mode == 'chunked':
+            added = ingest(path, patient_id, file_format, chunk_size, progress=lambda total: db.session.commit())
+            db.session.commit()
+        else:
+            added, error, _ = ingest_files(
+                [(1, path, file_format, patient_id, None)], chunk_size=chunk_size, processes=processes
+            )[1]
+            if error:
+                raise RuntimeError(error)
+        elapsed = time.perf_counter() - start
+        stored = db.session.query(HealthMetric).count()
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        'format': file_format,
+        'rows': rows,
+        'mode': mode,
+        'chunk_size': chunk_size,
+        'metrics': added,
+        'stored': stored,
+        'seconds': round(elapsed, 3),
+        'rows_per_sec': round(rows / elapsed),
+        'metrics_per_sec': round(added / elapsed),
+        'peak_rss_mb': _peak_rss_mb(),
+        'baseline_rss_mb': baseline_rss,
+        'parser_peak_rss_mb': _peak_rss_mb(resource.RUSAGE_CHILDREN) if mode == 'parallel' else None,
+        'commits': len(commits),
+        'commit_ms': {
+            'p50': round(statistics.median(commits), 2) if commits else None,
+            'p95': round(percentile(commits, 95), 2) if commits else None,
+            'max': round(max(commits), 2) if commits else None,
+        },
+    }
+
+
+def environment():
+    return {
+        'timestamp': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {
+            (r['format'], r['rows'], r['mode']): r for r in json.load(f)['results']
+        }
+    regressions = 0
+    print(f'\nagainst {baseline_path}:')
+    for result in results:
+        before = baseline.get((result['format'], result['rows'], result['mode']))
+        if not before:
+            continue
+        change = result['rows_per_sec'] / before['rows_per_sec'] - 1
+        flag = ''
+        if change < -REGRESSION_THRESHOLD:
+            flag = '  <-- regression'
+            regressions += 1
+        print(f"{result['format']:<7} {result['rows']:>9} {result['mode']:<9} "
+              f"{before['rows_per_sec']:>9} -> {result['rows_per_sec']:>9} rows/s ({change:+.1%}){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=list(FORMATS))
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--processes', type=int, default=None, help='parser processes for the parallel mode')
+    parser.add_argument('--output', default='ingestion_bench.json', help='where to write the JSON results')
+    parser.add_argument('--baseline', help='earlier JSON results to compare rows/s against')
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    datadir = tempfile.mkdtemp(prefix='hms-bench-data-')
+    results = []
+    try:
+        for rows in args.rows:
+            for file_format in args.formats:
+                path = os.path.join(datadir, f'export-{rows}.{file_format}')
+                write_export(path, rows, file_format)
+                size = os.path.getsize(path) / 2 ** 20
+                for mode in args.modes:
+                    # One process per run: a fresh peak RSS and no warm caches carried over
+                    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                        result = executor.submit(
+                            run_case, path, file_format, rows, mode, args.chunk_size, args.processes
+                        ).result()
+                    result['file_mb'] = round(size, 1)
+                    results.append(result)
+                    commit_ms = result['commit_ms']
+                    print(f"{file_format:<7} {rows:>9} rows {mode:<9} {result['seconds']:8.2f}s "
+                          f"{result['rows_per_sec']:>9} rows/s {result['metrics_per_sec']:>9} metrics/s  "
+                          f"rss {result['peak_rss_mb']:7.1f} MB  "
+                          f"{result['commits']:>5} commits p50 {commit_ms['p50']} ms p95 {commit_ms['p95']} ms")
+                os.remove(path)
+    finally:
+        shutil.rmtree(datadir, ignore_errors=True)
+
+    with open(args.output, 'w') as f:
+        json.dump({'environment': environment(), 'settings': vars(args), 'results': results}, f, indent=2)
+    print(f'\nresults written to {args.output}')
+
+    if args.baseline and compare(results, args.baseline):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
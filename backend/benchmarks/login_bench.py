@@ -0,0 +1,102 @@
+"""
+Load benchmark for POST /api/auth/login at different hashing cost settings.
+
+For every method a fresh database is seeded with users whose hashes use that
+method, then a burst of concurrent logins is fired while a second thread
+polls /api/health to show how much the burst slows down other endpoints.
+
+    python -m benchmarks.login_bench --logins 200 --concurrency 16
+"""
+import argparse
+import statistics
+import threading
+import time
+from werkzeug.security import generate_password_hash
+
+from benchmarks.common import create_benchmark_app, percentile, run_concurrently
+from app.models import db, User
+
+DEFAULT_METHODS = [
+    'pbkdf2:sha256:100000',
+    'pbkdf2:sha256:600000',
+    'scrypt:16384:8:1',
+    'scrypt:32768:8:1',
+]
+
+
+def seed_users(app, method, count):
+    # Hash once and share it - seeding thousands of slow hashes would dominate the run
+    pwhash = generate_password_hash('benchmark-password', method)
+    with app.app_context():
+        db.session.bulk_insert_mappings(User, [
+            {'email': f'user{i}@bench.local', 'password_hash': pwhash, 'role': 'patient'}
+            for i in range(count)
+        ])
+        db.session.commit()
+
+
+def bench_method(method, logins, concurrency, workers):
+    app = create_benchmark_app(
+        PASSWORD_HASH_METHOD=method,
+        PASSWORD_HASH_WORKERS=workers,
+        PASSWORD_HASH_QUEUE_TIMEOUT=60
+    )
+    seed_users(app, method, logins)
+    client = app.test_client()
+    
+    statuses = {}
+    health_latencies = []
+    done = threading.Event()
+    
+    def login(i):
+        r = client.post('/api/auth/login', json={
+            'email': f'user{i}@bench.local',
+            'password': 'benchmark-password'
+        })
+        statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+    
+    def poll_health():
+        while not done.is_set():
+            start = time.perf_counter()
+            client.get('/api/health')
+            health_latencies.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.01)
+    
+    poller = threading.Thread(target=poll_health)
+    poller.start()
+    start = time.perf_counter()
+    latencies = run_concurrently(login, logins, concurrency)
+    elapsed = time.perf_counter() - start
+    done.set()
+    poller.join()
+    
+    return {
+        'method': method,
+        'logins_per_sec': round(logins / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies), 1),
+        'p95_ms': round(percentile(latencies, 95), 1),
+        'health_p95_ms': round(percentile(health_latencies, 95), 1),
+        'statuses': statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--methods', nargs='+', default=DEFAULT_METHODS)
+    parser.add_argument('--logins', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=4, help='PASSWORD_HASH_WORKERS')
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print(f"LOGIN BENCHMARK: {args.logins} logins, concurrency {args.concurrency}, {args.workers} hash workers")
+    print("=" * 60)
+    print(f"{'method':<24}{'logins/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'health p95':>12}  statuses")
+    for method in args.methods:
+        result = bench_method(method, args.logins, args.concurrency, args.workers)
+        print(f"{result['method']:<24}{result['logins_per_sec']:>10}{result['p50_ms']:>10}"
+              f"{result['p95_ms']:>10}{result['health_p95_ms']:>12}  {result['statuses']}")
+
+
+if __name__ == '__main__':
+    main()
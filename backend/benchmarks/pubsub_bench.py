@@ -0,0 +1,82 @@
+"""
+Live-event fan-out benchmark.
+
+Opens N subscriptions (one consumer thread each, as SSE streams would),
+spread over doctor-style channel sets, then publishes events and measures
+publish-to-receive latency and the broker's own fan-out statistics.
+
+    python -m benchmarks.pubsub_bench --subscribers 300 --events 2000
+    python -m benchmarks.pubsub_bench --url redis://localhost:6379/0
+"""
+import argparse
+import random
+import statistics
+import threading
+import time
+
+from benchmarks.common import percentile
+from app.services.pubsub import PubSub
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--subscribers', type=int, default=300)
+    parser.add_argument('--patients', type=int, default=3000)
+    parser.add_argument('--patients-per-doctor', type=int, default=20)
+    parser.add_argument('--events', type=int, default=2000)
+    parser.add_argument('--rate', type=float, default=2000, help='events per second')
+    parser.add_argument('--url', default='', help='redis:// URL to benchmark the Redis backend')
+    args = parser.parse_args()
+    
+    broker = PubSub()
+    broker.configure(args.url)
+    rng = random.Random(1)
+    
+    latencies = []
+    lock = threading.Lock()
+    stop = threading.Event()
+    
+    def consume(subscription):
+        with subscription:
+            while not stop.is_set():
+                message = subscription.get(timeout=0.2)
+                if message is not None:
+                    elapsed = (time.time() - message['data']['sent']) * 1000
+                    with lock:
+                        latencies.append(elapsed)
+    
+    threads = []
+    for i in range(args.subscribers):
+        channels = [f'user:{i}'] + [
+            f'patient:{rng.randrange(args.patients)}' for _ in range(args.patients_per_doctor)
+        ]
+        thread = threading.Thread(target=consume, args=(broker.subscribe(channels),), daemon=True)
+        thread.start()
+        threads.append(thread)
+    print(f"{broker.stats()['connections']} subscribers on {broker.stats()['channels']} channels")
+    
+    interval = 1.0 / args.rate
+    start = time.perf_counter()
+    for n in range(args.events):
+        broker.publish(f'patient:{rng.randrange(args.patients)}', 'metric', {'sent': time.time(), 'n': n})
+        target = start + (n + 1) * interval
+        delay = target - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    elapsed = time.perf_counter() - start
+    time.sleep(0.5)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    
+    stats = broker.stats()
+    print(f"published {stats['published']} events in {elapsed:.2f}s, delivered {stats['delivered']}, dropped {stats['dropped']}")
+    print(f"broker fan-out ms: {stats['fanout_latency_ms']}")
+    if latencies:
+        print(f"publish->receive ms: p50 {statistics.median(latencies):.3f}  "
+              f"p95 {percentile(latencies, 95):.3f}  p99 {percentile(latencies, 99):.3f}  max {max(latencies):.3f}")
+    print(f"connections after close: {stats['connections']}")
+
+
+if __name__ == '__main__':
+    main()
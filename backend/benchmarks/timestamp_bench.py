@@ -0,0 +1,83 @@
+"""
+Health data timestamp parsing benchmark.
+
+Writes a CSV export with one date column in the chosen layout and compares
+the old per-row approach (strptime inside try/except, one format after the
+other), per-row format guessing, and parsing with the format detected once
+per file. Also times the full CSV parser over the same file.
+
+    python -m benchmarks.timestamp_bench --rows 1000000 --format iso
+"""
+import argparse
+import csv
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import benchmarks.common  # noqa: F401  (sets a dummy OpenAI key before app imports)
+from app.services.ingestion.parsers import iter_csv
+from app.services.ingestion.timestamps import SAMPLE_SIZE, detect_timestamp_parser, parse_timestamp
+
+LAYOUTS = {
+    'iso': '%Y-%m-%d %H:%M:%S',
+    'iso-t': '%Y-%m-%dT%H:%M:%S',
+    'date': '%Y-%m-%d',
+    'us': '%m/%d/%Y %I:%M:%S %p',
+    'day-first': '%d.%m.%Y %H:%M',
+}
+
+
+def write_export(path, rows, layout):
+    start = datetime(2023, 1, 1)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['date', 'heart_rate', 'steps', 'sleep_hours', 'calories', 'blood_oxygen'])
+        for i in range(rows):
+            writer.writerow([(start + timedelta(minutes=i)).strftime(layout), 60 + i % 40, i % 12000, 7, 2000, 97])
+
+
+def legacy_parse(value):
+    """What the upload route used to do for every row"""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        try:
+            return datetime.strptime(value, '%Y-%m-%d')
+        except ValueError:
+            return None
+
+
+def time_parser(name, parse, values):
+    start = time.perf_counter()
+    parsed = sum(1 for value in values if parse(value) is not None)
+    elapsed = time.perf_counter() - start
+    print(f'{name:<28} {elapsed:7.2f}s  {len(values) / elapsed / 1000:8.0f}k rows/s  {parsed} parsed')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--format', choices=sorted(LAYOUTS), default='iso')
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix='hms-bench-'), 'export.csv')
+    write_export(path, args.rows, LAYOUTS[args.format])
+    print(f'{args.rows} rows, {args.format} dates ({os.path.getsize(path) / 2 ** 20:.0f} MB)\n')
+
+    with open(path, newline='') as f:
+        values = [row[0] for row in csv.reader(f)][1:]
+
+    time_parser('strptime chain (old)', legacy_parse, values)
+    time_parser('guess format per row', parse_timestamp, values)
+    time_parser('detected once per file', detect_timestamp_parser(values[:SAMPLE_SIZE]), values)
+
+    with open(path, newline='') as f:
+        start = time.perf_counter()
+        metrics = sum(1 for _ in iter_csv(f))
+        elapsed = time.perf_counter() - start
+    print(f'\niter_csv: {metrics} metrics in {elapsed:.2f}s ({args.rows / elapsed / 1000:.0f}k rows/s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,7 @@ import random
 from datetime import datetime, timedelta
 from app import create_app, db
 from app.models import Patient, HealthMetric
+from app.services.ingestion import insert_metrics
 
 def generate_realistic_value(metric_type, hour):
     """Generate realistic health metric values based on time of day"""
@@ -94,49 +95,32 @@ def generate_historical_data(patient_id, days=90):
         'sleep_hours'
     ]
     
-    total_added = 0
-    
-    for day in range(days, 0, -1):
-        date = datetime.utcnow() - timedelta(days=day)
-        
-        # Generate metrics at different times: morning, noon, afternoon, evening
-        hours = [7, 10, 13, 16, 19, 22]
-        
-        for hour in hours:
-            timestamp = date.replace(hour=hour, minute=random.randint(0, 59), second=0, microsecond=0)
+    def readings():
+        for day in range(days, 0, -1):
+            date = datetime.utcnow() - timedelta(days=day)
             
-            for metric_type in metric_types:
-                # Skip sleep hours except at 7 AM
-                if metric_type == 'sleep_hours' and hour != 7:
-                    continue
-                
-                value = generate_realistic_value(metric_type, hour)
+            # Generate metrics at different times: morning, noon, afternoon, evening
+            hours = [7, 10, 13, 16, 19, 22]
+            
+            for hour in hours:
+                timestamp = date.replace(hour=hour, minute=random.randint(0, 59), second=0, microsecond=0)
                 
-                if value is not None:
-                    # Check if this exact metric already exists
-                    existing = HealthMetric.query.filter_by(
-                        patient_id=patient_id,
-                        metric_type=metric_type,
-                        recorded_at=timestamp
-                    ).first()
+                for metric_type in metric_types:
+                    # Skip sleep hours except at 7 AM
+                    if metric_type == 'sleep_hours' and hour != 7:
+                        continue
                     
-                    if not existing:
-                        metric = HealthMetric(
-                            patient_id=patient_id,
-                            metric_type=metric_type,
-                            value=str(value),
-                            unit=get_metric_unit(metric_type),
-                            recorded_at=timestamp,
-                            notes='Historical data'
-                        )
-                        db.session.add(metric)
-                        total_added += 1
-        
-        # Commit every 10 days to avoid memory issues
-        if day % 10 == 0:
-            db.session.commit()
-            print(f"  Progress: {days - day}/{days} days completed...")
+                    value = generate_realistic_value(metric_type, hour)
+                    
+                    if value is not None:
+                        yield metric_type, str(value), get_metric_unit(metric_type), timestamp
+            
+            if day % 10 == 0:
+                print(f"  Progress: {days - day}/{days} days generated...")
     
+    # Readings that already exist (same patient, type and timestamp) are
+    # skipped by the database's unique key rather than queried one by one
+    total_added = insert_metrics(patient_id, readings(), notes='Historical data')
     db.session.commit()
     print(f"✅ Added {total_added} historical metrics for patient {patient_id}")
     return total_added
@@ -0,0 +1,34 @@
+"""Add calendar feed token and appointment updated_at
+
+Revision ID: 1c7e94f2d06b
+Revises: d5b71e0c9a23
+Create Date: 2026-10-19 15:05:33.118427
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1c7e94f2d06b'
+down_revision = 'd5b71e0c9a23'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Plain ADD COLUMN and CREATE INDEX: a batch rebuild of users would break
+    # (and drop) the patients_fts triggers that reference it on SQLite
+    op.add_column('users', sa.Column('calendar_token', sa.String(length=64), nullable=True))
+    op.create_index('uq_users_calendar_token', 'users', ['calendar_token'], unique=True)
+    
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
+    
+    op.drop_index('uq_users_calendar_token', table_name='users')
+    op.drop_column('users', 'calendar_token')
@@ -0,0 +1,28 @@
+"""Add health data import error report
+
+Revision ID: 2d94b6e0a7f3
+Revises: e61a4f8d3b07
+Create Date: 2026-10-19 18:36:51.774120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2d94b6e0a7f3'
+down_revision = 'e61a4f8d3b07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('health_data_files', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rejected_records', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('error_report', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('health_data_files', schema=None) as batch_op:
+        batch_op.drop_column('error_report')
+        batch_op.drop_column('rejected_records')
@@ -0,0 +1,70 @@
+"""Add patient search index and health metric lookup index
+
+Revision ID: 4e8b2f913ad7
+Revises: 9c1d4e7a2b60
+Create Date: 2026-10-19 11:03:27.914260
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '4e8b2f913ad7'
+down_revision = '9c1d4e7a2b60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    
+    op.create_index('ix_health_metrics_patient_type_recorded', 'health_metrics',
+                    ['patient_id', 'metric_type', 'recorded_at'], unique=False)
+    
+    if dialect == 'sqlite':
+        op.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS patients_fts USING fts5(
+            full_name, email, phone, tokenize='trigram'
+        )""")
+        op.execute("""CREATE TRIGGER IF NOT EXISTS patients_fts_ai AFTER INSERT ON patients BEGIN
+            INSERT INTO patients_fts(rowid, full_name, email, phone)
+            VALUES (new.id, new.full_name, (SELECT email FROM users WHERE id = new.user_id), new.phone);
+        END""")
+        op.execute("""CREATE TRIGGER IF NOT EXISTS patients_fts_ad AFTER DELETE ON patients BEGIN
+            DELETE FROM patients_fts WHERE rowid = old.id;
+        END""")
+        op.execute("""CREATE TRIGGER IF NOT EXISTS patients_fts_au AFTER UPDATE OF full_name, phone, user_id ON patients BEGIN
+            DELETE FROM patients_fts WHERE rowid = old.id;
+            INSERT INTO patients_fts(rowid, full_name, email, phone)
+            VALUES (new.id, new.full_name, (SELECT email FROM users WHERE id = new.user_id), new.phone);
+        END""")
+        op.execute("""CREATE TRIGGER IF NOT EXISTS patients_fts_email_au AFTER UPDATE OF email ON users BEGIN
+            UPDATE patients_fts SET email = new.email
+            WHERE rowid IN (SELECT id FROM patients WHERE user_id = new.id);
+        END""")
+        # Index the patients that already exist
+        op.execute("""INSERT INTO patients_fts(rowid, full_name, email, phone)
+            SELECT p.id, p.full_name, u.email, p.phone FROM patients p JOIN users u ON u.id = p.user_id""")
+    
+    elif dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE INDEX IF NOT EXISTS ix_patients_full_name_trgm ON patients USING gin (full_name gin_trgm_ops)")
+        op.execute("CREATE INDEX IF NOT EXISTS ix_patients_phone_trgm ON patients USING gin (phone gin_trgm_ops)")
+        op.execute("CREATE INDEX IF NOT EXISTS ix_users_email_trgm ON users USING gin (email gin_trgm_ops)")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    
+    if dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS patients_fts_email_au")
+        op.execute("DROP TRIGGER IF EXISTS patients_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS patients_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS patients_fts_ai")
+        op.execute("DROP TABLE IF EXISTS patients_fts")
+    
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_users_email_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_patients_phone_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_patients_full_name_trgm")
+    
+    op.drop_index('ix_health_metrics_patient_type_recorded', table_name='health_metrics')
@@ -0,0 +1,32 @@
+"""Add health data import job status
+
+Revision ID: 5b2e8c71f9d4
+Revises: a93d5f07e2c8
+Create Date: 2026-10-19 17:12:05.418233
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b2e8c71f9d4'
+down_revision = 'a93d5f07e2c8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('health_data_files', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('status', sa.String(length=20), nullable=False, server_default='completed'))
+        batch_op.add_column(sa.Column('error', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('started_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('completed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('health_data_files', schema=None) as batch_op:
+        batch_op.drop_column('completed_at')
+        batch_op.drop_column('started_at')
+        batch_op.drop_column('error')
+        batch_op.drop_column('status')
@@ -0,0 +1,28 @@
+"""Add appointment duration and per-doctor schedule index
+
+Revision ID: 6a0d3c58e1f4
+Revises: 4e8b2f913ad7
+Create Date: 2026-10-19 13:42:10.381502
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a0d3c58e1f4'
+down_revision = '4e8b2f913ad7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('duration_minutes', sa.Integer(), nullable=False, server_default='30'))
+        batch_op.create_index('ix_appointments_doctor_date', ['doctor_id', 'appointment_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.drop_index('ix_appointments_doctor_date')
+        batch_op.drop_column('duration_minutes')
@@ -0,0 +1,36 @@
+"""Add content-addressed file store
+
+Revision ID: 7d2f9a4c81e5
+Revises: c3a8e5f1b296
+Create Date: 2026-10-19 20:41:13.582604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2f9a4c81e5'
+down_revision = 'c3a8e5f1b296'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stored_files',
+    sa.Column('digest', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('last_used_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('digest')
+    )
+    with op.batch_alter_table('medical_records', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('medical_records', schema=None) as batch_op:
+        batch_op.drop_column('content_hash')
+
+    op.drop_table('stored_files')
@@ -0,0 +1,27 @@
+"""Add participant/status/date indexes on appointments
+
+Revision ID: 8f3a6d2b4c19
+Revises: 1c7e94f2d06b
+Create Date: 2026-10-19 15:48:02.530116
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8f3a6d2b4c19'
+down_revision = '1c7e94f2d06b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_appointments_doctor_status_date', 'appointments',
+                    ['doctor_id', 'status', 'appointment_date'], unique=False)
+    op.create_index('ix_appointments_patient_status_date', 'appointments',
+                    ['patient_id', 'status', 'appointment_date'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_appointments_patient_status_date', table_name='appointments')
+    op.drop_index('ix_appointments_doctor_status_date', table_name='appointments')
@@ -0,0 +1,73 @@
+"""Add full-text search index for doctors
+
+Revision ID: 9c1d4e7a2b60
+Revises: 3f82cdaea5d8
+Create Date: 2026-10-19 09:12:41.508113
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9c1d4e7a2b60'
+down_revision = '3f82cdaea5d8'
+branch_labels = None
+depends_on = None
+
+COLUMNS = 'full_name, specialization, location, qualifications, bio'
+NEW_VALUES = 'new.full_name, new.specialization, new.location, new.qualifications, new.bio'
+OLD_VALUES = 'old.full_name, old.specialization, old.location, old.qualifications, old.bio'
+
+POSTGRES_TSVECTOR = (
+    "setweight(to_tsvector('simple', coalesce(full_name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(specialization, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(location, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(qualifications, '')), 'C') || "
+    "setweight(to_tsvector('simple', coalesce(bio, '')), 'D')"
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    
+    if dialect == 'sqlite':
+        op.execute(f"""CREATE VIRTUAL TABLE IF NOT EXISTS doctors_fts USING fts5(
+            {COLUMNS},
+            content='doctors', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )""")
+        op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS doctors_fts_vocab USING fts5vocab(doctors_fts, 'row')")
+        op.execute(f"""CREATE TRIGGER IF NOT EXISTS doctors_fts_ai AFTER INSERT ON doctors BEGIN
+            INSERT INTO doctors_fts(rowid, {COLUMNS}) VALUES (new.id, {NEW_VALUES});
+        END""")
+        op.execute(f"""CREATE TRIGGER IF NOT EXISTS doctors_fts_ad AFTER DELETE ON doctors BEGIN
+            INSERT INTO doctors_fts(doctors_fts, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD_VALUES});
+        END""")
+        op.execute(f"""CREATE TRIGGER IF NOT EXISTS doctors_fts_au AFTER UPDATE ON doctors BEGIN
+            INSERT INTO doctors_fts(doctors_fts, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD_VALUES});
+            INSERT INTO doctors_fts(rowid, {COLUMNS}) VALUES (new.id, {NEW_VALUES});
+        END""")
+        # Index the doctors that already exist
+        op.execute("INSERT INTO doctors_fts(doctors_fts) VALUES ('rebuild')")
+    
+    elif dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute(f"CREATE INDEX IF NOT EXISTS ix_doctors_search_tsv ON doctors USING gin (({POSTGRES_TSVECTOR}))")
+        op.execute("CREATE INDEX IF NOT EXISTS ix_doctors_full_name_trgm ON doctors USING gin (full_name gin_trgm_ops)")
+        op.execute("CREATE INDEX IF NOT EXISTS ix_doctors_specialization_trgm ON doctors USING gin (specialization gin_trgm_ops)")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    
+    if dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS doctors_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS doctors_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS doctors_fts_ai")
+        op.execute("DROP TABLE IF EXISTS doctors_fts_vocab")
+        op.execute("DROP TABLE IF EXISTS doctors_fts")
+    
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_doctors_specialization_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_doctors_full_name_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_doctors_search_tsv")
@@ -0,0 +1,25 @@
+"""Add doctor access version
+
+Revision ID: a6e1c3d9f5b2
+Revises: f4b7c2e9d813
+Create Date: 2026-10-19 22:14:06.530917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6e1c3d9f5b2'
+down_revision = 'f4b7c2e9d813'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Plain ADD COLUMN: a batch rebuild of doctors would drop its doctors_fts triggers
+    op.add_column('doctors', sa.Column('access_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    op.drop_column('doctors', 'access_version')
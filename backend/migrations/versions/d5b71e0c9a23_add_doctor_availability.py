@@ -0,0 +1,51 @@
+"""Add structured doctor availability
+
+Revision ID: d5b71e0c9a23
+Revises: 6a0d3c58e1f4
+Create Date: 2026-10-19 14:20:51.602938
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5b71e0c9a23'
+down_revision = '6a0d3c58e1f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('doctor_availability',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('doctor_id', sa.Integer(), nullable=False),
+    sa.Column('weekday', sa.Integer(), nullable=False),
+    sa.Column('start_time', sa.Time(), nullable=False),
+    sa.Column('end_time', sa.Time(), nullable=False),
+    sa.ForeignKeyConstraint(['doctor_id'], ['doctors.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_doctor_availability_doctor_weekday', 'doctor_availability',
+                    ['doctor_id', 'weekday'], unique=False)
+    
+    op.create_table('doctor_availability_exceptions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('doctor_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('start_time', sa.Time(), nullable=True),
+    sa.Column('end_time', sa.Time(), nullable=True),
+    sa.Column('is_available', sa.Boolean(), nullable=False),
+    sa.Column('reason', sa.String(length=255), nullable=True),
+    sa.ForeignKeyConstraint(['doctor_id'], ['doctors.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_doctor_availability_exceptions_doctor_date', 'doctor_availability_exceptions',
+                    ['doctor_id', 'date'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_doctor_availability_exceptions_doctor_date', table_name='doctor_availability_exceptions')
+    op.drop_table('doctor_availability_exceptions')
+    op.drop_index('ix_doctor_availability_doctor_weekday', table_name='doctor_availability')
+    op.drop_table('doctor_availability')
@@ -0,0 +1,46 @@
+"""Unique health metric readings and health data file content hash
+
+Revision ID: e61a4f8d3b07
+Revises: 5b2e8c71f9d4
+Create Date: 2026-10-19 17:48:22.901374
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e61a4f8d3b07'
+down_revision = '5b2e8c71f9d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep the first copy of every duplicated reading before adding the unique index
+    op.execute("""
+        DELETE FROM health_metrics
+        WHERE recorded_at IS NOT NULL
+          AND id NOT IN (
+              SELECT MIN(id) FROM health_metrics
+              WHERE recorded_at IS NOT NULL
+              GROUP BY patient_id, metric_type, recorded_at
+          )
+    """)
+    op.drop_index('ix_health_metrics_patient_type_recorded', table_name='health_metrics')
+    op.create_index('uq_health_metrics_patient_type_recorded', 'health_metrics',
+                    ['patient_id', 'metric_type', 'recorded_at'], unique=True)
+
+    with op.batch_alter_table('health_data_files', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index('ix_health_data_files_patient_hash', ['patient_id', 'content_hash'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('health_data_files', schema=None) as batch_op:
+        batch_op.drop_index('ix_health_data_files_patient_hash')
+        batch_op.drop_column('content_hash')
+
+    op.drop_index('uq_health_metrics_patient_type_recorded', table_name='health_metrics')
+    op.create_index('ix_health_metrics_patient_type_recorded', 'health_metrics',
+                    ['patient_id', 'metric_type', 'recorded_at'], unique=False)
@@ -0,0 +1,26 @@
+"""Add medical record file name
+
+Revision ID: f4b7c2e9d813
+Revises: 7d2f9a4c81e5
+Create Date: 2026-10-19 21:27:40.118352
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4b7c2e9d813'
+down_revision = '7d2f9a4c81e5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('medical_records', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('filename', sa.String(length=255), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('medical_records', schema=None) as batch_op:
+        batch_op.drop_column('filename')
@@ -6,5 +6,9 @@ pip install -r requirements.txt
 # Run database migrations
 python -c "from app import create_app, db; app = create_app(); app.app_context().push(); db.create_all()"
 
-# Start gunicorn
-gunicorn --bind=0.0.0.0:8000 --timeout 600 run:app
\ No newline at end of file
+# Start gunicorn (threaded workers so slow logins, which are capped by
+# PASSWORD_HASH_WORKERS, don't block the other endpoints). Each open SSE
+# stream (/api/events/stream) holds a thread, so keep --threads comfortably
+# above SSE_MAX_CONNECTIONS. Health data uploads are imported in the
+# background, so no request needs the old 600s timeout.
+gunicorn --bind=0.0.0.0:8000 --timeout 120 --worker-class gthread --threads 256 run:app
\ No newline at end of file
@@ -0,0 +1,43 @@
+import os
+
+# app.utils.ai_helper builds its OpenAI client at import time
+os.environ.setdefault('OPENAI_API_KEY', 'test')
+
+import pytest
+from app import create_app
+from app.config import Config
+from app.models import db
+from app.services.access import patient_access
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+    # Every test's database starts again from doctor id 1, version 0
+    patient_access.invalidate()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def signup(client):
+    """Create an account through the API; returns its Authorization header"""
+    def signup(email, role, **fields):
+        fields.setdefault('full_name', email.split('@')[0])
+        response = client.post('/api/auth/signup', json=dict(email=email, password='secret', role=role, **fields))
+        assert response.status_code == 201, response.get_json()
+        return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+    return signup
@@ -0,0 +1,54 @@
+from sqlalchemy import event
+
+from app.models import db, User, Doctor, Patient, PatientDoctorAssignment
+from app.services.access import PatientAccessCache
+
+
+def _seed():
+    users = [User(email=f'{role}@test.local', password_hash='x', role=role) for role in ('doctor', 'patient')]
+    db.session.add_all(users)
+    db.session.flush()
+    doctor = Doctor(user_id=users[0].id, full_name='Doc Test')
+    patient = Patient(user_id=users[1].id, full_name='Pat Test')
+    db.session.add_all([doctor, patient])
+    db.session.flush()
+    assignment = PatientDoctorAssignment(doctor_id=doctor.id, patient_id=patient.id)
+    db.session.add(assignment)
+    db.session.commit()
+    return doctor.id, patient.id, assignment
+
+
+def test_revocation_reaches_other_workers(app):
+    doctor_id, patient_id, assignment = _seed()
+    # Two workers, each with its own cache
+    this_worker, other_worker = PatientAccessCache(), PatientAccessCache()
+    assert other_worker.has_access(doctor_id, patient_id)
+
+    this_worker.changed([doctor_id])
+    db.session.delete(assignment)
+    db.session.commit()
+
+    assert not this_worker.has_access(doctor_id, patient_id)
+    assert not other_worker.has_access(doctor_id, patient_id)
+
+
+def test_cached_while_unchanged(app):
+    doctor_id, patient_id, _ = _seed()
+    cache = PatientAccessCache()
+    assert cache.has_access(doctor_id, patient_id)
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        assert cache.has_access(doctor_id, patient_id)
+        assert not cache.has_access(doctor_id, patient_id + 1)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    # Only the version checks, no reload of the assignments
+    assert len(statements) == 2
+    assert not any('patient_doctor_assignments' in statement for statement in statements)
@@ -0,0 +1,30 @@
+from collections import namedtuple
+from datetime import date, datetime, time
+from itertools import permutations
+
+from app.services.availability import _working_hours
+
+Rule = namedtuple('Rule', 'weekday start_time end_time')
+Exception_ = namedtuple('Exception_', 'date start_time end_time is_available')
+
+MONDAY = date(2030, 1, 7)
+
+
+def test_exceptions_apply_in_a_fixed_order():
+    rules = [Rule(0, time(9), time(17))]
+    exceptions = [
+        Exception_(MONDAY, None, None, False),           # day off
+        Exception_(MONDAY, time(18), time(20), True),    # extra evening hours
+        Exception_(MONDAY, time(19), time(19, 30), False),
+    ]
+    expected = [
+        (datetime(2030, 1, 7, 18), datetime(2030, 1, 7, 19)),
+        (datetime(2030, 1, 7, 19, 30), datetime(2030, 1, 7, 20)),
+    ]
+    for order in permutations(exceptions):
+        assert _working_hours(rules, order, MONDAY, MONDAY) == expected
+
+
+def test_weekly_hours_without_exceptions():
+    rules = [Rule(0, time(9), time(12)), Rule(0, time(11), time(17))]
+    assert _working_hours(rules, [], MONDAY, MONDAY) == [(datetime(2030, 1, 7, 9), datetime(2030, 1, 7, 17))]
@@ -0,0 +1,22 @@
+from flask_jwt_extended import create_refresh_token
+
+from app.models import User
+
+
+def test_stream_rejects_non_access_tokens(client, signup):
+    signup('patient@test.local', 'patient')
+    refresh = create_refresh_token(identity=str(User.query.one().id))
+
+    response = client.get(f'/api/events/stream?token={refresh}')
+    assert response.status_code == 401
+
+
+def test_stats_are_for_ops_accounts_only(app, client, signup):
+    patient = signup('patient@test.local', 'patient')
+    ops = signup('ops@test.local', 'doctor', full_name='Ops Doctor', specialization='GP')
+    app.config['OPS_EMAILS'] = ['ops@test.local']
+
+    assert client.get('/api/events/stats', headers=patient).status_code == 403
+    response = client.get('/api/events/stats', headers=ops)
+    assert response.status_code == 200
+    assert 'connections' in response.get_json()
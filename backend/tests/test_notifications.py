@@ -0,0 +1,77 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app.models import db, User, Doctor, Patient, Appointment, PatientDoctorRequest
+from app.services.notifications import patient_notifications, doctor_notifications
+
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def _add_user(email, role):
+    user = User(email=email, password_hash='x', role=role)
+    db.session.add(user)
+    db.session.flush()
+    return user
+
+
+def _seed():
+    now = datetime.utcnow()
+    patient = Patient(user_id=_add_user('patient@test.local', 'patient').id, full_name='Pat Test')
+    doctors = [
+        Doctor(user_id=_add_user(f'doctor{i}@test.local', 'doctor').id, full_name=f'Doc {i}')
+        for i in range(3)
+    ]
+    db.session.add_all([patient, *doctors])
+    db.session.flush()
+
+    db.session.add_all([
+        PatientDoctorRequest(patient_id=patient.id, doctor_id=doctors[0].id, status='pending'),
+        PatientDoctorRequest(patient_id=patient.id, doctor_id=doctors[1].id, status='accepted', updated_at=now),
+        PatientDoctorRequest(patient_id=patient.id, doctor_id=doctors[2].id, status='accepted', updated_at=now),
+        Appointment(patient_id=patient.id, doctor_id=doctors[0].id, status='pending',
+                    appointment_date=now + timedelta(days=3)),
+        Appointment(patient_id=patient.id, doctor_id=doctors[0].id, status='scheduled',
+                    appointment_date=now + timedelta(hours=2)),
+    ])
+    db.session.commit()
+    return patient.id, doctors[0].id
+
+
+def test_patient_notifications_is_one_statement(app):
+    patient_id, _ = _seed()
+
+    with count_statements() as statements:
+        notifications = patient_notifications(patient_id)
+
+    assert len(statements) == 1
+    types = [n['type'] for n in notifications]
+    assert types.count('pending_request') == 1
+    assert types.count('upcoming_appointment') == 1
+    # One per accepted request, without a lazy load of each doctor
+    assert sorted(n['doctor_name'] for n in notifications if n['type'] == 'request_accepted') == ['Doc 1', 'Doc 2']
+
+
+def test_doctor_notifications_is_one_statement(app):
+    _, doctor_id = _seed()
+
+    with count_statements() as statements:
+        notifications = doctor_notifications(doctor_id)
+
+    assert len(statements) == 1
+    counts = {n['type']: n['count'] for n in notifications}
+    assert counts == {'pending_request': 1, 'pending_appointment': 1, 'upcoming_appointment': 1}
@@ -0,0 +1,48 @@
+from app.models import db, Patient, Doctor, HealthMetric, PatientDoctorAssignment
+from app.services.access import patient_access
+
+
+def _setup(signup):
+    doctor_header = signup('doctor@test.local', 'doctor', full_name='Doc Test', specialization='GP')
+    signup('pam.assigned@test.local', 'patient', full_name='Pam Assigned')
+    signup('pam.other@test.local', 'patient', full_name='Pam Other')
+    doctor = Doctor.query.one()
+    assigned, other = Patient.query.order_by(Patient.id).all()
+    patient_access.changed([doctor.id])
+    db.session.add(PatientDoctorAssignment(doctor_id=doctor.id, patient_id=assigned.id))
+    for patient in (assigned, other):
+        db.session.add(HealthMetric(patient_id=patient.id, metric_type='heartbeat', value='130', unit='bpm'))
+    db.session.commit()
+    return doctor_header, assigned.id, other.id
+
+
+def test_vitals_and_email_only_for_assigned_patients(client, signup):
+    headers, assigned_id, other_id = _setup(signup)
+
+    response = client.get('/api/doctor/search-patients?q=Pam', headers=headers)
+    assert response.status_code == 200
+    patients = {p['id']: p for p in response.get_json()['patients']}
+    assert set(patients) == {assigned_id, other_id}
+
+    assert patients[assigned_id]['email'] == 'pam.assigned@test.local'
+    assert patients[assigned_id]['latest_vitals']['heartbeat']['value'] == '130'
+    assert patients[other_id]['email'] is None
+    assert patients[other_id]['latest_vitals'] is None
+
+
+def test_assigned_scope(client, signup):
+    headers, assigned_id, _ = _setup(signup)
+
+    response = client.get('/api/doctor/search-patients?q=Pam&scope=assigned', headers=headers)
+    assert [p['id'] for p in response.get_json()['patients']] == [assigned_id]
+
+
+def test_search_by_id(client, signup):
+    headers, assigned_id, _ = _setup(signup)
+
+    response = client.get(f'/api/doctor/search-patients?q={assigned_id}', headers=headers)
+    assert [p['id'] for p in response.get_json()['patients']] == [assigned_id]
+
+    response = client.get('/api/doctor/search-patients?q=99999999999999999999999', headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['patients'] == []
@@ -0,0 +1,114 @@
+import hashlib
+import io
+import os
+
+import pytest
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models import db, Doctor, Patient, MedicalRecord, PatientDoctorAssignment
+from app.services.access import patient_access
+from app.services.storage import content_store
+from app.services.uploads import resumable_uploads, UploadError
+
+
+@pytest.fixture
+def upload_folder(app, tmp_path):
+    folder = str(tmp_path / 'partial')
+    resumable_uploads.configure(folder, chunk_size=8, max_size=1024, ttl_hours=1)
+    content_store.configure(str(tmp_path / 'objects'))
+    yield folder
+    content_store.configure(os.path.join(app.config['UPLOAD_FOLDER'], 'objects'))
+    resumable_uploads.configure(
+        os.path.join(app.config['UPLOAD_FOLDER'], 'partial'),
+        app.config['UPLOAD_CHUNK_SIZE'],
+        app.config['UPLOAD_MAX_SIZE'],
+        app.config['UPLOAD_SESSION_TTL_HOURS']
+    )
+
+
+def test_stale_chunk_leaves_committed_bytes_alone(app, signup, upload_folder):
+    signup('patient@test.local', 'patient')
+    patient = Patient.query.one()
+    data = b'0123456789abcdef'
+    upload = resumable_uploads.create(patient.user_id, patient.id, 'health_data', 'a.csv', len(data))
+    db.session.commit()
+    resumable_uploads.append(upload, 0, io.BytesIO(data[:8]))
+
+    # A stalled request that read the upload before the first chunk landed
+    set_committed_value(upload, 'received', 0)
+    with pytest.raises(UploadError) as error:
+        resumable_uploads.append(upload, 0, io.BytesIO(b'XXXXXXXX'))
+    assert error.value.status == 409
+    assert error.value.offset == 8
+
+    resumable_uploads.append(upload, 8, io.BytesIO(data[8:]))
+    path, digest = resumable_uploads.finish(upload)
+    with open(path, 'rb') as f:
+        assert f.read() == data
+    assert digest == hashlib.sha256(data).hexdigest()
+    assert [name for name in os.listdir(upload_folder) if name.endswith('.chunk')] == []
+
+
+def _put(client, headers, upload_id, data, start, size):
+    return client.put(
+        f'/api/uploads/{upload_id}',
+        data=data,
+        headers={**headers, 'Content-Range': f'bytes {start}-{start + len(data) - 1}/{size}'}
+    )
+
+
+def test_resume_after_conflict_and_complete(client, signup, upload_folder):
+    headers = signup('patient@test.local', 'patient')
+    data = b'%PDF-1.4 ' + b'x' * 11
+    response = client.post('/api/uploads', json={
+        'purpose': 'medical_record', 'filename': 'report.pdf', 'size': len(data),
+        'sha256': hashlib.sha256(data).hexdigest(), 'title': 'Lab report'
+    }, headers=headers)
+    assert response.status_code == 201
+    upload_id = response.get_json()['upload_id']
+
+    assert _put(client, headers, upload_id, data[:8], 0, len(data)).status_code == 200
+    # The client lost that response and sends the chunk again
+    response = _put(client, headers, upload_id, data[:8], 0, len(data))
+    assert response.status_code == 409
+    assert response.get_json()['offset'] == 8
+
+    offset = client.get(f'/api/uploads/{upload_id}', headers=headers).get_json()['offset']
+    while offset < len(data):
+        response = _put(client, headers, upload_id, data[offset:offset + 8], offset, len(data))
+        assert response.status_code == 200
+        offset = response.get_json()['offset']
+
+    response = client.post(f'/api/uploads/{upload_id}/complete', headers=headers)
+    assert response.status_code == 201
+    record = db.session.get(MedicalRecord, response.get_json()['record']['id'])
+    assert record.title == 'Lab report'
+    with open(record.file_path, 'rb') as f:
+        assert f.read() == data
+    assert os.listdir(upload_folder) == []
+
+
+def test_complete_rechecks_doctor_access(client, signup, upload_folder):
+    headers = signup('doctor@test.local', 'doctor', full_name='Doc Test', specialization='GP')
+    signup('patient@test.local', 'patient')
+    doctor, patient = Doctor.query.one(), Patient.query.one()
+    assignment = PatientDoctorAssignment(doctor_id=doctor.id, patient_id=patient.id)
+    db.session.add(assignment)
+    db.session.commit()
+
+    data = b'%PDF-1.4 scan'
+    response = client.post('/api/uploads', json={
+        'purpose': 'medical_record', 'filename': 'scan.pdf', 'size': len(data), 'patient_id': patient.id
+    }, headers=headers)
+    assert response.status_code == 201
+    upload_id = response.get_json()['upload_id']
+    assert _put(client, headers, upload_id, data[:8], 0, len(data)).status_code == 200
+    assert _put(client, headers, upload_id, data[8:], 8, len(data)).status_code == 200
+
+    patient_access.changed([doctor.id])
+    db.session.delete(assignment)
+    db.session.commit()
+
+    response = client.post(f'/api/uploads/{upload_id}/complete', headers=headers)
+    assert response.status_code == 403
+    assert MedicalRecord.query.count() == 0
@@ -279,8 +279,25 @@ const handleBookAppointmentFromProfile = (doctorId) => {
     const response = await patientAPI.uploadHealthData(formData);
     console.log('✅ Upload response:', response.data);
     
-    alert(`Health data uploaded successfully! 
-Generated ${response.data.records_added} metrics from your file.`);
+    // The file is imported in the background; poll until the job finishes
+    let job = response.data.file;
+    while (job.status === 'queued' || job.status === 'processing') {
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+      job = (await patientAPI.getHealthDataJob(response.data.job_id)).data.job;
+      console.log('⏳ Import progress:', job.status, job.records_processed);
+    }
+    
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Failed to process file');
+    }
+    
+    if (response.data.duplicate) {
+      alert(`This file was already uploaded on ${new Date(job.uploaded_at).toLocaleDateString()}.`);
+    } else {
+      alert(`Health data uploaded successfully! 
+Generated ${job.total_records} metrics from your file.${job.rejected_records ? `
+${job.rejected_records} invalid values were skipped.` : ''}`);
+    }
     
     // Reload dashboard to show new file
     console.log('🔄 Reloading dashboard...');
@@ -1041,14 +1058,14 @@ Generated ${response.data.records_added} metrics from your file.`);
                         </span>
                         <input
                           type="file"
-                          accept=".csv,.json,.txt"
+                          accept=".csv,.json,.ndjson,.txt,.xml,.gz,.zip"
                           onChange={handleFileUpload}
                           className="hidden"
                           disabled={uploadingFile}
                         />
                       </label>
                       <p className="text-xs text-gray-500 mt-3">
-                        CSV, JSON, TXT
+                        CSV, JSON, NDJSON, TXT, Apple Health XML (optionally .gz) or a ZIP export
                       </p>
                       <p className="text-xs text-gray-400 mt-1">
                         Auto-generates metrics
@@ -71,6 +71,11 @@ export const patientAPI = {
   uploadMedicalRecord: (formData) => api.post('/patient/medical-records', formData, {
     headers: { 'Content-Type': 'multipart/form-data' },
   }),
+  downloadMedicalRecord: (recordId, inline = false) =>
+    api.get(`/patient/medical-records/${recordId}/download`, {
+      params: inline ? { inline: true } : {},
+      responseType: 'blob'
+    }),
   
   // Doctors
   getAssignedDoctors: () => api.get('/patient/doctors'),
@@ -93,6 +98,7 @@ export const patientAPI = {
     headers: { 'Content-Type': 'multipart/form-data' },
   }),
   getHealthDataFiles: () => api.get('/patient/health-data-files'),
+  getHealthDataJob: (jobId) => api.get(`/patient/health-data-jobs/${jobId}`),
   
   // Appointments
   getAppointments: () => api.get('/patient/appointments'),
@@ -133,6 +139,11 @@ export const doctorAPI = {
     api.post(`/doctor/patients/${patientId}/records`, formData, {
       headers: { 'Content-Type': 'multipart/form-data' },
     }),
+  downloadPatientRecord: (patientId, recordId, inline = false) =>
+    api.get(`/doctor/patients/${patientId}/records/${recordId}/download`, {
+      params: inline ? { inline: true } : {},
+      responseType: 'blob'
+    }),
   assignPatient: (patientId) => api.post(`/doctor/patients/${patientId}/assign`),
   searchPatients: (query = '') => {
     const params = {};